@@ -1,24 +1,33 @@
 """Claude SDK for Python."""
 
-from collections.abc import Awaitable, Callable
+import base64
+import importlib
+import inspect
+import re
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
-from typing import Any, Generic, TypeVar
+from typing import TYPE_CHECKING, Any, Generic, Literal, Protocol, TypeVar, cast
 
 from ._errors import (
+    BudgetExceededError,
     ClaudeSDKError,
     CLIConnectionError,
     CLIJSONDecodeError,
     CLINotFoundError,
+    FanoutCancelledError,
     ProcessError,
+    TranscriptMismatchError,
 )
+from ._internal.schema_validation import compile_validator
+from ._internal.tool_metrics import ToolCallMetrics, ToolCallStats
 from ._internal.transport import Transport
 from ._version import __version__
-from .client import ClaudeSDKClient
-from .query import query
 from .types import (
     AgentDefinition,
     AssistantMessage,
     BaseHookInput,
+    Budget,
     CanUseTool,
     ClaudeAgentOptions,
     ContentBlock,
@@ -38,13 +47,24 @@ from .types import (
     PostToolUseHookInput,
     PreCompactHookInput,
     PreToolUseHookInput,
+    ProcessLimits,
+    ProcessResourceStats,
+    QueryBatchStats,
+    ReconnectPolicy,
+    ReconnectStats,
     ResultMessage,
     SettingSource,
+    ShutdownPolicy,
+    ShutdownStats,
+    StderrEvent,
+    StopCondition,
     StopHookInput,
+    StoppedResponse,
     SubagentStopHookInput,
     SystemMessage,
     TextBlock,
     ThinkingBlock,
+    ToolInvocationResult,
     ToolPermissionContext,
     ToolResultBlock,
     ToolUseBlock,
@@ -52,11 +72,89 @@ from .types import (
     UserPromptSubmitHookInput,
 )
 
+if TYPE_CHECKING:
+    import anyio
+
+    from ._internal.transport.replay import RecordingTransport, ReplayTransport
+    from ._internal.transport.socket_transport import SocketTransport
+    from ._internal.transport.subprocess_cli import CompiledOptions
+    from .client import ClaudeSDKClient, tool_result
+    from .fanout import MessageFanout, MessageSubscription
+    from .query import query, query_many
+    from .query_cache import QueryCache, QueryCacheStats
+    from .relay import RelayServer, RelayStats
+    from .session_template import SessionTemplate
+    from .shared_client import SharedClaudeSDKClient
+    from .sync_client import SyncClaudeClient
+    from .tool_invocation import invoke_tool, tool_session
+
+# Public names imported on first use, so that importing the package does not
+# load anyio, mcp and pydantic for programs that never run a session
+_LAZY_IMPORTS = {
+    "ClaudeSDKClient": ".client",
+    "tool_result": ".client",
+    "MessageFanout": ".fanout",
+    "MessageSubscription": ".fanout",
+    "query": ".query",
+    "query_many": ".query",
+    "QueryCache": ".query_cache",
+    "QueryCacheStats": ".query_cache",
+    "SessionTemplate": ".session_template",
+    "SharedClaudeSDKClient": ".shared_client",
+    "SyncClaudeClient": ".sync_client",
+    "invoke_tool": ".tool_invocation",
+    "tool_session": ".tool_invocation",
+    "RecordingTransport": "._internal.transport.replay",
+    "ReplayTransport": "._internal.transport.replay",
+    "SocketTransport": "._internal.transport.socket_transport",
+    "RelayServer": ".relay",
+    "RelayStats": ".relay",
+    "CompiledOptions": "._internal.transport.subprocess_cli",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
+
+
 # MCP Server Support
 
 T = TypeVar("T")
 
 
+ToolExecutor = Literal["thread", "process"]
+
+_ArgsT_contra = TypeVar("_ArgsT_contra", contravariant=True)
+
+
+class _ContextToolHandler(Protocol[_ArgsT_contra]):
+    """Tool handler taking the server context as its ``context`` parameter."""
+
+    __qualname__: str
+
+    def __call__(
+        self, args: _ArgsT_contra, /, *, context: Any
+    ) -> Awaitable[dict[str, Any]]: ...
+
+
+# A tool handler: async, async taking the server context, or synchronous when
+# run by an executor
+_ToolHandler = (
+    Callable[[T], Awaitable[dict[str, Any]]]
+    | _ContextToolHandler[T]
+    | Callable[[T], dict[str, Any]]
+)
+
+
 @dataclass
 class SdkMcpTool(Generic[T]):
     """Definition for an SDK MCP tool."""
@@ -64,12 +162,21 @@ class SdkMcpTool(Generic[T]):
     name: str
     description: str
     input_schema: type[T] | dict[str, Any]
-    handler: Callable[[T], Awaitable[dict[str, Any]]]
+    handler: _ToolHandler[T]
+    # Run a synchronous handler in a worker thread or process instead of on
+    # the event loop, with at most max_workers calls in flight
+    executor: ToolExecutor | None = None
+    max_workers: int | None = None
 
 
 def tool(
-    name: str, description: str, input_schema: type | dict[str, Any]
-) -> Callable[[Callable[[Any], Awaitable[dict[str, Any]]]], SdkMcpTool[Any]]:
+    name: str,
+    description: str,
+    input_schema: type | dict[str, Any],
+    *,
+    executor: ToolExecutor | None = None,
+    max_workers: int | None = None,
+) -> Callable[[_ToolHandler[Any]], SdkMcpTool[Any]]:
     """Decorator for defining MCP tools with type safety.
 
     Creates a tool that can be used with SDK MCP servers. The tool runs
@@ -86,6 +193,18 @@ def tool(
             - A dictionary mapping parameter names to types (e.g., {"text": str})
             - A TypedDict class for more complex schemas
             - A JSON Schema dictionary for full validation
+        executor: Run the tool outside the event loop, for CPU-bound work that
+            would otherwise stall message routing for every session:
+            - "thread": run in a worker thread
+            - "process": run in a worker process (the function must be
+              defined at module level, and its arguments and result must
+              be picklable)
+            The function must then be a regular (non-async) function taking
+            only the arguments dict, as the server context can't be passed
+            to another thread or process safely.
+        max_workers: Maximum number of concurrent calls of this tool on a
+            server when using an executor. Defaults to the anyio default for
+            the executor (40 threads, or one process per CPU).
 
     Returns:
         A decorator function that wraps the tool implementation and returns
@@ -110,28 +229,367 @@ def tool(
         ...         return {"content": [{"type": "text", "text": "Error: Division by zero"}], "is_error": True}
         ...     return {"content": [{"type": "text", "text": f"Result: {args['a'] / args['b']}"}]}
 
+        CPU-bound tool running in a process pool:
+        >>> @tool("parse_fees", "Extract fees from HTML", {"html": str}, executor="process")
+        ... def parse_fees(args):
+        ...     fees = extract_fees(args["html"])
+        ...     return {"content": [{"type": "text", "text": json.dumps(fees)}]}
+
     Notes:
-        - The tool function must be async (defined with async def)
-        - The function receives a single dict argument with the input parameters
+        - The tool function must be async (defined with async def), unless an
+          executor is used
+        - The function receives a dict argument with the input parameters
+        - If the function has a parameter named ``context``, it receives the
+          context object of the server it belongs to (see
+          create_sdk_mcp_server())
         - The function should return a dict with a "content" key containing the response
         - Errors can be indicated by including "is_error": True in the response
     """
 
-    def decorator(
-        handler: Callable[[Any], Awaitable[dict[str, Any]]],
-    ) -> SdkMcpTool[Any]:
+    if max_workers is not None and max_workers < 1:
+        raise ValueError("max_workers must be at least 1")
+
+    def decorator(handler: _ToolHandler[Any]) -> SdkMcpTool[Any]:
+        if executor is not None:
+            if inspect.iscoroutinefunction(handler):
+                raise TypeError(
+                    f"Tool '{name}' uses the {executor} executor, so its function "
+                    "must be a regular function, not async"
+                )
+            if _accepts_context(handler):
+                raise TypeError(
+                    f"Tool '{name}' uses the {executor} executor, so its function "
+                    "can't take the server context"
+                )
+            if executor == "process" and "<locals>" in handler.__qualname__:
+                raise ValueError(
+                    f"Tool '{name}' uses the process executor, so its function "
+                    "must be defined at module level"
+                )
         return SdkMcpTool(
             name=name,
             description=description,
             input_schema=input_schema,
             handler=handler,
+            executor=executor,
+            max_workers=max_workers,
         )
 
     return decorator
 
 
+def _run_in_worker_process(
+    module: str, qualname: str, args: dict[str, Any]
+) -> dict[str, Any]:
+    """Look up a tool by import path and run its handler in a worker process.
+
+    Decorated tools replace their function in the module namespace, so the
+    handler can't be pickled by reference and is resolved here instead.
+    """
+    target: Any = importlib.import_module(module)
+    for attr in qualname.split("."):
+        target = getattr(target, attr)
+    if isinstance(target, SdkMcpTool):
+        target = target.handler
+    result: dict[str, Any] = target(args)
+    return result
+
+
+async def _run_in_executor(
+    tool_def: SdkMcpTool[Any],
+    arguments: dict[str, Any],
+    limiter: "anyio.CapacityLimiter | None",
+) -> dict[str, Any]:
+    """Run a synchronous tool handler in a worker thread or process."""
+    from anyio import to_process, to_thread
+
+    if tool_def.executor == "process":
+        result = await to_process.run_sync(
+            _run_in_worker_process,
+            tool_def.handler.__module__,
+            tool_def.handler.__qualname__,
+            arguments,
+            cancellable=True,
+            limiter=limiter,
+        )
+    else:
+        handler = cast(Callable[[dict[str, Any]], Any], tool_def.handler)
+        result = await to_thread.run_sync(handler, arguments, limiter=limiter)
+
+    if not isinstance(result, dict):
+        raise TypeError(
+            f"Tool '{tool_def.name}' must return a dict, got {type(result).__name__}"
+        )
+    return result
+
+
+@dataclass
+class SdkMcpResource:
+    """Definition for an SDK MCP resource or resource template."""
+
+    uri: str
+    name: str
+    description: str | None
+    mime_type: str | None
+    handler: Callable[..., Awaitable[str | bytes]]
+
+
+def resource(
+    uri: str,
+    name: str,
+    description: str | None = None,
+    mime_type: str | None = None,
+) -> Callable[[Callable[..., Awaitable[str | bytes]]], SdkMcpResource]:
+    """Decorator for exposing data as an MCP resource.
+
+    Resources let Claude fetch reference data on demand instead of having it
+    inlined in the system prompt. The handler is only called when the resource
+    is actually read.
+
+    Args:
+        uri: Resource URI. May be a URI template with ``{name}`` placeholders
+            (e.g. ``"docs://courses/{state}"``) to expose a family of
+            resources, such as the sections or pages of a large document.
+        name: Human-readable name of the resource.
+        description: Optional description shown to Claude.
+        mime_type: Optional MIME type of the content. Defaults to
+            ``text/plain`` for text content.
+
+    Returns:
+        A decorator that wraps the handler and returns an SdkMcpResource
+        instance ready for use with create_sdk_mcp_server().
+
+    Example:
+        >>> @resource("docs://pricing/{tier}", "Pricing", mime_type="text/markdown")
+        ... async def pricing(params):
+        ...     return Path(f"pricing/{params['tier']}.md").read_text()
+
+    Notes:
+        - The handler receives a dict of the values matched by the URI template
+          (empty for plain URIs) and, if it has a parameter named
+          ``context``, the server context
+        - Return ``str`` for text content or ``bytes`` for binary content
+    """
+
+    def decorator(handler: Callable[..., Awaitable[str | bytes]]) -> SdkMcpResource:
+        return SdkMcpResource(
+            uri=uri,
+            name=name,
+            description=description,
+            mime_type=mime_type,
+            handler=handler,
+        )
+
+    return decorator
+
+
+@dataclass
+class SdkMcpPrompt:
+    """Definition for an SDK MCP prompt."""
+
+    name: str
+    description: str | None
+    arguments: dict[str, str]
+    handler: Callable[..., Awaitable[str | list[dict[str, Any]]]]
+
+
+def prompt(
+    name: str,
+    description: str | None = None,
+    arguments: dict[str, str] | None = None,
+) -> Callable[[Callable[..., Awaitable[str | list[dict[str, Any]]]]], SdkMcpPrompt]:
+    """Decorator for defining MCP prompts.
+
+    Args:
+        name: Unique identifier for the prompt.
+        description: Optional description of what the prompt is for.
+        arguments: Mapping of required argument names to their descriptions.
+
+    Returns:
+        A decorator that wraps the handler and returns an SdkMcpPrompt
+        instance ready for use with create_sdk_mcp_server().
+
+    Example:
+        >>> @prompt("summarize", "Summarize a course", {"course": "Course name"})
+        ... async def summarize(args):
+        ...     return f"Summarize what we know about {args['course']}."
+
+    Notes:
+        - The handler receives a dict of argument values and, if it has a
+          parameter named ``context``, the server context
+        - Return a string for a single user message, or a list of
+          ``{"role": "user" | "assistant", "content": str}`` dicts
+    """
+
+    def decorator(
+        handler: Callable[..., Awaitable[str | list[dict[str, Any]]]],
+    ) -> SdkMcpPrompt:
+        return SdkMcpPrompt(
+            name=name,
+            description=description,
+            arguments=arguments or {},
+            handler=handler,
+        )
+
+    return decorator
+
+
+def _compile_uri_template(uri: str) -> re.Pattern[str] | None:
+    """Compile a ``{name}`` style URI template into a regex, or None for plain URIs."""
+    parts = re.split(r"\{(\w+)\}", uri)
+    if len(parts) == 1:
+        return None
+    pattern = "".join(
+        re.escape(part) if index % 2 == 0 else f"(?P<{part}>[^/]+)"
+        for index, part in enumerate(parts)
+    )
+    return re.compile(pattern)
+
+
+def _paginate(
+    items: list[Any], cursor: str | None, page_size: int | None
+) -> tuple[list[Any], str | None]:
+    """Return one page of items and the cursor of the next page, if any."""
+    if not page_size:
+        return items, None
+    try:
+        start = int(cursor) if cursor else 0
+    except ValueError as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    end = start + page_size
+    return items[start:end], str(end) if end < len(items) else None
+
+
+def _accepts_context(handler: Callable[..., Any]) -> bool:
+    """Check whether a handler takes the server context.
+
+    The context is passed as the keyword argument ``context``, so that other
+    optional parameters of the handler are left alone.
+    """
+    try:
+        parameter = inspect.signature(handler).parameters.get("context")
+    except (TypeError, ValueError):
+        return False
+    return parameter is not None and parameter.kind in (
+        inspect.Parameter.POSITIONAL_OR_KEYWORD,
+        inspect.Parameter.KEYWORD_ONLY,
+    )
+
+
+class _SharedContext:
+    """Reference-counted server context shared by every session using a server.
+
+    The context is activated when the first client session using the server
+    starts and released when the last one closes, so resources such as pooled
+    HTTP clients stay warm across tool calls instead of being rebuilt per call.
+    The capacity limiters of executor tools live as long, as they belong to
+    the event loop of the sessions.
+    """
+
+    def __init__(self, context: Any) -> None:
+        self._context = context
+        self._is_factory = isinstance(context, type) or (
+            callable(context) and not hasattr(context, "__aenter__")
+        )
+        self._active: Any = None
+        self._users = 0
+        self._lock: anyio.Lock | None = None
+        self._limiters: dict[str, anyio.CapacityLimiter] = {}
+        self.value: Any = None if self._is_factory else context
+
+    def limiter(self, tool_def: SdkMcpTool[Any]) -> "anyio.CapacityLimiter | None":
+        """Return the limiter bounding the concurrent calls of a tool."""
+        import anyio
+
+        if tool_def.max_workers is None:
+            return None
+        limiter = self._limiters.get(tool_def.name)
+        if limiter is None:
+            limiter = anyio.CapacityLimiter(tool_def.max_workers)
+            self._limiters[tool_def.name] = limiter
+        return limiter
+
+    @asynccontextmanager
+    async def lifespan(self, _server: Any) -> AsyncIterator[Any]:
+        """Activate the context for the duration of a client session."""
+        import anyio
+
+        if self._lock is None:
+            self._lock = anyio.Lock()
+
+        async with self._lock:
+            if self._users == 0:
+                self._limiters.clear()
+                self._active = self._context() if self._is_factory else self._context
+                if hasattr(self._active, "__aenter__"):
+                    self.value = await self._active.__aenter__()
+                else:
+                    self.value = self._active
+            self._users += 1
+
+        try:
+            yield self.value
+        finally:
+            with anyio.CancelScope(shield=True):
+                async with self._lock:
+                    self._users -= 1
+                    if self._users == 0:
+                        self._limiters.clear()
+                        active, self._active = self._active, None
+                        if self._is_factory:
+                            self.value = None
+                        if hasattr(active, "__aexit__"):
+                            await active.__aexit__(None, None, None)
+
+
+def _tool_input_schema(tool_def: SdkMcpTool[Any]) -> dict[str, Any]:
+    """Convert a tool's input_schema to JSON Schema format."""
+    if not isinstance(tool_def.input_schema, dict):
+        # For TypedDict or other types, create basic schema
+        return {"type": "object", "properties": {}}
+
+    # Check if it's already a JSON schema
+    if "type" in tool_def.input_schema and "properties" in tool_def.input_schema:
+        return tool_def.input_schema
+
+    # Simple dict mapping names to types - convert to JSON schema
+    properties = {}
+    for param_name, param_type in tool_def.input_schema.items():
+        if param_type is str:
+            properties[param_name] = {"type": "string"}
+        elif param_type is int:
+            properties[param_name] = {"type": "integer"}
+        elif param_type is float:
+            properties[param_name] = {"type": "number"}
+        elif param_type is bool:
+            properties[param_name] = {"type": "boolean"}
+        else:
+            properties[param_name] = {"type": "string"}  # Default
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties.keys()),
+    }
+
+
+@dataclass
+class _RegisteredTool:
+    """A tool registered on an SDK MCP server, with its compiled schema."""
+
+    tool: SdkMcpTool[Any]
+    schema: dict[str, Any]
+    validate: Callable[[Any], str | None]
+    takes_context: bool
+
+
 def create_sdk_mcp_server(
-    name: str, version: str = "1.0.0", tools: list[SdkMcpTool[Any]] | None = None
+    name: str,
+    version: str = "1.0.0",
+    tools: list[SdkMcpTool[Any]] | None = None,
+    context: Any = None,
+    resources: list[SdkMcpResource] | None = None,
+    prompts: list[SdkMcpPrompt] | None = None,
+    page_size: int | None = None,
 ) -> McpSdkServerConfig:
     """Create an in-process MCP server that runs within your Python application.
 
@@ -150,6 +608,21 @@ def create_sdk_mcp_server(
         tools: List of SdkMcpTool instances created with the @tool decorator.
             These are the functions that Claude can call through this server.
             If None or empty, the server will have no tools (rarely useful).
+        context: Optional shared resource (e.g. a pooled HTTP client or a
+            database pool) passed to every handler with a parameter named
+            ``context``. Can be either the object itself or a zero-argument
+            callable that creates it, such as a class. Async context managers
+            are entered when the first client session using this server starts
+            and exited when the last one closes, so connections are reused
+            across tool calls for the lifetime of the session. Use a callable
+            for resources that cannot be reopened once closed.
+        resources: List of SdkMcpResource instances created with the
+            @resource decorator. Claude reads them lazily, so large reference
+            data does not have to be inlined in the prompt.
+        prompts: List of SdkMcpPrompt instances created with the @prompt
+            decorator.
+        page_size: If set, resource and prompt listings are paginated with
+            this many entries per page.
 
     Returns:
         McpSdkServerConfig: A configuration object that can be passed to
@@ -192,88 +665,136 @@ def create_sdk_mcp_server(
         >>>
         >>> server = create_sdk_mcp_server("store", tools=[add_item])
 
+        Server with a pooled HTTP client shared by all tool calls:
+        >>> @tool("fetch", "Fetch a URL", {"url": str})
+        ... async def fetch(args, context):
+        ...     response = await context.get(args["url"])
+        ...     return {"content": [{"type": "text", "text": response.text}]}
+        >>>
+        >>> server = create_sdk_mcp_server("web", tools=[fetch], context=httpx.AsyncClient)
+
     Notes:
         - The server runs in the same process as your Python application
         - Tools have direct access to your application's variables and state
         - No subprocess or IPC overhead for tool calls
         - Server lifecycle is managed automatically by the SDK
+        - The tools, resources and prompts lists are read on every listing,
+          but changes are not announced to a connected session; Claude sees
+          them when it next lists them, e.g. in a new session
 
     See Also:
         - tool(): Decorator for creating tool functions
         - ClaudeAgentOptions: Configuration for using servers with query()
     """
     from mcp.server import Server
-    from mcp.types import ImageContent, TextContent, Tool
+    from mcp.types import (
+        BlobResourceContents,
+        CallToolResult,
+        GetPromptRequest,
+        GetPromptResult,
+        ImageContent,
+        ListPromptsRequest,
+        ListPromptsResult,
+        ListResourcesRequest,
+        ListResourcesResult,
+        ListResourceTemplatesRequest,
+        ListResourceTemplatesResult,
+        Prompt,
+        PromptArgument,
+        PromptMessage,
+        ReadResourceRequest,
+        ReadResourceResult,
+        Resource,
+        ResourceTemplate,
+        ServerResult,
+        TextContent,
+        TextResourceContents,
+        Tool,
+    )
 
-    # Create MCP server instance
-    server = Server(name, version=version)
+    shared_context = _SharedContext(context)
+
+    # Create MCP server instance; its lifespan is entered by each client session
+    server = Server(name, version=version, lifespan=shared_context.lifespan)
 
     # Register tools if provided
-    if tools:
-        # Store tools for access in handlers
-        tool_map = {tool_def.name: tool_def for tool_def in tools}
+    if tools is not None:
+        # Store tools for access in handlers, refreshed when the list changes.
+        # Schemas and argument validators are built once per tool definition.
+        tool_map: dict[str, _RegisteredTool] = {}
+
+        def refresh_tools() -> None:
+            previous = dict(tool_map)
+            tool_map.clear()
+            for tool_def in tools:
+                registered = previous.get(tool_def.name)
+                if registered is None or registered.tool is not tool_def:
+                    schema = _tool_input_schema(tool_def)
+                    registered = _RegisteredTool(
+                        tool=tool_def,
+                        schema=schema,
+                        validate=compile_validator(schema),
+                        takes_context=_accepts_context(tool_def.handler),
+                    )
+                tool_map[tool_def.name] = registered
+
+        refresh_tools()
 
         # Register list_tools handler to expose available tools
         @server.list_tools()  # type: ignore[no-untyped-call,misc]
         async def list_tools() -> list[Tool]:
             """Return the list of available tools."""
-            tool_list = []
-            for tool_def in tools:
-                # Convert input_schema to JSON Schema format
-                if isinstance(tool_def.input_schema, dict):
-                    # Check if it's already a JSON schema
-                    if (
-                        "type" in tool_def.input_schema
-                        and "properties" in tool_def.input_schema
-                    ):
-                        schema = tool_def.input_schema
-                    else:
-                        # Simple dict mapping names to types - convert to JSON schema
-                        properties = {}
-                        for param_name, param_type in tool_def.input_schema.items():
-                            if param_type is str:
-                                properties[param_name] = {"type": "string"}
-                            elif param_type is int:
-                                properties[param_name] = {"type": "integer"}
-                            elif param_type is float:
-                                properties[param_name] = {"type": "number"}
-                            elif param_type is bool:
-                                properties[param_name] = {"type": "boolean"}
-                            else:
-                                properties[param_name] = {"type": "string"}  # Default
-                        schema = {
-                            "type": "object",
-                            "properties": properties,
-                            "required": list(properties.keys()),
-                        }
-                else:
-                    # For TypedDict or other types, create basic schema
-                    schema = {"type": "object", "properties": {}}
-
-                tool_list.append(
-                    Tool(
-                        name=tool_def.name,
-                        description=tool_def.description,
-                        inputSchema=schema,
-                    )
+            refresh_tools()
+            return [
+                Tool(
+                    name=registered.tool.name,
+                    description=registered.tool.description,
+                    inputSchema=registered.schema,
                 )
-            return tool_list
+                for registered in tool_map.values()
+            ]
 
-        # Register call_tool handler to execute tools
-        @server.call_tool()  # type: ignore[misc]
+        # Register call_tool handler to execute tools. Arguments are validated
+        # here with the precompiled validators, so skip the MCP SDK's own
+        @server.call_tool(validate_input=False)  # type: ignore[misc]
         async def call_tool(name: str, arguments: dict[str, Any]) -> Any:
             """Execute a tool by name with given arguments."""
+            if name not in tool_map:
+                refresh_tools()
             if name not in tool_map:
                 raise ValueError(f"Tool '{name}' not found")
 
-            tool_def = tool_map[name]
-            # Call the tool's handler with arguments
-            result = await tool_def.handler(arguments)
+            registered = tool_map[name]
+            tool_def = registered.tool
+
+            # Reject malformed calls without running the handler, so Claude
+            # gets an actionable error instead of a handler crash
+            error = registered.validate(arguments)
+            if error:
+                return CallToolResult(
+                    content=[
+                        TextContent(
+                            type="text",
+                            text=f"Invalid arguments for tool '{name}': {error}",
+                        )
+                    ],
+                    isError=True,
+                )
+
+            # Call the tool's handler with arguments (and context if it takes one)
+            if tool_def.executor is not None:
+                result = await _run_in_executor(
+                    tool_def, arguments, shared_context.limiter(tool_def)
+                )
+            elif registered.takes_context:
+                handler = cast(Callable[..., Awaitable[Any]], tool_def.handler)
+                result = await handler(arguments, context=shared_context.value)
+            else:
+                handler = cast(Callable[[Any], Awaitable[Any]], tool_def.handler)
+                result = await handler(arguments)
 
             # Convert result to MCP format
-            # The decorator expects us to return the content, not a CallToolResult
-            # It will wrap our return value in CallToolResult
-            content: list[TextContent | ImageContent] = []
+            content: list[Any] = []
             if "content" in result:
                 for item in result["content"]:
                     if item.get("type") == "text":
@@ -287,8 +808,160 @@ def create_sdk_mcp_server(
                             )
                         )
 
-            # Return just the content list - the decorator wraps it
-            return content
+            return CallToolResult(content=content, isError=bool(result.get("is_error")))
+
+    # Register resources if provided. Handlers are registered directly so that
+    # listings can be paginated independently of the MCP SDK version.
+    if resources is not None:
+
+        def find_resource(uri: str) -> tuple[SdkMcpResource, dict[str, str]]:
+            for resource_def in resources:
+                if resource_def.uri == uri:
+                    return resource_def, {}
+            for resource_def in resources:
+                template = _compile_uri_template(resource_def.uri)
+                match = template.fullmatch(uri) if template else None
+                if match:
+                    return resource_def, match.groupdict()
+            raise ValueError(f"Resource '{uri}' not found")
+
+        async def list_resources(request: ListResourcesRequest) -> ServerResult:
+            cursor = request.params.cursor if request.params else None
+            page, next_cursor = _paginate(
+                [r for r in resources if _compile_uri_template(r.uri) is None],
+                cursor,
+                page_size,
+            )
+            return ServerResult(
+                ListResourcesResult(
+                    resources=[
+                        Resource(
+                            uri=resource_def.uri,
+                            name=resource_def.name,
+                            description=resource_def.description,
+                            mimeType=resource_def.mime_type,
+                        )
+                        for resource_def in page
+                    ],
+                    nextCursor=next_cursor,
+                )
+            )
+
+        async def list_resource_templates(
+            request: ListResourceTemplatesRequest,
+        ) -> ServerResult:
+            cursor = request.params.cursor if request.params else None
+            page, next_cursor = _paginate(
+                [r for r in resources if _compile_uri_template(r.uri) is not None],
+                cursor,
+                page_size,
+            )
+            return ServerResult(
+                ListResourceTemplatesResult(
+                    resourceTemplates=[
+                        ResourceTemplate(
+                            uriTemplate=resource_def.uri,
+                            name=resource_def.name,
+                            description=resource_def.description,
+                            mimeType=resource_def.mime_type,
+                        )
+                        for resource_def in page
+                    ],
+                    nextCursor=next_cursor,
+                )
+            )
+
+        async def read_resource(request: ReadResourceRequest) -> ServerResult:
+            uri = str(request.params.uri)
+            resource_def, params = find_resource(uri)
+            if _accepts_context(resource_def.handler):
+                data = await resource_def.handler(params, context=shared_context.value)
+            else:
+                data = await resource_def.handler(params)
+
+            contents: TextResourceContents | BlobResourceContents
+            if isinstance(data, bytes):
+                contents = BlobResourceContents(
+                    uri=request.params.uri,
+                    blob=base64.b64encode(data).decode(),
+                    mimeType=resource_def.mime_type or "application/octet-stream",
+                )
+            else:
+                contents = TextResourceContents(
+                    uri=request.params.uri,
+                    text=data,
+                    mimeType=resource_def.mime_type or "text/plain",
+                )
+            return ServerResult(ReadResourceResult(contents=[contents]))
+
+        server.request_handlers[ListResourcesRequest] = list_resources
+        server.request_handlers[ListResourceTemplatesRequest] = list_resource_templates
+        server.request_handlers[ReadResourceRequest] = read_resource
+
+    # Register prompts if provided
+    if prompts is not None:
+
+        async def list_prompts(request: ListPromptsRequest) -> ServerResult:
+            cursor = request.params.cursor if request.params else None
+            page, next_cursor = _paginate(list(prompts), cursor, page_size)
+            return ServerResult(
+                ListPromptsResult(
+                    prompts=[
+                        Prompt(
+                            name=prompt_def.name,
+                            description=prompt_def.description,
+                            arguments=[
+                                PromptArgument(
+                                    name=arg_name, description=arg_desc, required=True
+                                )
+                                for arg_name, arg_desc in prompt_def.arguments.items()
+                            ],
+                        )
+                        for prompt_def in page
+                    ],
+                    nextCursor=next_cursor,
+                )
+            )
+
+        async def get_prompt(request: GetPromptRequest) -> ServerResult:
+            prompt_def = next(
+                (p for p in prompts if p.name == request.params.name), None
+            )
+            if prompt_def is None:
+                raise ValueError(f"Prompt '{request.params.name}' not found")
+
+            arguments = request.params.arguments or {}
+            missing = [name for name in prompt_def.arguments if name not in arguments]
+            if missing:
+                raise ValueError(
+                    f"Missing arguments for prompt '{prompt_def.name}': "
+                    + ", ".join(missing)
+                )
+
+            if _accepts_context(prompt_def.handler):
+                output = await prompt_def.handler(
+                    arguments, context=shared_context.value
+                )
+            else:
+                output = await prompt_def.handler(arguments)
+
+            if isinstance(output, str):
+                output = [{"role": "user", "content": output}]
+            return ServerResult(
+                GetPromptResult(
+                    description=prompt_def.description,
+                    messages=[
+                        PromptMessage(
+                            role=message["role"],
+                            content=TextContent(type="text", text=message["content"]),
+                        )
+                        for message in output
+                    ],
+                )
+            )
+
+        server.request_handlers[ListPromptsRequest] = list_prompts
+        server.request_handlers[GetPromptRequest] = get_prompt
 
     # Return SDK server configuration
     return McpSdkServerConfig(type="sdk", name=name, instance=server)
@@ -297,10 +970,28 @@ def create_sdk_mcp_server(
 __all__ = [
     # Main exports
     "query",
+    "query_many",
+    "QueryBatchStats",
+    "QueryCache",
+    "QueryCacheStats",
     "__version__",
     # Transport
     "Transport",
+    "RecordingTransport",
+    "ReplayTransport",
+    "SocketTransport",
+    "RelayServer",
+    "RelayStats",
     "ClaudeSDKClient",
+    "SharedClaudeSDKClient",
+    "SyncClaudeClient",
+    "SessionTemplate",
+    "MessageFanout",
+    "MessageSubscription",
+    # Early termination
+    "StopCondition",
+    "StoppedResponse",
+    "tool_result",
     # Types
     "PermissionMode",
     "McpServerConfig",
@@ -311,11 +1002,23 @@ __all__ = [
     "ResultMessage",
     "Message",
     "ClaudeAgentOptions",
+    "CompiledOptions",
+    "Budget",
+    "ShutdownPolicy",
+    "ReconnectPolicy",
+    "ReconnectStats",
+    "ShutdownStats",
+    "ProcessLimits",
+    "ProcessResourceStats",
+    "StderrEvent",
     "TextBlock",
     "ThinkingBlock",
     "ToolUseBlock",
     "ToolResultBlock",
     "ContentBlock",
+    # Tool call metrics
+    "ToolCallMetrics",
+    "ToolCallStats",
     # Tool callbacks
     "CanUseTool",
     "ToolPermissionContext",
@@ -343,10 +1046,21 @@ __all__ = [
     "create_sdk_mcp_server",
     "tool",
     "SdkMcpTool",
+    "invoke_tool",
+    "tool_session",
+    "ToolInvocationResult",
+    "ToolExecutor",
+    "resource",
+    "SdkMcpResource",
+    "prompt",
+    "SdkMcpPrompt",
     # Errors
     "ClaudeSDKError",
     "CLIConnectionError",
     "CLINotFoundError",
     "ProcessError",
     "CLIJSONDecodeError",
+    "FanoutCancelledError",
+    "TranscriptMismatchError",
+    "BudgetExceededError",
 ]
@@ -1,6 +1,9 @@
 """Error types for Claude SDK."""
 
-from typing import Any
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .types import ResultMessage
 
 
 class ClaudeSDKError(Exception):
@@ -54,3 +57,44 @@ class MessageParseError(ClaudeSDKError):
     def __init__(self, message: str, data: dict[str, Any] | None = None):
         self.data = data
         super().__init__(message)
+
+
+class TranscriptMismatchError(ClaudeSDKError):
+    """Raised when a replayed session diverges from its recorded transcript."""
+
+    def __init__(self, message: str, expected: Any = None, actual: Any = None):
+        self.expected = expected
+        self.actual = actual
+        super().__init__(message)
+
+
+class FanoutCancelledError(ClaudeSDKError):
+    """Raised by a MessageSubscription whose MessageFanout stopped early.
+
+    MessageFanout.run() was cancelled before the source ended, so the
+    messages received by the subscription are not the whole stream.
+    """
+
+
+class BudgetExceededError(ClaudeSDKError):
+    """Raised when a session exceeds its ClaudeAgentOptions.budget.
+
+    Claude has been interrupted. Messages received before the limit was hit
+    have already been delivered; ``result`` is the ResultMessage of the
+    interrupted turn, if one was received, with the actual cost.
+    """
+
+    def __init__(
+        self,
+        reason: str,
+        cost_usd: float,
+        tokens: int,
+        elapsed: float,
+        result: "ResultMessage | None" = None,
+    ):
+        self.reason = reason
+        self.cost_usd = cost_usd
+        self.tokens = tokens
+        self.elapsed = elapsed
+        self.result = result
+        super().__init__(f"Budget exceeded: {reason}")
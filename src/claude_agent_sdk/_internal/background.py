@@ -0,0 +1,117 @@
+"""Background tasks of a session that outlive the call starting them."""
+
+import asyncio
+import logging
+import math
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import anyio
+from anyio.abc import TaskGroup
+
+logger = logging.getLogger(__name__)
+
+# Seconds close() waits for cancelled tasks to end
+_CANCEL_TIMEOUT = 5.0
+
+_Spawned = tuple[Callable[..., Awaitable[Any]], tuple[Any, ...]]
+
+
+class BackgroundTasks:
+    """Tasks of a session, cancelled by close() from any task.
+
+    Sessions start tasks (e.g. the message reader) that must keep running
+    after connect() returns. A task group entered by connect() could only be
+    exited by the same task, within the same cancel scope, yet close() may
+    run elsewhere: in another task, inside a cancel scope entered since, or
+    when an abandoned query() generator is finalized. The tasks therefore
+    run in a task group owned by a dedicated runner task, started on the
+    running event loop by the first spawn(), which close() cancels and
+    waits for.
+
+    A failing task does not affect the others. Its error is logged and
+    passed to on_error, so that it reaches the session's caller, e.g. as
+    an error raised while receiving messages.
+    """
+
+    def __init__(self, on_error: Callable[[Exception], object] | None = None) -> None:
+        self._on_error = on_error
+        self._send, self._receive = anyio.create_memory_object_stream[_Spawned](
+            max_buffer_size=math.inf
+        )
+        self._group: TaskGroup | None = None
+        # Set once the runner has ended, if it was started
+        self._done: anyio.Event | None = None
+        # The asyncio runner task, referenced until done
+        self._runner: asyncio.Task[None] | None = None
+        self._closed = False
+
+    def spawn(self, func: Callable[..., Awaitable[Any]], *args: Any) -> None:
+        """Run a task until it finishes or close() is called."""
+        if self._closed:
+            return
+        self._send.send_nowait((func, args))
+        if self._done is not None:
+            return
+
+        self._done = anyio.Event()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Not on asyncio, so on trio, where a system task is not tied to
+            # the task calling spawn()
+            import trio  # type: ignore[import-untyped,import-not-found,unused-ignore]
+
+            trio.lowlevel.spawn_system_task(self._run)
+            return
+        self._runner = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        assert self._done is not None
+        try:
+            async with anyio.create_task_group() as group, self._receive:
+                self._group = group
+                if self._closed:
+                    group.cancel_scope.cancel()
+                async for func, args in self._receive:
+                    group.start_soon(self._run_task, func, args, name=func.__name__)
+        except Exception as e:
+            # _run_task() handles the tasks' errors, so this is a bug
+            logger.exception(f"Background task runner failed: {e!r}")
+        finally:
+            self._done.set()
+
+    async def _run_task(
+        self, func: Callable[..., Awaitable[Any]], args: tuple[Any, ...]
+    ) -> None:
+        if self._closed:
+            return
+        try:
+            await func(*args)
+        except Exception as e:
+            logger.error(f"Background task {func.__name__} failed: {e!r}")
+            if self._on_error is not None:
+                try:
+                    self._on_error(e)
+                except Exception:
+                    logger.exception("Handling a background task failure failed")
+
+    async def close(self) -> None:
+        """Cancel the tasks and wait for them to end."""
+        self._closed = True
+        self._send.close()
+        if self._group is not None:
+            self._group.cancel_scope.cancel()
+        if self._done is None:
+            # No task was spawned, so there is no runner to close the stream
+            self._receive.close()
+            return
+        if self._done.is_set():
+            return
+        with anyio.move_on_after(_CANCEL_TIMEOUT, shield=True):
+            await self._done.wait()
+        if not self._done.is_set():
+            logger.warning(
+                f"Background tasks still running {_CANCEL_TIMEOUT}s after "
+                "being cancelled, no longer waiting for them"
+            )
@@ -0,0 +1,98 @@
+"""Tracking of session usage against a Budget."""
+
+import time
+from typing import Any
+
+from ..types import Budget
+
+# Estimated USD per million (input, output) tokens by model family, for the
+# cost of a turn in progress only: the cost the CLI reports when the turn ends
+# replaces the estimate. Models of no known family are priced as the dearest.
+_PRICES_PER_MTOK: dict[str, tuple[float, float]] = {
+    "opus": (15.0, 75.0),
+    "sonnet": (3.0, 15.0),
+    "haiku": (1.0, 5.0),
+}
+_CACHE_WRITE_FACTOR = 1.25  # Cache writes relative to the input price
+_CACHE_READ_FACTOR = 0.1  # Cache reads relative to the input price
+
+
+class BudgetTracker:
+    """Accumulates the tokens and cost of a session from its raw messages.
+
+    The CLI may report one API response as several assistant messages that
+    repeat its usage, so usage is counted once per API message ID. When a turn
+    ends, the session cost its ResultMessage reports replaces the estimates.
+    """
+
+    def __init__(self, budget: Budget) -> None:
+        self.budget = budget
+        self._started = time.monotonic()
+        self._prices = {**_PRICES_PER_MTOK, **(budget.prices_per_mtok or {})}
+        self._settled_tokens = 0
+        self._settled_cost = 0.0
+        # Tokens and estimated cost of each API response of the current turn
+        self._turn: dict[str, tuple[int, float]] = {}
+
+    @property
+    def tokens(self) -> int:
+        return self._settled_tokens + sum(tokens for tokens, _ in self._turn.values())
+
+    @property
+    def cost_usd(self) -> float:
+        return self._settled_cost + sum(cost for _, cost in self._turn.values())
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self._started
+
+    def _estimate(self, model: str, usage: dict[str, Any]) -> tuple[int, float]:
+        input_tokens = usage.get("input_tokens") or 0
+        output_tokens = usage.get("output_tokens") or 0
+        cache_writes = usage.get("cache_creation_input_tokens") or 0
+        cache_reads = usage.get("cache_read_input_tokens") or 0
+
+        input_price, output_price = max(self._prices.values())
+        for family, prices in self._prices.items():
+            if family in model:
+                input_price, output_price = prices
+                break
+
+        cost = (
+            input_tokens * input_price
+            + cache_writes * input_price * _CACHE_WRITE_FACTOR
+            + cache_reads * input_price * _CACHE_READ_FACTOR
+            + output_tokens * output_price
+        ) / 1_000_000
+        tokens = input_tokens + cache_writes + cache_reads + output_tokens
+        return tokens, cost
+
+    def observe(self, message: dict[str, Any]) -> None:
+        """Account for a message read from the CLI."""
+        msg_type = message.get("type")
+        if msg_type == "assistant":
+            api_message = message.get("message") or {}
+            usage = api_message.get("usage")
+            if usage:
+                key = api_message.get("id") or str(len(self._turn))
+                self._turn[key] = self._estimate(api_message.get("model") or "", usage)
+        elif msg_type == "result":
+            self._settled_tokens = self.tokens
+            # The reported cost covers the session so far
+            reported = message.get("total_cost_usd")
+            if reported is not None:
+                self._settled_cost = reported
+            else:
+                self._settled_cost = self.cost_usd
+            self._turn.clear()
+
+    def exceeded(self) -> str | None:
+        """Description of the first limit exceeded, or None."""
+        budget = self.budget
+        if budget.max_cost_usd is not None and self.cost_usd > budget.max_cost_usd:
+            return f"cost ${self.cost_usd:.4f} over limit of ${budget.max_cost_usd:.4f}"
+        if budget.max_tokens is not None and self.tokens > budget.max_tokens:
+            return f"{self.tokens} tokens over limit of {budget.max_tokens}"
+        if budget.max_wall_time is not None and self.elapsed > budget.max_wall_time:
+            return f"{self.elapsed:.1f}s over time limit of {budget.max_wall_time}s"
+        return None
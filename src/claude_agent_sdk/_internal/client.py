@@ -12,8 +12,9 @@ from ..types import (
 )
 from .message_parser import parse_message
 from .query import Query
+from .structured_output import apply_structured_output
 from .transport import Transport
-from .transport.subprocess_cli import SubprocessCLITransport
+from .transport.subprocess_cli import CompiledOptions, SubprocessCLITransport
 
 
 class InternalClient:
@@ -41,10 +42,14 @@ class InternalClient:
     async def process_query(
         self,
         prompt: str | AsyncIterable[dict[str, Any]],
-        options: ClaudeAgentOptions,
+        options: ClaudeAgentOptions | CompiledOptions,
         transport: Transport | None = None,
     ) -> AsyncIterator[Message]:
         """Process a query through transport and Query."""
+        compiled: CompiledOptions | None = None
+        if isinstance(options, CompiledOptions):
+            compiled = options
+            options = options.options
 
         # Validate and configure permission settings (matching TypeScript SDK logic)
         configured_options = options
@@ -72,7 +77,7 @@ class InternalClient:
         else:
             chosen_transport = SubprocessCLITransport(
                 prompt=prompt,
-                options=configured_options,
+                options=compiled or configured_options,
             )
 
         # Connect transport
@@ -97,6 +102,8 @@ class InternalClient:
             if configured_options.hooks
             else None,
             sdk_mcp_servers=sdk_mcp_servers,
+            tool_metrics=configured_options.tool_metrics,
+            budget=configured_options.budget,
         )
 
         try:
@@ -108,15 +115,17 @@ class InternalClient:
                 await query.initialize()
 
             # Stream input if it's an AsyncIterable
-            if isinstance(prompt, AsyncIterable) and query._tg:
+            if isinstance(prompt, AsyncIterable):
                 # Start streaming in background
                 # Create a task that will run in the background
-                query._tg.start_soon(query.stream_input, prompt)
+                query.spawn(query.stream_input, prompt)
             # For string prompts, the prompt is already passed via CLI args
 
             # Yield parsed messages
             async for data in query.receive_messages():
-                yield parse_message(data)
+                yield apply_structured_output(
+                    parse_message(data), configured_options.output_schema
+                )
 
         finally:
             await query.close()
@@ -0,0 +1,194 @@
+"""Claude session hosted on a background event loop thread."""
+
+import threading
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future
+from contextlib import suppress
+from typing import TYPE_CHECKING, Any
+
+import anyio
+from anyio.abc import TaskGroup, TaskStatus
+from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
+
+from .._errors import CLIConnectionError
+from ..types import Message
+from .loop_thread import LoopThread
+
+if TYPE_CHECKING:
+    from ..client import ClaudeSDKClient
+
+_TURN_BUFFER_SIZE = 100  # Messages buffered per turn ahead of a slow caller
+
+# Sent on a turn's stream: its messages, then the error if the turn failed
+TurnItem = Message | Exception
+
+
+class HostedSession:
+    """A ClaudeSDKClient connected on, and only used from, a LoopThread.
+
+    A single long-lived task on the loop connects the client and later
+    disconnects it, keeping the client on the loop it is bound to. Callers in
+    other threads run turns through call(); turns are serialized since they
+    share the Claude Code session, and each turn's messages are routed to the
+    caller that started it.
+    """
+
+    def __init__(self, client: "ClaudeSDKClient", backend: str = "asyncio") -> None:
+        self.client = client
+        self._loop = LoopThread(backend)
+        self._lifecycle_lock = threading.Lock()
+        self._owner: Future[Any] | None = None
+        # Created on the loop by the owner task
+        self._closing: anyio.Event | None = None
+        self._turn_lock: anyio.Lock | None = None
+        self._turns: TaskGroup | None = None
+
+    @property
+    def connected(self) -> bool:
+        return self._owner is not None
+
+    # Blocking API, called from threads other than the loop's
+
+    def start(self) -> None:
+        """Start the loop and connect the client."""
+        with self._lifecycle_lock:
+            if self._owner is not None:
+                return
+            self._loop.start()
+            try:
+                self._owner, _ = self._loop.portal.start_task(self._own)
+            except BaseException:
+                self._loop.stop()
+                raise
+
+    def stop(self) -> None:
+        """Disconnect the client and stop the loop, cancelling pending turns."""
+        with self._lifecycle_lock:
+            owner, self._owner = self._owner, None
+            try:
+                if owner is not None:
+                    self._loop.call(self._close)
+                    owner.result()
+            finally:
+                self._loop.stop()
+
+    def call(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a coroutine function on the loop and wait for its result."""
+        if self._owner is None:
+            raise CLIConnectionError("Not connected. Call connect() first.")
+        return self._loop.call(func, *args)
+
+    def close_stream(self, receive: MemoryObjectReceiveStream[TurnItem]) -> None:
+        """Release a stream from open_turn(), abandoning the rest of the turn.
+
+        Does not wait for the stream to be closed on the loop.
+        """
+        if self._owner is not None:
+            self._loop.spawn(receive.aclose)
+
+    # Called from other event loops
+
+    async def call_async(
+        self,
+        func: Callable[..., Any],
+        *args: Any,
+        abandon: Callable[[Any], object] | None = None,
+    ) -> Any:
+        """Run a coroutine function on the loop and await its result.
+
+        No thread is blocked while waiting, and cancelling the wait cancels
+        the function on the loop.
+        """
+        if self._owner is None:
+            raise CLIConnectionError("Not connected. Call connect() first.")
+        return await self._loop.call_async(func, *args, abandon=abandon)
+
+    # Coroutine functions run on the loop through call()
+
+    async def _own(self, *, task_status: TaskStatus[None]) -> None:
+        self._closing = anyio.Event()
+        self._turn_lock = anyio.Lock()
+        async with self.client, anyio.create_task_group() as turns:
+            self._turns = turns
+            task_status.started()
+            await self._closing.wait()
+            turns.cancel_scope.cancel()
+
+    async def _close(self) -> None:
+        assert self._closing is not None
+        self._closing.set()
+
+    async def collect_turn(self, prompt: str, session_id: str) -> list[Message]:
+        """Run a turn and return all of its messages."""
+        assert self._turn_lock is not None
+        async with self._turn_lock:
+            await self.client.query(prompt, session_id)
+            return [message async for message in self.client.receive_response()]
+
+    async def open_turn(
+        self, prompt: str, session_id: str
+    ) -> MemoryObjectReceiveStream[TurnItem]:
+        """Start a turn and return the stream its messages are sent to.
+
+        If the turn fails, e.g. as Claude Code died, its error is sent as the
+        last item, to be raised by the caller.
+        """
+        send, receive = anyio.create_memory_object_stream[TurnItem](
+            max_buffer_size=_TURN_BUFFER_SIZE
+        )
+        assert self._turns is not None
+        self._turns.start_soon(self._stream_turn, prompt, session_id, send)
+        return receive
+
+    async def _stream_turn(
+        self, prompt: str, session_id: str, send: MemoryObjectSendStream[TurnItem]
+    ) -> None:
+        assert self._turn_lock is not None
+        async with send, self._turn_lock:
+            if send.statistics().open_receive_streams == 0:
+                # The caller went away while the turn was waiting
+                return
+            caller_gone = False
+            try:
+                await self.client.query(prompt, session_id)
+                async for message in self.client.receive_response():
+                    # Keep reading after the caller is gone so that the rest
+                    # of this response is not mistaken for the next turn's
+                    if not caller_gone:
+                        try:
+                            await send.send(message)
+                        except anyio.BrokenResourceError:
+                            caller_gone = True
+            except Exception as e:
+                # Hand the error to the caller rather than failing the task
+                # group of all turns, which would take the session down
+                if not caller_gone:
+                    with suppress(anyio.BrokenResourceError):
+                        await send.send(e)
+
+    @staticmethod
+    async def next_messages(
+        receive: MemoryObjectReceiveStream[TurnItem],
+    ) -> list[TurnItem]:
+        """Wait for the next message of a turn and take any others buffered.
+
+        Returns an empty list once the turn is complete. The caller must
+        raise an error found in the list, see raise_errors().
+        """
+        try:
+            messages = [await receive.receive()]
+        except anyio.EndOfStream:
+            return []
+        while True:
+            try:
+                messages.append(receive.receive_nowait())
+            except (anyio.WouldBlock, anyio.EndOfStream):
+                return messages
+
+
+def raise_errors(items: list[TurnItem]) -> Iterator[Message]:
+    """Yield the messages from next_messages(), raising the turn's error."""
+    for item in items:
+        if isinstance(item, Exception):
+            raise item
+        yield item
@@ -0,0 +1,112 @@
+"""Event loop hosted in a background thread."""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from concurrent.futures import Future
+from contextlib import AbstractContextManager, suppress
+from typing import Any, TypeVar
+
+import anyio
+from anyio.from_thread import BlockingPortal, start_blocking_portal
+
+T = TypeVar("T")
+
+
+async def wait_future(
+    future: Future[T], abandon: Callable[[T], object] | None = None
+) -> T:
+    """Wait for a future completed in another thread, without blocking a thread.
+
+    Cancelling the wait cancels the future. If the future completed already,
+    its result is passed to abandon, so that it can be released.
+    """
+    done = anyio.Event()
+    notify: Callable[[Callable[[], object]], object]
+    try:
+        notify = asyncio.get_running_loop().call_soon_threadsafe
+    except RuntimeError:
+        # Not on asyncio, so on trio
+        import trio  # type: ignore[import-untyped,import-not-found,unused-ignore]
+
+        notify = trio.lowlevel.current_trio_token().run_sync_soon
+
+    def on_done(_: Future[T]) -> None:
+        # The waiting event loop may have ended since
+        with suppress(RuntimeError):
+            notify(done.set)
+
+    future.add_done_callback(on_done)
+    try:
+        await done.wait()
+    except BaseException:
+        if (
+            not future.cancel()
+            and abandon is not None
+            and not future.cancelled()
+            and future.exception() is None
+        ):
+            abandon(future.result())
+        raise
+    return future.result()
+
+
+class LoopThread:
+    """Runs an anyio event loop in a dedicated thread.
+
+    Code running on the loop is driven from other threads through a
+    BlockingPortal. Objects created on the loop, such as a connected
+    ClaudeSDKClient, can then be shared by callers running in any thread
+    or event loop, since they only ever touch the objects through the loop.
+    """
+
+    def __init__(self, backend: str = "asyncio") -> None:
+        self._backend = backend
+        self._portal_cm: AbstractContextManager[BlockingPortal] | None = None
+        self._portal: BlockingPortal | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._portal is not None
+
+    def start(self) -> None:
+        """Start the thread and its event loop."""
+        if self._portal is None:
+            self._portal_cm = start_blocking_portal(self._backend)
+            self._portal = self._portal_cm.__enter__()
+
+    def stop(self) -> None:
+        """Stop the event loop, cancelling its remaining tasks, and join the thread."""
+        if self._portal_cm is not None:
+            portal_cm, self._portal_cm, self._portal = self._portal_cm, None, None
+            portal_cm.__exit__(None, None, None)
+
+    @property
+    def portal(self) -> BlockingPortal:
+        if self._portal is None:
+            raise RuntimeError("Loop thread is not running")
+        return self._portal
+
+    def call(self, func: Callable[..., Awaitable[T]], *args: Any) -> T:
+        """Run a coroutine function on the loop and wait for its result.
+
+        Must not be called from the loop thread itself.
+        """
+        return self.portal.call(func, *args)
+
+    async def call_async(
+        self,
+        func: Callable[..., Awaitable[T]],
+        *args: Any,
+        abandon: Callable[[T], object] | None = None,
+    ) -> T:
+        """Run a coroutine function on the loop and await its result.
+
+        Unlike call(), this is awaited from another event loop, without
+        blocking a thread. Cancelling it cancels the function; see
+        wait_future() for abandon.
+        """
+        return await wait_future(self.portal.start_task_soon(func, *args), abandon)
+
+    def spawn(self, func: Callable[..., Awaitable[Any]], *args: Any) -> Future[Any]:
+        """Start a coroutine function as a task on the loop without waiting for it."""
+        return self.portal.start_task_soon(func, *args)
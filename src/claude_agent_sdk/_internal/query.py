@@ -1,36 +1,60 @@
 """Query class for handling bidirectional control protocol."""
 
+import functools
 import json
 import logging
 import os
 from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable
-from contextlib import suppress
-from typing import TYPE_CHECKING, Any
+from contextlib import AsyncExitStack, suppress
+from typing import TYPE_CHECKING, Any, get_args
 
 import anyio
-from mcp.types import (
-    CallToolRequest,
-    CallToolRequestParams,
-    ListToolsRequest,
-)
 
+from .._errors import BudgetExceededError, ClaudeSDKError, CLIConnectionError
 from ..types import (
+    Budget,
     PermissionResultAllow,
     PermissionResultDeny,
+    ResultMessage,
     SDKControlPermissionRequest,
     SDKControlRequest,
     SDKControlResponse,
     SDKHookCallbackRequest,
     ToolPermissionContext,
 )
+from .background import BackgroundTasks
+from .budget import BudgetTracker
+from .message_parser import parse_message
+from .tool_metrics import ToolCallMetrics
 from .transport import Transport
 
 if TYPE_CHECKING:
     from mcp.server import Server as McpServer
+    from pydantic import BaseModel
 
 logger = logging.getLogger(__name__)
 
 
+@functools.cache
+def _mcp_message_types(
+    union: "type[BaseModel]",
+) -> "dict[str, type[BaseModel]]":
+    """Map JSONRPC method names to the MCP message types of a request union."""
+    message_types: dict[str, type[BaseModel]] = {}
+    for message_type in get_args(union.model_fields["root"].annotation):
+        for method in get_args(message_type.model_fields["method"].annotation):
+            message_types[method] = message_type
+    return message_types
+
+
+def _mcp_payload(method: str, params: Any) -> dict[str, Any]:
+    """Build the payload to validate an MCP request or notification from."""
+    payload: dict[str, Any] = {"method": method}
+    if params is not None:
+        payload["params"] = params
+    return payload
+
+
 def _convert_hook_output_for_cli(hook_output: dict[str, Any]) -> dict[str, Any]:
     """Convert Python-safe field names to CLI-expected field names.
 
@@ -72,6 +96,8 @@ class Query:
         | None = None,
         hooks: dict[str, list[dict[str, Any]]] | None = None,
         sdk_mcp_servers: dict[str, "McpServer"] | None = None,
+        tool_metrics: ToolCallMetrics | None = None,
+        budget: Budget | None = None,
     ):
         """Initialize Query with transport and callbacks.
 
@@ -81,12 +107,26 @@ class Query:
             can_use_tool: Optional callback for tool permission requests
             hooks: Optional hook configurations
             sdk_mcp_servers: Optional SDK MCP server instances
+            tool_metrics: Optional collector for SDK MCP tool call statistics
+            budget: Optional limits on the cost, tokens and duration of the session
         """
         self.transport = transport
         self.is_streaming_mode = is_streaming_mode
         self.can_use_tool = can_use_tool
         self.hooks = hooks or {}
         self.sdk_mcp_servers = sdk_mcp_servers or {}
+        self.tool_metrics = tool_metrics
+        self._budget_tracker = BudgetTracker(budget) if budget else None
+        # Exception that stopped the message reader
+        self._read_error: Exception | None = None
+        # Set once the message reader has stopped, e.g. as Claude Code exited
+        self.reader_done = anyio.Event()
+        # Whether the input was ended, after which Claude Code exits normally
+        self.input_ended = False
+        # Session ID of the last message read
+        self.session_id: str | None = None
+        # Reason the budget was exceeded, once it has been
+        self.budget_exceeded: str | None = None
 
         # Control protocol state
         self.pending_control_responses: dict[str, anyio.Event] = {}
@@ -99,7 +139,11 @@ class Query:
         self._message_send, self._message_receive = anyio.create_memory_object_stream[
             dict[str, Any]
         ](max_buffer_size=100)
-        self._tg: anyio.abc.TaskGroup | None = None
+        self._tasks = BackgroundTasks(on_error=self._task_failed)
+        # Error of a background task, raised to the consumer of the messages
+        self._task_error: Exception | None = None
+        self._started = False
+        self._server_lifespans: AsyncExitStack | None = None
         self._initialized = False
         self._closed = False
         self._initialization_result: dict[str, Any] | None = None
@@ -146,10 +190,37 @@ class Query:
 
     async def start(self) -> None:
         """Start reading messages from transport."""
-        if self._tg is None:
-            self._tg = anyio.create_task_group()
-            await self._tg.__aenter__()
-            self._tg.start_soon(self._read_messages)
+        if self._server_lifespans is None and self.sdk_mcp_servers:
+            # Activate SDK MCP server resources (e.g. pooled clients) for the
+            # whole session so tool calls can reuse them. If one fails, those
+            # already activated are released.
+            async with AsyncExitStack() as lifespans:
+                for server in self.sdk_mcp_servers.values():
+                    await lifespans.enter_async_context(server.lifespan(server))
+                self._server_lifespans = lifespans.pop_all()
+
+        if not self._started:
+            self._started = True
+            self._tasks.spawn(self._read_messages)
+            if self._budget_tracker and self._budget_tracker.budget.max_wall_time:
+                self._tasks.spawn(self._enforce_wall_time)
+
+    def spawn(self, func: Callable[..., Awaitable[Any]], *args: Any) -> None:
+        """Run a background task of the session, cancelled by close().
+
+        If the task fails, its error is raised by receive_messages().
+        """
+        self._tasks.spawn(func, *args)
+
+    def _task_failed(self, error: Exception) -> None:
+        if self._closed:
+            return
+        if self._task_error is None:
+            self._task_error = error
+        # Wake up the consumer; if the stream is full, the error is raised
+        # with the next message instead
+        with suppress(anyio.WouldBlock, anyio.ClosedResourceError):
+            self._message_send.send_nowait({"type": "task_error"})
 
     async def _read_messages(self) -> None:
         """Read messages from transport and route them."""
@@ -179,8 +250,7 @@ class Query:
                     # Handle incoming control requests from CLI
                     # Cast message to SDKControlRequest for type safety
                     request: SDKControlRequest = message  # type: ignore[assignment]
-                    if self._tg:
-                        self._tg.start_soon(self._handle_control_request, request)
+                    self._tasks.spawn(self._handle_control_request, request)
                     continue
 
                 elif msg_type == "control_cancel_request":
@@ -189,6 +259,12 @@ class Query:
                     continue
 
                 # Regular SDK messages go to the stream
+                session_id = message.get("session_id")
+                if session_id:
+                    self.session_id = session_id
+                if self._budget_tracker:
+                    self._budget_tracker.observe(message)
+                    self._check_budget()
                 await self._message_send.send(message)
 
         except anyio.get_cancelled_exc_class():
@@ -197,9 +273,11 @@ class Query:
             raise  # Re-raise to properly handle cancellation
         except Exception as e:
             logger.error(f"Fatal error in message reader: {e}")
+            self._read_error = e
             # Put error in stream so iterators can handle it
             await self._message_send.send({"type": "error", "error": str(e)})
         finally:
+            self.reader_done.set()
             # Always signal end of stream
             await self._message_send.send({"type": "end"})
 
@@ -370,6 +448,11 @@ class Query:
         Returns:
             The response message
         """
+        # Imported here so that sessions without SDK MCP servers never load mcp
+        from mcp.server.lowlevel import NotificationOptions
+        from mcp.types import ClientNotification, ClientRequest
+        from pydantic import ValidationError
+
         if server_name not in self.sdk_mcp_servers:
             return {
                 "jsonrpc": "2.0",
@@ -382,25 +465,27 @@ class Query:
 
         server = self.sdk_mcp_servers[server_name]
         method = message.get("method")
-        params = message.get("params", {})
+        params = message.get("params")
 
         try:
             # TODO: Python MCP SDK lacks the Transport abstraction that TypeScript has.
             # TypeScript: server.connect(transport) allows custom transports
             # Python: server.run(read_stream, write_stream) requires actual streams
             #
-            # This forces us to manually route methods. When Python MCP adds Transport
-            # support, we can refactor to match the TypeScript approach.
+            # Until it does, requests are validated into the MCP request type
+            # registered for their method and dispatched to the server's handler
+            # directly, so resources, prompts and any other method the server
+            # implements are routed without special-casing each one here.
             if method == "initialize":
-                # Handle MCP initialization - hardcoded for tools only, no listChanged
+                capabilities = server.get_capabilities(NotificationOptions(), {})
                 return {
                     "jsonrpc": "2.0",
                     "id": message.get("id"),
                     "result": {
                         "protocolVersion": "2024-11-05",
-                        "capabilities": {
-                            "tools": {}  # Tools capability without listChanged
-                        },
+                        "capabilities": capabilities.model_dump(
+                            by_alias=True, mode="json", exclude_none=True
+                        ),
                         "serverInfo": {
                             "name": server.name,
                             "version": server.version or "1.0.0",
@@ -408,78 +493,64 @@ class Query:
                     },
                 }
 
-            elif method == "tools/list":
-                request = ListToolsRequest(method=method)
-                handler = server.request_handlers.get(ListToolsRequest)
-                if handler:
-                    result = await handler(request)
-                    # Convert MCP result to JSONRPC response
-                    tools_data = [
-                        {
-                            "name": tool.name,
-                            "description": tool.description,
-                            "inputSchema": (
-                                tool.inputSchema.model_dump()
-                                if hasattr(tool.inputSchema, "model_dump")
-                                else tool.inputSchema
-                            )
-                            if tool.inputSchema
-                            else {},
-                        }
-                        for tool in result.root.tools  # type: ignore[union-attr]
-                    ]
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": message.get("id"),
-                        "result": {"tools": tools_data},
-                    }
-
-            elif method == "tools/call":
-                call_request = CallToolRequest(
-                    method=method,
-                    params=CallToolRequestParams(
-                        name=params.get("name"), arguments=params.get("arguments", {})
-                    ),
+            if "id" not in message:
+                # Notifications get no reply; forward them to the server if it
+                # handles them and just acknowledge
+                notification_type = _mcp_message_types(ClientNotification).get(
+                    str(method)
                 )
-                handler = server.request_handlers.get(CallToolRequest)
-                if handler:
-                    result = await handler(call_request)
-                    # Convert MCP result to JSONRPC response
-                    content = []
-                    for item in result.root.content:  # type: ignore[union-attr]
-                        if hasattr(item, "text"):
-                            content.append({"type": "text", "text": item.text})
-                        elif hasattr(item, "data") and hasattr(item, "mimeType"):
-                            content.append(
-                                {
-                                    "type": "image",
-                                    "data": item.data,
-                                    "mimeType": item.mimeType,
-                                }
-                            )
+                if notification_type in server.notification_handlers:
+                    assert notification_type is not None
+                    await server.notification_handlers[notification_type](
+                        notification_type.model_validate(
+                            _mcp_payload(str(method), params)
+                        )
+                    )
+                return {"jsonrpc": "2.0", "result": {}}
 
-                    response_data = {"content": content}
-                    if hasattr(result.root, "is_error") and result.root.is_error:
-                        response_data["is_error"] = True  # type: ignore[assignment]
+            request_type = _mcp_message_types(ClientRequest).get(str(method))
+            if request_type is None or request_type not in server.request_handlers:
+                return {
+                    "jsonrpc": "2.0",
+                    "id": message.get("id"),
+                    "error": {
+                        "code": -32601,
+                        "message": f"Method '{method}' not found",
+                    },
+                }
 
+            # Validation happens inside dispatch so that tool calls rejected
+            # for malformed params are recorded as failed calls
+            async def dispatch() -> dict[str, Any]:
+                try:
+                    request = request_type.model_validate(
+                        _mcp_payload(str(method), params)
+                    )
+                except ValidationError as e:
                     return {
                         "jsonrpc": "2.0",
                         "id": message.get("id"),
-                        "result": response_data,
+                        "error": {"code": -32602, "message": str(e)},
                     }
+                result = await server.request_handlers[request_type](request)
+                return {
+                    "jsonrpc": "2.0",
+                    "id": message.get("id"),
+                    "result": result.root.model_dump(
+                        by_alias=True, mode="json", exclude_none=True
+                    ),
+                }
 
-            elif method == "notifications/initialized":
-                # Handle initialized notification - just acknowledge it
-                return {"jsonrpc": "2.0", "result": {}}
-
-            # Add more methods here as MCP SDK adds them (resources, prompts, etc.)
-            # This is the limitation Ashwin pointed out - we have to manually update
-
-            return {
-                "jsonrpc": "2.0",
-                "id": message.get("id"),
-                "error": {"code": -32601, "message": f"Method '{method}' not found"},
-            }
+            if method == "tools/call" and self.tool_metrics is not None:
+                call_params = params if isinstance(params, dict) else {}
+                meta = call_params.get("_meta") or {}
+                return await self.tool_metrics.observe(
+                    f"mcp__{server_name}__{call_params.get('name')}",
+                    call_params.get("arguments"),
+                    meta.get("claudecode/toolUseId"),
+                    dispatch,
+                )
+            return await dispatch()
 
         except Exception as e:
             return {
@@ -510,6 +581,48 @@ class Query:
             }
         )
 
+    def _check_budget(self) -> None:
+        """Stop the session if it has just exceeded its budget."""
+        assert self._budget_tracker is not None
+        if self.budget_exceeded is None:
+            reason = self._budget_tracker.exceeded()
+            if reason is not None:
+                self.budget_exceeded = reason
+                self._tasks.spawn(self._stop_for_budget)
+
+    async def _enforce_wall_time(self) -> None:
+        assert self._budget_tracker is not None
+        max_wall_time = self._budget_tracker.budget.max_wall_time
+        assert max_wall_time is not None
+        await anyio.sleep(max(0.0, max_wall_time - self._budget_tracker.elapsed))
+        self._check_budget()
+
+    async def _stop_for_budget(self) -> None:
+        """Interrupt Claude, or end the session if that is not possible."""
+        logger.warning(f"Stopping session: budget exceeded, {self.budget_exceeded}")
+        if self.is_streaming_mode:
+            try:
+                with anyio.fail_after(10):
+                    await self.interrupt()
+                return
+            except Exception as e:
+                logger.debug(f"Interrupt failed, closing transport: {e}")
+        await self.transport.close()
+
+    def budget_error(self, result: dict[str, Any] | None = None) -> BudgetExceededError:
+        """Error describing the exceeded budget, with the turn's result if any."""
+        assert self._budget_tracker is not None and self.budget_exceeded is not None
+        result_message = parse_message(result) if result else None
+        if not isinstance(result_message, ResultMessage):
+            result_message = None
+        return BudgetExceededError(
+            self.budget_exceeded,
+            cost_usd=self._budget_tracker.cost_usd,
+            tokens=self._budget_tracker.tokens,
+            elapsed=self._budget_tracker.elapsed,
+            result=result_message,
+        )
+
     async def stream_input(self, stream: AsyncIterable[dict[str, Any]]) -> None:
         """Stream input messages to transport."""
         try:
@@ -518,30 +631,69 @@ class Query:
                     break
                 await self.transport.write(json.dumps(message) + "\n")
             # After all messages sent, end input
+            self.input_ended = True
             await self.transport.end_input()
-        except Exception as e:
+        except CLIConnectionError as e:
+            # Claude Code exited, which the message reader reports
             logger.debug(f"Error streaming input: {e}")
 
+    @property
+    def died(self) -> bool:
+        """Whether Claude Code stopped, other than by ending its input or budget."""
+        if not self.reader_done.is_set():
+            return False
+        if self.budget_exceeded is not None:
+            return False  # Stopped on purpose
+        return self._read_error is not None or not self.input_ended
+
     async def receive_messages(self) -> AsyncIterator[dict[str, Any]]:
         """Receive SDK messages (not control messages)."""
         async for message in self._message_receive:
+            if self._task_error is not None:
+                error, self._task_error = self._task_error, None
+                raise error
+
             # Check for special messages
-            if message.get("type") == "end":
+            if message.get("type") == "task_error":
+                continue  # Its error was raised already
+            elif message.get("type") == "end":
                 break
             elif message.get("type") == "error":
+                if self.budget_exceeded is not None:
+                    # Reading failed because the session was stopped
+                    raise self.budget_error()
+                if isinstance(self._read_error, ClaudeSDKError):
+                    # e.g. ProcessError, with the end of stderr
+                    raise self._read_error
                 raise Exception(message.get("error", "Unknown error"))
 
+            # The result of the turn interrupted for exceeding the budget
+            if message.get("type") == "result" and self.budget_exceeded is not None:
+                raise self.budget_error(message)
+
             yield message
 
+        if self.budget_exceeded is not None:
+            raise self.budget_error()
+
     async def close(self) -> None:
-        """Close the query and transport."""
+        """Close the query and transport.
+
+        May be called from any task, e.g. when an abandoned query() generator
+        is finalized, and completes even when cancelled, so that the reader
+        is stopped and the process reaped.
+        """
         self._closed = True
-        if self._tg:
-            self._tg.cancel_scope.cancel()
-            # Wait for task group to complete cancellation
-            with suppress(anyio.get_cancelled_exc_class()):
-                await self._tg.__aexit__(None, None, None)
-        await self.transport.close()
+        with anyio.CancelScope(shield=True):
+            try:
+                try:
+                    await self._tasks.close()
+                finally:
+                    await self.transport.close()
+            finally:
+                if self._server_lifespans:
+                    lifespans, self._server_lifespans = self._server_lifespans, None
+                    await lifespans.aclose()
 
     # Make Query an async iterator
     def __aiter__(self) -> AsyncIterator[dict[str, Any]]:
@@ -0,0 +1,53 @@
+"""Validation of tool arguments against their JSON schema.
+
+Schemas are checked and compiled into a jsonschema validator once, when the
+tool is registered, so that validating a call does not re-parse the schema.
+The validator follows the schema's ``$schema`` dialect, defaulting to JSON
+Schema 2020-12. jsonschema is imported on first use, as importing the
+package must not load it.
+"""
+
+from collections.abc import Callable, Iterable
+from typing import Any
+
+
+def _where(path: Iterable[str | int]) -> str:
+    """Format the location of a value within the arguments."""
+    where = ""
+    for part in path:
+        where += f"[{part}]" if isinstance(part, int) else f".{part}"
+    return f"'{where.lstrip('.')}'" if where else "arguments"
+
+
+def compile_validator(schema: dict[str, Any]) -> Callable[[Any], str | None]:
+    """Compile a JSON schema into a validator function.
+
+    Args:
+        schema: JSON schema describing the tool arguments
+
+    Returns:
+        A function taking the arguments and returning a description of the
+        most relevant problem found, or None if they are valid
+
+    Raises:
+        jsonschema.SchemaError: If the schema itself is invalid
+    """
+    from jsonschema import (  # type: ignore[import-untyped,unused-ignore]
+        Draft202012Validator,
+        validators,
+    )
+    from jsonschema.exceptions import (  # type: ignore[import-untyped,unused-ignore]
+        best_match,
+    )
+
+    validator_class = validators.validator_for(schema, default=Draft202012Validator)
+    validator_class.check_schema(schema)
+    validator = validator_class(schema)
+
+    def validate(arguments: Any) -> str | None:
+        error = best_match(validator.iter_errors(arguments))
+        if error is None:
+            return None
+        return f"{_where(error.absolute_path)}: {error.message}"
+
+    return validate
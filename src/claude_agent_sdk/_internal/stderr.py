@@ -0,0 +1,149 @@
+"""Capture and dispatch of the Claude Code process's stderr."""
+
+import logging
+import re
+import time
+from collections import deque
+from collections.abc import Callable
+
+import anyio
+from anyio.streams.memory import MemoryObjectReceiveStream
+
+from ..types import StderrEvent
+
+logger = logging.getLogger(__name__)
+
+# Log lines, optionally timestamped, e.g. "2025-10-01T12:00:00.000Z [DEBUG] ..."
+_LOG_LINE = re.compile(
+    r"^(?:\S*\d{2}:\d{2}\S*\s+)?\[(?P<level>[A-Z]+)\]\s?(?P<message>.*)$"
+)
+
+
+def parse_stderr_line(line: str, elapsed: float) -> StderrEvent:
+    """Parse a stderr line into an event."""
+    match = _LOG_LINE.match(line)
+    if match is None:
+        return StderrEvent(elapsed=elapsed, level=None, message=line, line=line)
+    return StderrEvent(
+        elapsed=elapsed,
+        level=match.group("level"),
+        message=match.group("message"),
+        line=line,
+    )
+
+
+class StderrTail:
+    """The last lines written to stderr, up to a number of bytes."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._lines: deque[str] = deque()
+        self._size = 0
+        # Lines dropped from the start to respect max_bytes
+        self.truncated = False
+
+    def append(self, line: str) -> None:
+        if self.max_bytes <= 0:
+            return
+        self._lines.append(line)
+        self._size += len(line) + 1
+        while self._size > self.max_bytes and len(self._lines) > 1:
+            self._size -= len(self._lines.popleft()) + 1
+            self.truncated = True
+
+    def text(self) -> str:
+        text = "\n".join(self._lines)
+        if len(text) > self.max_bytes:
+            text = text[-self.max_bytes :]
+        return text
+
+
+class StderrDispatcher:
+    """Delivers stderr lines to the user's callbacks in a worker thread.
+
+    The reader only queues lines, so slow callbacks never hold up reading
+    stderr (and the process writing it). If the callbacks fall further
+    behind than the queue allows, lines are dropped and counted. When the
+    process is closed, the queued lines are still delivered, such as those
+    explaining a crash, unless abandon() is called first.
+    """
+
+    def __init__(
+        self,
+        started: float,
+        on_line: Callable[[str], None] | None,
+        on_event: Callable[[StderrEvent], None] | None,
+        max_queued: int = 10_000,
+    ) -> None:
+        self._started = started
+        self._on_line = on_line
+        self._on_event = on_event
+        self._send, self._receive = anyio.create_memory_object_stream[StderrEvent](
+            max_buffer_size=max_queued
+        )
+        self._delivered = anyio.Event()
+        # Lines taken from the queue by the worker thread, not yet passed on
+        self._pending = 0
+        self._abandoned = False
+        self.dropped = 0
+
+    def put(self, line: str) -> None:
+        event = parse_stderr_line(line, time.monotonic() - self._started)
+        try:
+            self._send.send_nowait(event)
+        except anyio.WouldBlock:
+            self.dropped += 1
+
+    def close(self) -> None:
+        """Stop queuing lines, so that run() ends once the queue is empty."""
+        self._send.close()
+
+    async def wait_delivered(self) -> None:
+        """Wait for run() to deliver the queued lines after close()."""
+        await self._delivered.wait()
+
+    def abandon(self) -> None:
+        """Stop delivering lines, counting those not delivered as dropped."""
+        if self._abandoned or self._delivered.is_set():
+            return
+        self._abandoned = True
+        self.dropped += self._pending + self._receive.statistics().current_buffer_used
+        self._log_dropped()
+
+    def _log_dropped(self) -> None:
+        if self.dropped:
+            logger.warning(
+                f"Dropped {self.dropped} stderr lines, the callbacks were too slow"
+            )
+
+    def _deliver(self, events: list[StderrEvent]) -> None:
+        for event in events:
+            if self._abandoned:
+                return
+            self._pending -= 1
+            try:
+                if self._on_line is not None:
+                    self._on_line(event.line)
+                if self._on_event is not None:
+                    self._on_event(event)
+            except Exception:
+                logger.exception("stderr callback failed")
+
+    async def run(self) -> None:
+        """Deliver queued lines in batches until closed and delivered."""
+        receive: MemoryObjectReceiveStream[StderrEvent] = self._receive
+        async with receive:
+            async for event in receive:
+                events = [event]
+                while True:
+                    try:
+                        events.append(receive.receive_nowait())
+                    except (anyio.WouldBlock, anyio.EndOfStream):
+                        break
+                if self._abandoned:
+                    return
+                self._pending = len(events)
+                await anyio.to_thread.run_sync(self._deliver, events)
+        if not self._abandoned:
+            self._delivered.set()
+            self._log_dropped()
@@ -0,0 +1,132 @@
+"""Structured output: instructing Claude to answer in JSON and parsing it."""
+
+import functools
+import json
+import re
+from typing import Any
+
+from ..types import Message, ResultMessage
+from .schema_validation import compile_validator
+
+_FENCED_BLOCK = re.compile(r"```(?:json)?[ \t]*\n(.*?)```", re.DOTALL)
+_DECODER = json.JSONDecoder()
+
+
+def _is_model(schema: Any) -> bool:
+    """Whether the schema is a pydantic model class."""
+    return isinstance(schema, type) and hasattr(schema, "model_json_schema")
+
+
+def output_json_schema(schema: Any) -> dict[str, Any]:
+    """JSON schema of an output_schema option (dict or pydantic model)."""
+    if _is_model(schema):
+        json_schema: dict[str, Any] = schema.model_json_schema()
+        return json_schema
+    return dict(schema)
+
+
+def output_instruction(schema: Any) -> str:
+    """System prompt text asking Claude to end its run with conforming JSON."""
+    return (
+        "When you have completed the task, end your final response with a "
+        "single JSON value that conforms to the following JSON Schema, with no "
+        "text after it:\n" + json.dumps(output_json_schema(schema))
+    )
+
+
+@functools.lru_cache(maxsize=64)
+def _validator_for(schema_json: str) -> Any:
+    return compile_validator(json.loads(schema_json))
+
+
+def extract_json(text: str) -> Any:
+    """Find the JSON value a response ends with.
+
+    Tries, in order: the whole text, the last fenced code block, and the last
+    JSON object or array embedded in the text. Each candidate is decoded with
+    a single pass of the JSON decoder rather than by regex matching.
+
+    Raises:
+        ValueError: If the text contains no JSON object or array
+    """
+    stripped = text.strip()
+    if stripped[:1] in ("{", "["):
+        try:
+            return json.loads(stripped)
+        except ValueError:
+            pass
+
+    if "```" in stripped:
+        blocks = _FENCED_BLOCK.findall(stripped)
+        if blocks:
+            try:
+                return json.loads(blocks[-1])
+            except ValueError:
+                pass
+
+    # Decode every top-level object or array in turn, keeping the last one.
+    # Decoded spans are skipped, so valid JSON is only scanned once.
+    found = False
+    value: Any = None
+    index = 0
+    length = len(stripped)
+    while index < length:
+        starts = [
+            position
+            for position in (stripped.find("{", index), stripped.find("[", index))
+            if position != -1
+        ]
+        if not starts:
+            break
+        start = min(starts)
+        try:
+            value, index = _DECODER.raw_decode(stripped, start)
+            found = True
+        except ValueError:
+            index = start + 1
+    if not found:
+        raise ValueError("no JSON value found in the response")
+    return value
+
+
+def parse_structured_output(text: str | None, schema: Any) -> tuple[Any, str | None]:
+    """Parse and validate the structured output of a response.
+
+    Args:
+        text: Final response text
+        schema: The output_schema option (dict or pydantic model)
+
+    Returns:
+        (value, error) where value is a dict/list or a model instance, and
+        error describes why the output could not be parsed, or is None
+    """
+    if not text:
+        return None, "the response is empty"
+    try:
+        value = extract_json(text)
+    except ValueError as e:
+        return None, str(e)
+
+    if _is_model(schema):
+        try:
+            return schema.model_validate(value), None
+        except ValueError as e:
+            return None, str(e)
+
+    error = _validator_for(json.dumps(schema, sort_keys=True))(value)
+    if error:
+        return None, error
+    return value, None
+
+
+def apply_structured_output(message: Message, schema: Any) -> Message:
+    """Set the structured output of a successful ResultMessage."""
+    if (
+        schema is not None
+        and isinstance(message, ResultMessage)
+        and not message.is_error
+    ):
+        message.structured_output, message.structured_output_error = (
+            parse_structured_output(message.result, schema)
+        )
+    return message
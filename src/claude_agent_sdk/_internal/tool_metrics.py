@@ -0,0 +1,216 @@
+"""Call statistics and tracing for SDK MCP tools."""
+
+import json
+import math
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable, Mapping
+from contextlib import AbstractContextManager, nullcontext
+from dataclasses import dataclass
+from typing import Any, Protocol
+
+_DEFAULT_WINDOW = 1024  # Latency samples kept per tool for percentiles
+
+
+class _Span(Protocol):
+    """The part of an OpenTelemetry span used to annotate tool calls."""
+
+    def set_attribute(self, key: str, value: Any) -> None: ...
+
+    def record_exception(self, exception: BaseException) -> None: ...
+
+
+class _Tracer(Protocol):
+    """The part of ``opentelemetry.trace.Tracer`` used to trace tool calls."""
+
+    def start_as_current_span(
+        self, name: str, *, attributes: Mapping[str, Any]
+    ) -> AbstractContextManager[_Span]: ...
+
+
+@dataclass
+class ToolCallStats:
+    """Snapshot of the calls made to one SDK MCP tool.
+
+    Latency percentiles are computed over the most recent calls (see
+    ToolCallMetrics), counts and byte totals over all calls.
+    """
+
+    name: str
+    count: int
+    errors: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    total_ms: float
+    bytes_in: int
+    bytes_out: int
+
+    @property
+    def error_rate(self) -> float:
+        """Fraction of calls that failed."""
+        return self.errors / self.count if self.count else 0.0
+
+    @property
+    def mean_ms(self) -> float:
+        """Mean call latency in milliseconds."""
+        return self.total_ms / self.count if self.count else 0.0
+
+
+class _ToolSeries:
+    """Running statistics for a single tool."""
+
+    def __init__(self, window: int) -> None:
+        self.latencies_ms: deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.errors = 0
+        self.max_ms = 0.0
+        self.total_ms = 0.0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def snapshot(self, name: str) -> ToolCallStats:
+        ordered = sorted(self.latencies_ms)
+
+        def percentile(p: float) -> float:
+            if not ordered:
+                return 0.0
+            # Nearest-rank percentile
+            return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+        return ToolCallStats(
+            name=name,
+            count=self.count,
+            errors=self.errors,
+            p50_ms=percentile(50),
+            p95_ms=percentile(95),
+            p99_ms=percentile(99),
+            max_ms=self.max_ms,
+            total_ms=self.total_ms,
+            bytes_in=self.bytes_in,
+            bytes_out=self.bytes_out,
+        )
+
+
+class ToolCallMetrics:
+    """Collects per-tool call counts, errors, latencies and payload sizes.
+
+    A ClaudeSDKClient records into its own collector, available as
+    ``client.tool_metrics``. Pass one through ``ClaudeAgentOptions.tool_metrics``
+    to share it across clients or to collect statistics for query() calls.
+
+    Tools are keyed by the name Claude uses for them, e.g.
+    ``mcp__contacts__find_phone``. Payload sizes are the lengths of the JSON
+    encoded arguments and results.
+
+    Args:
+        tracer: Optional OpenTelemetry tracer (``opentelemetry.trace.Tracer``).
+            If set, each call is wrapped in a span carrying the tool name,
+            the ``tool_use_id`` of the tool call, payload sizes and outcome.
+        window: Number of most recent calls per tool used for latency
+            percentiles.
+
+    Example:
+        ```python
+        async with ClaudeSDKClient(options) as client:
+            ...
+            for stats in client.tool_metrics.stats().values():
+                print(f"{stats.name}: {stats.count} calls, p95 {stats.p95_ms:.0f}ms")
+        ```
+    """
+
+    def __init__(
+        self, tracer: _Tracer | None = None, window: int = _DEFAULT_WINDOW
+    ) -> None:
+        self.tracer = tracer
+        self._window = window
+        self._tools: dict[str, _ToolSeries] = {}
+
+    def record(
+        self,
+        name: str,
+        duration_ms: float,
+        is_error: bool = False,
+        bytes_in: int = 0,
+        bytes_out: int = 0,
+    ) -> None:
+        """Record a completed tool call."""
+        series = self._tools.get(name)
+        if series is None:
+            series = self._tools[name] = _ToolSeries(self._window)
+        series.latencies_ms.append(duration_ms)
+        series.count += 1
+        series.errors += int(is_error)
+        series.max_ms = max(series.max_ms, duration_ms)
+        series.total_ms += duration_ms
+        series.bytes_in += bytes_in
+        series.bytes_out += bytes_out
+
+    async def observe(
+        self,
+        name: str,
+        arguments: Any,
+        tool_use_id: str | None,
+        call: Callable[[], Awaitable[dict[str, Any]]],
+    ) -> dict[str, Any]:
+        """Run a JSONRPC tools/call and record its latency, size and outcome.
+
+        Args:
+            name: Tool name as seen by Claude
+            arguments: Arguments of the call
+            tool_use_id: ID of the tool_use block that triggered the call
+            call: Coroutine function performing the call and returning the
+                JSONRPC response
+
+        Returns:
+            The JSONRPC response returned by ``call``
+        """
+        bytes_in = len(json.dumps(arguments, default=str))
+        span_context: AbstractContextManager[_Span | None] = (
+            self.tracer.start_as_current_span(
+                f"tools/call {name}",
+                attributes={
+                    "mcp.tool.name": name,
+                    "mcp.tool.bytes_in": bytes_in,
+                    "claude.tool_use_id": tool_use_id or "",
+                },
+            )
+            if self.tracer is not None
+            else nullcontext()
+        )
+
+        with span_context as span:
+            started = time.perf_counter()
+            try:
+                response = await call()
+            except Exception as e:
+                self.record(
+                    name, (time.perf_counter() - started) * 1000, True, bytes_in
+                )
+                if span is not None:
+                    span.record_exception(e)
+                    span.set_attribute("mcp.tool.is_error", True)
+                raise
+
+            duration_ms = (time.perf_counter() - started) * 1000
+            result = response.get("result")
+            is_error = "error" in response or bool(
+                isinstance(result, dict) and result.get("isError")
+            )
+            bytes_out = len(
+                json.dumps(result if result is not None else response.get("error"))
+            )
+            self.record(name, duration_ms, is_error, bytes_in, bytes_out)
+            if span is not None:
+                span.set_attribute("mcp.tool.is_error", is_error)
+                span.set_attribute("mcp.tool.bytes_out", bytes_out)
+            return response
+
+    def stats(self) -> dict[str, ToolCallStats]:
+        """Return a snapshot of the statistics of every tool called so far."""
+        return {name: series.snapshot(name) for name, series in self._tools.items()}
+
+    def reset(self) -> None:
+        """Discard all recorded statistics."""
+        self._tools.clear()
@@ -0,0 +1,278 @@
+"""Transports recording a session to a transcript file and replaying it."""
+
+import gzip
+import json
+import time
+from collections.abc import AsyncIterable, AsyncIterator
+from dataclasses import replace
+from pathlib import Path
+from typing import IO, Any
+
+import anyio
+
+from ..._errors import TranscriptMismatchError
+from ...types import ClaudeAgentOptions
+from . import Transport
+
+_TRANSCRIPT_FORMAT = "claude-agent-sdk-transcript"
+_TRANSCRIPT_VERSION = 1
+
+# Direction of a transcript event: read from, or written to, Claude Code
+_READ = "r"
+_WRITE = "w"
+
+
+def _open_transcript(path: Path, write: bool) -> IO[str]:
+    if path.suffix == ".gz":
+        if write:
+            return gzip.open(path, "wt", encoding="utf-8")
+        return gzip.open(path, "rt", encoding="utf-8")
+    return path.open("w" if write else "r", encoding="utf-8")
+
+
+class RecordingTransport(Transport):
+    """
+    Transport recording everything exchanged through another transport.
+
+    Each message read from or written to the wrapped transport is appended to
+    a JSON lines transcript, with its time relative to connect(). Paths ending
+    in ``.gz`` are gzip-compressed. Replay the transcript with ReplayTransport.
+
+    Example:
+        ```python
+        transport = RecordingTransport.cli("enrich_contact.jsonl.gz", options, prompt)
+        async for message in query(prompt=prompt, options=options, transport=transport):
+            ...
+        ```
+    """
+
+    def __init__(self, transport: Transport, path: str | Path):
+        self._transport = transport
+        self._path = Path(path)
+        self._file: IO[str] | None = None
+        self._started = 0.0
+
+    @classmethod
+    def cli(
+        cls,
+        path: str | Path,
+        options: ClaudeAgentOptions,
+        prompt: str | AsyncIterable[dict[str, Any]] | None = None,
+    ) -> "RecordingTransport":
+        """Record a session with Claude Code, as started by query() or ClaudeSDKClient.
+
+        Args:
+            path: Transcript file to write
+            options: Options of the session
+            prompt: The prompt passed to query(), or None for a ClaudeSDKClient
+        """
+        from .subprocess_cli import SubprocessCLITransport
+
+        async def no_prompt() -> AsyncIterator[dict[str, Any]]:
+            return
+            yield {}  # type: ignore[unreachable]
+
+        if options.can_use_tool:
+            options = replace(options, permission_prompt_tool_name="stdio")
+        return cls(
+            SubprocessCLITransport(
+                prompt=no_prompt() if prompt is None else prompt, options=options
+            ),
+            path,
+        )
+
+    def _record(self, direction: str, message: Any) -> None:
+        if self._file is None:
+            return
+        event = {
+            "t": round(time.monotonic() - self._started, 4),
+            "d": direction,
+            "m": message,
+        }
+        self._file.write(json.dumps(event, separators=(",", ":")) + "\n")
+
+    async def connect(self) -> None:
+        self._file = _open_transcript(self._path, write=True)
+        self._file.write(
+            json.dumps({"format": _TRANSCRIPT_FORMAT, "version": _TRANSCRIPT_VERSION})
+            + "\n"
+        )
+        self._started = time.monotonic()
+        await self._transport.connect()
+
+    async def write(self, data: str) -> None:
+        for line in data.splitlines():
+            if line.strip():
+                self._record(_WRITE, json.loads(line))
+        await self._transport.write(data)
+
+    async def read_messages(self) -> AsyncIterator[dict[str, Any]]:
+        async for message in self._transport.read_messages():
+            self._record(_READ, message)
+            yield message
+
+    async def close(self) -> None:
+        try:
+            await self._transport.close()
+        finally:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def is_ready(self) -> bool:
+        return self._transport.is_ready()
+
+    async def end_input(self) -> None:
+        await self._transport.end_input()
+
+
+class ReplayTransport(Transport):
+    """
+    Transport serving a session recorded by RecordingTransport.
+
+    Recorded messages are read back in order, each only after the writes that
+    preceded it in the recording have been made, so the SDK sees the same
+    exchange as when it was recorded, without Claude Code, network or API
+    cost. Writes are checked against the recorded ones. Request IDs generated
+    by the SDK differ between runs; they are matched up rather than compared,
+    and the recorded responses are rewritten to the new IDs.
+
+    Args:
+        path: Transcript written by RecordingTransport
+        speed: Replay speed relative to the recording, e.g. 10 to replay ten
+            times faster; None replays without any delay
+        validate: Whether to raise TranscriptMismatchError when a write does
+            not match the recording
+        write_timeout: Seconds to wait for a recorded write a message depends
+            on before raising TranscriptMismatchError, e.g. when the code
+            under test makes fewer writes than the recording; None waits
+            indefinitely
+
+    Example:
+        ```python
+        transport = ReplayTransport("enrich_contact.jsonl.gz", speed=None)
+        async for message in query(prompt=prompt, options=options, transport=transport):
+            ...
+        ```
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        speed: float | None = 1.0,
+        validate: bool = True,
+        write_timeout: float | None = 10.0,
+    ):
+        self._path = Path(path)
+        self._speed = speed
+        self._validate = validate
+        self._write_timeout = write_timeout
+        self._events: list[tuple[float, str, Any]] = []
+        self._expected_writes: list[Any] = []
+        self._writes_made = 0
+        self._write_made: anyio.Event | None = None
+        self._request_ids: dict[str, str] = {}
+        self._started = 0.0
+        self._ready = False
+
+    async def connect(self) -> None:
+        with _open_transcript(self._path, write=False) as f:
+            header = json.loads(f.readline())
+            if header.get("format") != _TRANSCRIPT_FORMAT:
+                raise ValueError(f"{self._path} is not a recorded transcript")
+            self._events = []
+            for line in f:
+                if line.strip():
+                    event = json.loads(line)
+                    self._events.append((event["t"], event["d"], event["m"]))
+        self._expected_writes = [
+            message for _, direction, message in self._events if direction == _WRITE
+        ]
+        self._writes_made = 0
+        self._write_made = anyio.Event()
+        self._request_ids = {}
+        self._started = anyio.current_time()
+        self._ready = True
+
+    def _check_write(self, message: Any) -> None:
+        index = self._writes_made
+        if index >= len(self._expected_writes):
+            if self._validate:
+                raise TranscriptMismatchError(
+                    f"Unexpected write #{index + 1}, the recording has "
+                    f"{len(self._expected_writes)} writes",
+                    actual=message,
+                )
+            return
+
+        expected = self._expected_writes[index]
+        if (
+            isinstance(expected, dict)
+            and isinstance(message, dict)
+            and expected.get("type") == "control_request"
+            and "request_id" in message
+        ):
+            self._request_ids[expected.get("request_id", "")] = message["request_id"]
+            expected = {**expected, "request_id": message["request_id"]}
+
+        if self._validate and message != expected:
+            raise TranscriptMismatchError(
+                f"Write #{index + 1} does not match the recording",
+                expected=expected,
+                actual=message,
+            )
+
+    async def write(self, data: str) -> None:
+        if not self._ready:
+            raise TranscriptMismatchError("Write before connect()")
+        for line in data.splitlines():
+            if line.strip():
+                self._check_write(json.loads(line))
+                self._writes_made += 1
+                assert self._write_made is not None
+                self._write_made.set()
+                self._write_made = anyio.Event()
+
+    def _rewrite_request_id(self, message: Any) -> Any:
+        """Point a recorded control response at the request ID of this run."""
+        if isinstance(message, dict) and message.get("type") == "control_response":
+            response = message.get("response") or {}
+            request_id = self._request_ids.get(response.get("request_id", ""))
+            if request_id is not None:
+                return {**message, "response": {**response, "request_id": request_id}}
+        return message
+
+    async def _wait_for_writes(self, count: int) -> None:
+        with anyio.move_on_after(self._write_timeout):
+            while self._writes_made < count:
+                assert self._write_made is not None
+                await self._write_made.wait()
+        if self._writes_made < count:
+            missing = self._writes_made
+            raise TranscriptMismatchError(
+                f"Write #{missing + 1} was not made within {self._write_timeout} s, "
+                f"the recording has {len(self._expected_writes)} writes",
+                expected=self._expected_writes[missing],
+            )
+
+    async def read_messages(self) -> AsyncIterator[dict[str, Any]]:
+        writes_before = 0
+        for recorded_at, direction, message in self._events:
+            if direction == _WRITE:
+                writes_before += 1
+                continue
+            await self._wait_for_writes(writes_before)
+            if self._speed:
+                delay = self._started + recorded_at / self._speed - anyio.current_time()
+                if delay > 0:
+                    await anyio.sleep(delay)
+            yield self._rewrite_request_id(message)
+
+    async def close(self) -> None:
+        self._ready = False
+
+    def is_ready(self) -> bool:
+        return self._ready
+
+    async def end_input(self) -> None:
+        pass
@@ -0,0 +1,252 @@
+"""Transport to Claude Code processes hosted by a relay, over a socket."""
+
+import json
+import logging
+import os
+from collections.abc import AsyncIterable, AsyncIterator
+from dataclasses import replace
+from pathlib import Path
+from typing import Any
+
+import anyio
+import anyio.abc
+from anyio.streams.buffered import BufferedByteReceiveStream
+
+from ..._errors import CLIConnectionError, ProcessError
+from ..._errors import CLIJSONDecodeError as SDKJSONDecodeError
+from ...types import ClaudeAgentOptions
+from . import Transport
+from .subprocess_cli import (
+    _DEFAULT_MAX_BUFFER_SIZE,
+    CompiledOptions,
+    _is_too_long_for_argv,
+    _option_args,
+    _prompt_args,
+)
+
+logger = logging.getLogger(__name__)
+
+# Path of a Unix domain socket, or (host, port) of a TCP socket
+RelayAddress = str | Path | tuple[str, int]
+
+RELAY_TOKEN_ENV = "CLAUDE_AGENT_RELAY_TOKEN"
+
+_RELAY_PROTOCOL = "claude-agent-sdk-relay"
+_RELAY_VERSION = 1
+
+# Longest session request or reply line, outside of Claude Code's messages
+_MAX_CONTROL_LINE = 1024 * 1024
+
+
+async def _connect(address: RelayAddress) -> anyio.abc.SocketStream:
+    if isinstance(address, tuple):
+        host, port = address
+        return await anyio.connect_tcp(host, port)
+    return await anyio.connect_unix(address)
+
+
+def _format_address(address: RelayAddress) -> str:
+    if isinstance(address, tuple):
+        return f"{address[0]}:{address[1]}"
+    return str(address)
+
+
+class SocketTransport(Transport):
+    """
+    Transport to a Claude Code process hosted by a relay.
+
+    The relay (``python -m claude_agent_sdk.relay``) listens on a Unix domain
+    or loopback TCP socket and starts a Claude Code process for each connection, or
+    hands over one it started ahead of time, so that many workers on a host
+    share a pool of warm processes instead of each paying for process
+    startup. The connection then carries the same stream-json messages as
+    the process's stdin and stdout.
+
+    The relay must run on the same host, as the CLI arguments may refer to
+    local files, e.g. the MCP server configuration. SDK MCP servers, hooks
+    and can_use_tool callbacks are served over the connection as usual;
+    stderr callbacks are not called, but the end of stderr is kept for
+    ProcessError. The process limits and shutdown policy are the relay's.
+
+    Args:
+        address: Path of the relay's Unix domain socket, or (host, port)
+        options: Options of the session
+        prompt: The prompt passed to query(), or None for a ClaudeSDKClient
+        token: Token the relay requires, defaulting to the
+            CLAUDE_AGENT_RELAY_TOKEN environment variable
+
+    Example:
+        ```python
+        transport = SocketTransport("/run/claude/relay.sock", options, prompt)
+        async for message in query(prompt=prompt, options=options, transport=transport):
+            ...
+        ```
+    """
+
+    def __init__(
+        self,
+        address: RelayAddress,
+        options: ClaudeAgentOptions | CompiledOptions,
+        prompt: str | AsyncIterable[dict[str, Any]] | None = None,
+        token: str | None = None,
+    ):
+        self._address = address
+        self._prompt = prompt
+        self._is_streaming = not isinstance(prompt, str)
+        self._compiled: CompiledOptions | None = None
+        if isinstance(options, CompiledOptions):
+            self._compiled = options
+            options = options.options
+        elif options.can_use_tool and not options.permission_prompt_tool_name:
+            # The permission callback is served over the control protocol
+            options = replace(options, permission_prompt_tool_name="stdio")
+        self._options = options
+        self._token = token if token is not None else os.environ.get(RELAY_TOKEN_ENV)
+        self._stream: anyio.abc.SocketStream | None = None
+        self._receive: BufferedByteReceiveStream | None = None
+        self._ready = False
+        self._max_buffer_size = (
+            options.max_buffer_size
+            if options.max_buffer_size is not None
+            else _DEFAULT_MAX_BUFFER_SIZE
+        )
+        # Process ID of the hosted process, and whether it was started ahead
+        self.pid: int | None = None
+        self.warm = False
+
+    def _session_request(self) -> dict[str, Any]:
+        args = (
+            list(self._compiled.args)
+            if self._compiled is not None
+            else _option_args(self._options)
+        )
+        args.extend(_prompt_args(self._prompt))
+        return {
+            "type": "relay_session",
+            "protocol": _RELAY_PROTOCOL,
+            "version": _RELAY_VERSION,
+            "token": self._token,
+            "args": args,
+            # Run in this process's directory, rather than the relay's
+            "cwd": str(self._options.cwd or Path.cwd()),
+            "env": self._options.env,
+        }
+
+    async def connect(self) -> None:
+        """Connect to the relay and start a session."""
+        if self._stream:
+            return
+
+        try:
+            self._stream = await _connect(self._address)
+        except OSError as e:
+            raise CLIConnectionError(
+                f"Failed to connect to relay at {_format_address(self._address)}: {e}"
+            ) from e
+        self._receive = BufferedByteReceiveStream(self._stream)
+
+        try:
+            await self._stream.send(
+                (json.dumps(self._session_request()) + "\n").encode()
+            )
+            reply = json.loads(
+                await self._receive.receive_until(b"\n", _MAX_CONTROL_LINE)
+            )
+        except Exception as e:
+            await self.close()
+            raise CLIConnectionError(f"Failed to start a relay session: {e}") from e
+
+        if reply.get("type") != "relay_ready":
+            await self.close()
+            raise CLIConnectionError(
+                f"Relay refused the session: {reply.get('message', reply)}"
+            )
+        self.pid = reply.get("pid")
+        self.warm = bool(reply.get("warm"))
+
+        if not self._is_streaming:
+            # String mode: end the input, after sending the prompt if it was
+            # too long for the command line
+            if _is_too_long_for_argv(str(self._prompt)):
+                await self._stream.send(str(self._prompt).encode())
+            await self._stream.send_eof()
+
+        self._ready = True
+
+    async def write(self, data: str) -> None:
+        """Write raw data to the transport."""
+        if not self._ready or not self._stream:
+            raise CLIConnectionError("SocketTransport is not ready for writing")
+        try:
+            await self._stream.send(data.encode())
+        except Exception as e:
+            self._ready = False
+            raise CLIConnectionError(f"Failed to write to relay: {e}") from e
+
+    async def end_input(self) -> None:
+        """End the input stream (close the process's stdin)."""
+        if self._stream:
+            try:
+                await self._stream.send_eof()
+            except Exception as e:
+                logger.debug(f"Failed to end relay input: {e}")
+
+    def read_messages(self) -> AsyncIterator[dict[str, Any]]:
+        """Read and parse messages from the transport."""
+        return self._read_messages_impl()
+
+    async def _read_messages_impl(self) -> AsyncIterator[dict[str, Any]]:
+        if not self._receive:
+            raise CLIConnectionError("Not connected")
+
+        while True:
+            try:
+                line = await self._receive.receive_until(b"\n", self._max_buffer_size)
+            except anyio.DelimiterNotFound as e:
+                raise SDKJSONDecodeError(
+                    f"JSON message exceeded maximum buffer size of {self._max_buffer_size} bytes",
+                    ValueError(f"Buffer size exceeds limit {self._max_buffer_size}"),
+                ) from e
+            except (
+                anyio.IncompleteRead,
+                anyio.EndOfStream,
+                anyio.ClosedResourceError,
+                anyio.BrokenResourceError,
+            ):
+                break
+
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise SDKJSONDecodeError(line.decode(errors="replace"), e) from e
+
+            if isinstance(data, dict) and data.get("type") == "relay_exit":
+                exit_code = data.get("exit_code")
+                if exit_code:
+                    raise ProcessError(
+                        f"Command failed with exit code {exit_code}",
+                        exit_code=exit_code,
+                        stderr=data.get("stderr") or None,
+                    )
+                return
+            yield data
+
+        if self._ready:
+            raise CLIConnectionError(
+                "Relay connection closed before Claude Code exited"
+            )
+
+    async def close(self) -> None:
+        """Close the connection, which stops the hosted process."""
+        self._ready = False
+        stream, self._stream = self._stream, None
+        self._receive = None
+        if stream:
+            with anyio.CancelScope(shield=True):
+                await stream.aclose()
+
+    def is_ready(self) -> bool:
+        """Check if transport is ready for communication."""
+        return self._ready
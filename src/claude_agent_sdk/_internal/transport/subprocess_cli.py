@@ -1,14 +1,19 @@
 """Subprocess transport implementation using Claude Code CLI."""
 
+import hashlib
 import json
 import logging
 import os
 import re
 import shutil
+import stat
 import sys
+import tempfile
+import time
+import uuid
 from collections.abc import AsyncIterable, AsyncIterator
 from contextlib import suppress
-from dataclasses import asdict
+from dataclasses import asdict, dataclass, field, replace
 from pathlib import Path
 from subprocess import PIPE
 from typing import Any
@@ -21,13 +26,528 @@ from anyio.streams.text import TextReceiveStream, TextSendStream
 from ..._errors import CLIConnectionError, CLINotFoundError, ProcessError
 from ..._errors import CLIJSONDecodeError as SDKJSONDecodeError
 from ..._version import __version__
-from ...types import ClaudeAgentOptions
+from ...types import ClaudeAgentOptions, ProcessLimits, ShutdownPolicy
+from ..background import BackgroundTasks
+from ..stderr import StderrDispatcher, StderrTail
+from ..structured_output import output_instruction
 from . import Transport
 
 logger = logging.getLogger(__name__)
 
 _DEFAULT_MAX_BUFFER_SIZE = 1024 * 1024  # 1MB buffer limit
 MINIMUM_CLAUDE_CODE_VERSION = "2.0.0"
+_KILL_TIMEOUT = 1.0  # Seconds to wait for a process to be reaped after SIGKILL
+# Seconds close() waits for the rest of stderr to be read and delivered
+_STDERR_DRAIN_TIMEOUT = 5.0
+
+# Linux rejects a single argument longer than 128 KiB (MAX_ARG_STRLEN), and
+# long command lines are copied into the process table. Longer values are
+# passed in files or on stdin.
+_MAX_ARG_BYTES = 64 * 1024
+
+# CLI binaries whose version has been checked by this process
+_checked_cli_paths: set[str] = set()
+
+# Configuration files written by this process, by the number of compiled
+# options and transports using them
+_config_file_users: dict[str, int] = {}
+# Size and modification time of the configuration files known to hold the
+# content their name is the hash of
+_verified_config_files: dict[Path, tuple[int, int]] = {}
+
+
+def _default_config_dir() -> Path:
+    """Directory of the current user for the configuration files."""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and Path(runtime_dir).is_dir():
+        # Private to the user already
+        return Path(runtime_dir) / "claude-agent-sdk"
+    if hasattr(os, "getuid"):
+        return Path(tempfile.gettempdir()) / f"claude-agent-sdk-{os.getuid()}"
+    # The temporary directory is the user's own on Windows
+    return Path(tempfile.gettempdir()) / "claude-agent-sdk"
+
+
+def _ensure_private_dir(directory: Path) -> None:
+    """Create the directory if needed and check that only the user can use it.
+
+    Configuration files may hold credentials, and Claude Code runs the MCP
+    servers they declare, so a directory another user can write to, or
+    could have created in a shared location first, must not be used.
+    """
+    directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+    if not hasattr(os, "getuid"):
+        return
+    st = directory.lstat()
+    if not stat.S_ISDIR(st.st_mode):
+        raise CLIConnectionError(
+            f"Configuration directory {directory} is not a directory"
+        )
+    if st.st_uid != os.getuid():
+        raise CLIConnectionError(
+            f"Configuration directory {directory} is owned by another user "
+            f"(uid {st.st_uid})"
+        )
+    if st.st_mode & 0o077:
+        raise CLIConnectionError(
+            f"Configuration directory {directory} is accessible to other users "
+            f"(mode {stat.S_IMODE(st.st_mode):o}, expected 700)"
+        )
+
+
+def _is_current_file(path: Path, content: str) -> bool:
+    # A file is reused only if it is the user's own and holds the content. It
+    # is read only if it changed since it was last verified or written.
+    try:
+        st = path.lstat()
+        if not stat.S_ISREG(st.st_mode):
+            return False
+        if hasattr(os, "getuid") and st.st_uid != os.getuid():
+            return False
+        if _verified_config_files.get(path) == (st.st_size, st.st_mtime_ns):
+            return True
+        if st.st_size != len(content.encode()):
+            return False
+        if path.read_text(encoding="utf-8") != content:
+            return False
+    except (OSError, UnicodeDecodeError):
+        return False
+    _verified_config_files[path] = (st.st_size, st.st_mtime_ns)
+    return True
+
+
+def _write_config_file(directory: Path, content: str, suffix: str = ".json") -> str:
+    """Write content to a file named after its hash, once, and return its path."""
+    _ensure_private_dir(directory)
+    digest = hashlib.sha256(content.encode()).hexdigest()[:32]
+    path = directory / f"{digest}{suffix}"
+    if not _is_current_file(path, content):
+        temp_path = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        # The configuration may hold credentials of MCP servers
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+        st = temp_path.stat()
+        temp_path.replace(path)
+        _verified_config_files[path] = (st.st_size, st.st_mtime_ns)
+    return str(path)
+
+
+def _use_config_file(path: str, files: list[str] | None) -> str:
+    """Record a use of a configuration file in files, if given."""
+    if files is not None:
+        _config_file_users[path] = _config_file_users.get(path, 0) + 1
+        files.append(path)
+    return path
+
+
+def _release_config_files(files: list[str]) -> None:
+    """Release the uses in files, deleting the files no longer used."""
+    while files:
+        path = files.pop()
+        users = _config_file_users.pop(path, 0) - 1
+        if users > 0:
+            _config_file_users[path] = users
+            continue
+        _verified_config_files.pop(Path(path), None)
+        with suppress(OSError):
+            Path(path).unlink()
+
+
+def _is_too_long_for_argv(value: str) -> bool:
+    return len(value.encode()) > _MAX_ARG_BYTES
+
+
+def _option_args(
+    options: ClaudeAgentOptions,
+    config_dir: Path | None = None,
+    files: list[str] | None = None,
+) -> list[str]:
+    """Build the CLI arguments for the options, excluding the prompt.
+
+    System prompts and MCP server configurations too long for the command
+    line are passed as files written to config_dir, or to a temporary
+    directory. With a config_dir, the MCP server configuration always is.
+    The files are recorded in files, if given, to be released with
+    _release_config_files() once no longer needed.
+    """
+    cmd = ["--output-format", "stream-json", "--verbose"]
+
+    append_system_prompt = []
+    if options.system_prompt is None:
+        pass
+    elif isinstance(options.system_prompt, str):
+        if _is_too_long_for_argv(options.system_prompt):
+            cmd.extend(
+                [
+                    "--system-prompt-file",
+                    _use_config_file(
+                        _write_config_file(
+                            config_dir or _default_config_dir(),
+                            options.system_prompt,
+                            ".md",
+                        ),
+                        files,
+                    ),
+                ]
+            )
+        else:
+            cmd.extend(["--system-prompt", options.system_prompt])
+    else:
+        if (
+            options.system_prompt.get("type") == "preset"
+            and "append" in options.system_prompt
+        ):
+            append_system_prompt.append(options.system_prompt["append"])
+
+    if options.output_schema is not None:
+        append_system_prompt.append(output_instruction(options.output_schema))
+
+    if append_system_prompt:
+        appended = "\n\n".join(append_system_prompt)
+        if _is_too_long_for_argv(appended):
+            cmd.extend(
+                [
+                    "--append-system-prompt-file",
+                    _use_config_file(
+                        _write_config_file(
+                            config_dir or _default_config_dir(), appended, ".md"
+                        ),
+                        files,
+                    ),
+                ]
+            )
+        else:
+            cmd.extend(["--append-system-prompt", appended])
+
+    if options.allowed_tools:
+        cmd.extend(["--allowedTools", ",".join(options.allowed_tools)])
+
+    if options.max_turns:
+        cmd.extend(["--max-turns", str(options.max_turns)])
+
+    if options.disallowed_tools:
+        cmd.extend(["--disallowedTools", ",".join(options.disallowed_tools)])
+
+    if options.model:
+        cmd.extend(["--model", options.model])
+
+    if options.permission_prompt_tool_name:
+        cmd.extend(["--permission-prompt-tool", options.permission_prompt_tool_name])
+
+    if options.permission_mode:
+        cmd.extend(["--permission-mode", options.permission_mode])
+
+    if options.continue_conversation:
+        cmd.append("--continue")
+
+    if options.resume:
+        cmd.extend(["--resume", options.resume])
+
+    if options.settings:
+        cmd.extend(["--settings", options.settings])
+
+    if options.add_dirs:
+        # Convert all paths to strings and add each directory
+        for directory in options.add_dirs:
+            cmd.extend(["--add-dir", str(directory)])
+
+    if options.mcp_servers:
+        if isinstance(options.mcp_servers, dict):
+            # Process all servers, stripping instance field from SDK servers
+            servers_for_cli: dict[str, Any] = {}
+            for name, config in options.mcp_servers.items():
+                if isinstance(config, dict) and config.get("type") == "sdk":
+                    # For SDK servers, pass everything except the instance field
+                    sdk_config: dict[str, object] = {
+                        k: v for k, v in config.items() if k != "instance"
+                    }
+                    servers_for_cli[name] = sdk_config
+                else:
+                    # For external servers, pass as-is
+                    servers_for_cli[name] = config
+
+            # Pass all servers to CLI
+            if servers_for_cli:
+                mcp_config = json.dumps({"mcpServers": servers_for_cli})
+                if config_dir is not None or _is_too_long_for_argv(mcp_config):
+                    mcp_config = _use_config_file(
+                        _write_config_file(
+                            config_dir or _default_config_dir(), mcp_config
+                        ),
+                        files,
+                    )
+                cmd.extend(["--mcp-config", mcp_config])
+        else:
+            # String or Path format: pass directly as file path or JSON string
+            cmd.extend(["--mcp-config", str(options.mcp_servers)])
+
+    if options.include_partial_messages:
+        cmd.append("--include-partial-messages")
+
+    if options.fork_session:
+        cmd.append("--fork-session")
+
+    if options.agents:
+        agents_dict = {
+            name: {k: v for k, v in asdict(agent_def).items() if v is not None}
+            for name, agent_def in options.agents.items()
+        }
+        cmd.extend(["--agents", json.dumps(agents_dict)])
+
+    sources_value = (
+        ",".join(options.setting_sources) if options.setting_sources is not None else ""
+    )
+    cmd.extend(["--setting-sources", sources_value])
+
+    # Add extra args for future CLI flags
+    for flag, value in options.extra_args.items():
+        if value is None:
+            # Boolean flag without value
+            cmd.append(f"--{flag}")
+        else:
+            # Flag with value
+            cmd.extend([f"--{flag}", str(value)])
+
+    return cmd
+
+
+def _prompt_args(prompt: str | AsyncIterable[dict[str, Any]] | None) -> list[str]:
+    """Build the CLI arguments passing the prompt, None being a streamed one."""
+    if not isinstance(prompt, str):
+        # Streaming mode: use --input-format stream-json
+        return ["--input-format", "stream-json"]
+    if _is_too_long_for_argv(prompt):
+        # String mode with a long prompt: --print reads it from stdin
+        return ["--print"]
+    # String mode: use --print with the prompt
+    return ["--print", "--", prompt]
+
+
+def _process_env(
+    env: dict[str, str], cwd: str | None, limits: ProcessLimits | None
+) -> dict[str, str]:
+    """Build the environment of a Claude Code process."""
+    # Merge environment variables: system -> user -> SDK required
+    process_env = {
+        **os.environ,
+        **env,  # User-provided env vars
+        "CLAUDE_CODE_ENTRYPOINT": "sdk-py",
+        "CLAUDE_AGENT_SDK_VERSION": __version__,
+    }
+
+    if cwd:
+        process_env["PWD"] = cwd
+
+    if limits and limits.node_max_old_space_mb is not None:
+        process_env["NODE_OPTIONS"] = " ".join(
+            filter(
+                None,
+                [
+                    process_env.get("NODE_OPTIONS"),
+                    f"--max-old-space-size={limits.node_max_old_space_mb}",
+                ],
+            )
+        )
+    return process_env
+
+
+async def _stop_process(process: Process, policy: ShutdownPolicy | None) -> None:
+    """Wait for the process to exit, escalating to SIGTERM then SIGKILL."""
+    policy = policy or ShutdownPolicy()
+    started = time.monotonic()
+
+    async def wait(timeout: float) -> bool:
+        with anyio.move_on_after(timeout), suppress(Exception):
+            await process.wait()
+        return process.returncode is not None
+
+    if await wait(policy.exit_timeout):
+        outcome = "exited"
+    else:
+        with suppress(ProcessLookupError):
+            process.terminate()
+        if await wait(policy.terminate_timeout):
+            outcome = "terminated"
+        else:
+            logger.warning(
+                f"Claude Code (pid {process.pid}) did not exit after SIGTERM, "
+                "killing it"
+            )
+            with suppress(ProcessLookupError):
+                process.kill()
+            outcome = "killed" if await wait(_KILL_TIMEOUT) else "unreaped"
+
+    if policy.stats is not None:
+        elapsed = time.monotonic() - started
+        stats = policy.stats
+        setattr(stats, outcome, getattr(stats, outcome) + 1)
+        stats.total_wait_s += elapsed
+        stats.max_wait_s = max(stats.max_wait_s, elapsed)
+
+
+def _limited_command(
+    cmd: list[str], limits: ProcessLimits
+) -> tuple[list[str], ProcessLimits]:
+    """Prefix the command with prlimit and nice to apply the limits from exec.
+
+    Returns the command and the limits left for _apply_process_limits(), as
+    prlimit or nice is not installed.
+    """
+    if sys.platform != "linux" or shutil.which(cmd[0]) is None:
+        # Leave a missing CLI to be reported by starting it
+        return cmd, limits
+
+    prefix: list[str] = []
+    rlimit_args = [
+        f"--{name}={value}"
+        for name, value in (
+            ("as", limits.max_address_space_bytes),
+            ("cpu", limits.max_cpu_seconds),
+            ("nofile", limits.max_open_files),
+        )
+        if value is not None
+    ]
+    if rlimit_args and (prlimit := shutil.which("prlimit")):
+        prefix.extend([prlimit, *rlimit_args, "--"])
+        limits = replace(
+            limits,
+            max_address_space_bytes=None,
+            max_cpu_seconds=None,
+            max_open_files=None,
+        )
+    if limits.nice is not None and (nice := shutil.which("nice")):
+        # nice adds to the niceness of this process
+        increment = limits.nice - os.getpriority(os.PRIO_PROCESS, 0)
+        prefix.extend([nice, "-n", str(increment), "--"])
+        limits = replace(limits, nice=None)
+    return [*prefix, *cmd], limits
+
+
+def _apply_process_limits(pid: int, limits: ProcessLimits) -> None:
+    """Apply rlimits and niceness to a started process."""
+    rlimits = {
+        "RLIMIT_AS": limits.max_address_space_bytes,
+        "RLIMIT_CPU": limits.max_cpu_seconds,
+        "RLIMIT_NOFILE": limits.max_open_files,
+    }
+    try:
+        import resource
+
+        for name, value in rlimits.items():
+            if value is not None:
+                resource.prlimit(pid, getattr(resource, name), (value, value))
+        if limits.nice is not None:
+            os.setpriority(os.PRIO_PROCESS, pid, limits.nice)
+    except (ImportError, AttributeError) as e:
+        logger.warning(f"Process limits are not supported on this platform: {e}")
+    except OSError as e:
+        logger.warning(f"Failed to apply process limits to Claude Code: {e}")
+
+
+def _read_rss(pid: int) -> int | None:
+    """Resident set size of a running process in bytes, None once it exited."""
+    try:
+        with Path(f"/proc/{pid}/status").open(encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+@dataclass(frozen=True, eq=False)
+class CompiledOptions:
+    """
+    ClaudeAgentOptions turned into Claude Code's command line, once.
+
+    Locating the CLI and serializing the MCP server and agent configuration
+    are done when compiling, instead of each time a Claude Code process is
+    started. The MCP server configuration is written to a file named after
+    its content, so it is not repeated on every command line. Compiled
+    options are immutable, and equal only to themselves, as the options
+    they were compiled from may differ in more than the command line; pass
+    them to query(), query_many() or ClaudeSDKClient in place of those
+    options.
+
+    close() deletes the configuration files, i.e. the MCP server configuration
+    and system prompts too long for the command line, unless other compiled
+    options of this process use them; use the compiled options with ``with``
+    or close them once no more sessions are started with them. The options
+    must not be changed after compiling; compile them again instead, and
+    also if a configuration file has been deleted.
+
+    Example:
+        ```python
+        with CompiledOptions.compile(options) as compiled:
+            for contact in contacts:
+                async for message in query(prompt=contact, options=compiled):
+                    ...
+        ```
+    """
+
+    options: ClaudeAgentOptions = field(repr=False)
+    cli_path: str
+    # Arguments following the CLI path, excluding those passing the prompt
+    args: tuple[str, ...]
+    # Configuration files the arguments refer to, until closed
+    _files: list[str] = field(default_factory=list, repr=False)
+
+    @classmethod
+    def compile(
+        cls, options: ClaudeAgentOptions, config_dir: str | Path | None = None
+    ) -> "CompiledOptions":
+        """
+        Compile options.
+
+        Args:
+            options: The options to compile
+            config_dir: Directory to write the MCP server configuration to,
+                which must be accessible to the current user only. Defaults
+                to a claude-agent-sdk directory under $XDG_RUNTIME_DIR, or
+                a directory of the user under the system's temporary
+                directory.
+
+        Raises:
+            CLINotFoundError: If options.cli_path is not set and Claude Code
+                cannot be found
+            CLIConnectionError: If config_dir is owned by another user or
+                accessible to other users
+        """
+        cli_path = (
+            str(options.cli_path)
+            if options.cli_path is not None
+            else SubprocessCLITransport._find_cli()
+        )
+        # The permission callback is served over the control protocol
+        cli_options = options
+        if options.can_use_tool and not options.permission_prompt_tool_name:
+            cli_options = replace(options, permission_prompt_tool_name="stdio")
+        directory = (
+            Path(config_dir) if config_dir is not None else _default_config_dir()
+        )
+        files: list[str] = []
+        return cls(
+            options=options,
+            cli_path=cli_path,
+            args=tuple(_option_args(cli_options, directory, files)),
+            _files=files,
+        )
+
+    def close(self) -> None:
+        """Delete the configuration files no other compiled options use.
+
+        Sessions must no longer be started with the compiled options, while
+        those already started are not affected.
+        """
+        _release_config_files(self._files)
+
+    def __enter__(self) -> "CompiledOptions":
+        return self
+
+    def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        self.close()
 
 
 class SubprocessCLITransport(Transport):
@@ -36,21 +556,34 @@ class SubprocessCLITransport(Transport):
     def __init__(
         self,
         prompt: str | AsyncIterable[dict[str, Any]],
-        options: ClaudeAgentOptions,
+        options: ClaudeAgentOptions | CompiledOptions,
     ):
         self._prompt = prompt
         self._is_streaming = not isinstance(prompt, str)
+        self._compiled: CompiledOptions | None = None
+        if isinstance(options, CompiledOptions):
+            self._compiled = options
+            options = options.options
         self._options = options
-        self._cli_path = (
-            str(options.cli_path) if options.cli_path is not None else self._find_cli()
-        )
+        if self._compiled is not None:
+            self._cli_path = self._compiled.cli_path
+        elif options.cli_path is not None:
+            self._cli_path = str(options.cli_path)
+        else:
+            self._cli_path = self._find_cli()
         self._cwd = str(options.cwd) if options.cwd else None
         self._process: Process | None = None
         self._stdout_stream: TextReceiveStream | None = None
         self._stdin_stream: TextSendStream | None = None
         self._stderr_stream: TextReceiveStream | None = None
-        self._stderr_task_group: anyio.abc.TaskGroup | None = None
+        # Background tasks of the process: stderr reading and memory sampling
+        self._tasks = BackgroundTasks()
+        self._stderr_tail = StderrTail(options.stderr_tail_bytes)
+        self._stderr_dispatcher: StderrDispatcher | None = None
+        self._stderr_done: anyio.Event | None = None
         self._ready = False
+        # Configuration files written for the process, deleted by close()
+        self._config_files: list[str] = []
         self._exit_error: Exception | None = None  # Track process exit errors
         self._max_buffer_size = (
             options.max_buffer_size
@@ -58,7 +591,8 @@ class SubprocessCLITransport(Transport):
             else _DEFAULT_MAX_BUFFER_SIZE
         )
 
-    def _find_cli(self) -> str:
+    @staticmethod
+    def _find_cli() -> str:
         """Find Claude Code CLI binary."""
         if cli := shutil.which("claude"):
             return cli
@@ -86,119 +620,14 @@ class SubprocessCLITransport(Transport):
 
     def _build_command(self) -> list[str]:
         """Build CLI command with arguments."""
-        cmd = [self._cli_path, "--output-format", "stream-json", "--verbose"]
-
-        if self._options.system_prompt is None:
-            pass
-        elif isinstance(self._options.system_prompt, str):
-            cmd.extend(["--system-prompt", self._options.system_prompt])
+        cmd = [self._cli_path]
+        if self._compiled is not None:
+            cmd.extend(self._compiled.args)
         else:
-            if (
-                self._options.system_prompt.get("type") == "preset"
-                and "append" in self._options.system_prompt
-            ):
-                cmd.extend(
-                    ["--append-system-prompt", self._options.system_prompt["append"]]
-                )
-
-        if self._options.allowed_tools:
-            cmd.extend(["--allowedTools", ",".join(self._options.allowed_tools)])
-
-        if self._options.max_turns:
-            cmd.extend(["--max-turns", str(self._options.max_turns)])
-
-        if self._options.disallowed_tools:
-            cmd.extend(["--disallowedTools", ",".join(self._options.disallowed_tools)])
-
-        if self._options.model:
-            cmd.extend(["--model", self._options.model])
-
-        if self._options.permission_prompt_tool_name:
-            cmd.extend(
-                ["--permission-prompt-tool", self._options.permission_prompt_tool_name]
-            )
-
-        if self._options.permission_mode:
-            cmd.extend(["--permission-mode", self._options.permission_mode])
-
-        if self._options.continue_conversation:
-            cmd.append("--continue")
-
-        if self._options.resume:
-            cmd.extend(["--resume", self._options.resume])
-
-        if self._options.settings:
-            cmd.extend(["--settings", self._options.settings])
-
-        if self._options.add_dirs:
-            # Convert all paths to strings and add each directory
-            for directory in self._options.add_dirs:
-                cmd.extend(["--add-dir", str(directory)])
-
-        if self._options.mcp_servers:
-            if isinstance(self._options.mcp_servers, dict):
-                # Process all servers, stripping instance field from SDK servers
-                servers_for_cli: dict[str, Any] = {}
-                for name, config in self._options.mcp_servers.items():
-                    if isinstance(config, dict) and config.get("type") == "sdk":
-                        # For SDK servers, pass everything except the instance field
-                        sdk_config: dict[str, object] = {
-                            k: v for k, v in config.items() if k != "instance"
-                        }
-                        servers_for_cli[name] = sdk_config
-                    else:
-                        # For external servers, pass as-is
-                        servers_for_cli[name] = config
-
-                # Pass all servers to CLI
-                if servers_for_cli:
-                    cmd.extend(
-                        [
-                            "--mcp-config",
-                            json.dumps({"mcpServers": servers_for_cli}),
-                        ]
-                    )
-            else:
-                # String or Path format: pass directly as file path or JSON string
-                cmd.extend(["--mcp-config", str(self._options.mcp_servers)])
-
-        if self._options.include_partial_messages:
-            cmd.append("--include-partial-messages")
-
-        if self._options.fork_session:
-            cmd.append("--fork-session")
-
-        if self._options.agents:
-            agents_dict = {
-                name: {k: v for k, v in asdict(agent_def).items() if v is not None}
-                for name, agent_def in self._options.agents.items()
-            }
-            cmd.extend(["--agents", json.dumps(agents_dict)])
-
-        sources_value = (
-            ",".join(self._options.setting_sources)
-            if self._options.setting_sources is not None
-            else ""
-        )
-        cmd.extend(["--setting-sources", sources_value])
-
-        # Add extra args for future CLI flags
-        for flag, value in self._options.extra_args.items():
-            if value is None:
-                # Boolean flag without value
-                cmd.append(f"--{flag}")
-            else:
-                # Flag with value
-                cmd.extend([f"--{flag}", str(value)])
-
-        # Add prompt handling based on mode
-        if self._is_streaming:
-            # Streaming mode: use --input-format stream-json
-            cmd.extend(["--input-format", "stream-json"])
-        else:
-            # String mode: use --print with the prompt
-            cmd.extend(["--print", "--", str(self._prompt)])
+            _release_config_files(self._config_files)
+            cmd.extend(_option_args(self._options, files=self._config_files))
 
+        cmd.extend(_prompt_args(self._prompt))
         return cmd
 
     async def connect(self) -> None:
@@ -206,57 +635,68 @@ class SubprocessCLITransport(Transport):
         if self._process:
             return
 
-        if not os.environ.get("CLAUDE_AGENT_SDK_SKIP_VERSION_CHECK"):
+        if (
+            not os.environ.get("CLAUDE_AGENT_SDK_SKIP_VERSION_CHECK")
+            and self._cli_path not in _checked_cli_paths
+        ):
             await self._check_claude_version()
+            _checked_cli_paths.add(self._cli_path)
 
         cmd = self._build_command()
         try:
-            # Merge environment variables: system -> user -> SDK required
-            process_env = {
-                **os.environ,
-                **self._options.env,  # User-provided env vars
-                "CLAUDE_CODE_ENTRYPOINT": "sdk-py",
-                "CLAUDE_AGENT_SDK_VERSION": __version__,
-            }
-
-            if self._cwd:
-                process_env["PWD"] = self._cwd
-
-            # Pipe stderr if we have a callback OR debug mode is enabled
-            should_pipe_stderr = (
-                self._options.stderr is not None
-                or "debug-to-stderr" in self._options.extra_args
+            process_env = _process_env(
+                self._options.env, self._cwd, self._options.process_limits
             )
+            limits = self._options.process_limits
+            late_limits = None
+            if limits:
+                cmd, late_limits = _limited_command(cmd, limits)
 
-            # For backward compat: use debug_stderr file object if no callback and debug is on
-            stderr_dest = PIPE if should_pipe_stderr else None
-
+            # stderr is always piped, to keep its end for ProcessError
+            started = time.monotonic()
             self._process = await anyio.open_process(
                 cmd,
                 stdin=PIPE,
                 stdout=PIPE,
-                stderr=stderr_dest,
+                stderr=PIPE,
                 cwd=self._cwd,
                 env=process_env,
                 user=self._options.user,
             )
 
+            if late_limits:
+                _apply_process_limits(self._process.pid, late_limits)
+
             if self._process.stdout:
                 self._stdout_stream = TextReceiveStream(self._process.stdout)
 
-            # Setup stderr stream if piped
-            if should_pipe_stderr and self._process.stderr:
+            self._tasks = BackgroundTasks()
+
+            # Read stderr in the background, delivering it to the callbacks
+            # in a worker thread
+            if self._process.stderr:
                 self._stderr_stream = TextReceiveStream(self._process.stderr)
-                # Start async task to read stderr
-                self._stderr_task_group = anyio.create_task_group()
-                await self._stderr_task_group.__aenter__()
-                self._stderr_task_group.start_soon(self._handle_stderr)
+                self._stderr_done = anyio.Event()
+                if self._options.stderr or self._options.stderr_events:
+                    self._stderr_dispatcher = StderrDispatcher(
+                        started,
+                        self._options.stderr,
+                        self._options.stderr_events,
+                    )
+                    self._tasks.spawn(self._stderr_dispatcher.run)
+                self._tasks.spawn(self._handle_stderr)
+
+            if limits and limits.rss_sample_interval:
+                self._tasks.spawn(self._sample_rss, self._process.pid, limits)
 
             # Setup stdin for streaming mode
             if self._is_streaming and self._process.stdin:
                 self._stdin_stream = TextSendStream(self._process.stdin)
             elif not self._is_streaming and self._process.stdin:
-                # String mode: close stdin immediately
+                # String mode: close stdin immediately, after writing the
+                # prompt if it was too long for the command line
+                if _is_too_long_for_argv(str(self._prompt)):
+                    await self._process.stdin.send(str(self._prompt).encode())
                 await self._process.stdin.aclose()
 
             self._ready = True
@@ -277,76 +717,113 @@ class SubprocessCLITransport(Transport):
             self._exit_error = error
             raise error from e
 
+    async def _sample_rss(self, pid: int, limits: ProcessLimits) -> None:
+        """Record the memory use of the process until it exits."""
+        assert limits.rss_sample_interval is not None
+        stats = limits.stats
+        sampled = False
+        try:
+            while True:
+                rss = _read_rss(pid)
+                if rss is None:
+                    return
+                if stats is not None:
+                    if not sampled:
+                        stats.processes += 1
+                        sampled = True
+                    stats.samples += 1
+                    stats.current_rss_bytes[pid] = rss
+                    stats.peak_rss_bytes = max(stats.peak_rss_bytes, rss)
+                await anyio.sleep(limits.rss_sample_interval)
+        finally:
+            if stats is not None:
+                stats.current_rss_bytes.pop(pid, None)
+
     async def _handle_stderr(self) -> None:
-        """Handle stderr stream - read and invoke callbacks."""
+        """Handle stderr stream - keep its end and pass lines on."""
         if not self._stderr_stream:
             return
 
+        debug_to_stderr = "debug-to-stderr" in self._options.extra_args
         try:
             async for line in self._stderr_stream:
-                line_str = line.rstrip()
-                if not line_str:
-                    continue
+                for line_str in line.splitlines():
+                    line_str = line_str.rstrip()
+                    if not line_str:
+                        continue
+                    self._stderr_tail.append(line_str)
+
+                    # Queue the line for the callbacks if provided
+                    if self._stderr_dispatcher:
+                        self._stderr_dispatcher.put(line_str)
 
-                # Call the stderr callback if provided
-                if self._options.stderr:
-                    self._options.stderr(line_str)
-
-                # For backward compatibility: write to debug_stderr if in debug mode
-                elif (
-                    "debug-to-stderr" in self._options.extra_args
-                    and self._options.debug_stderr
-                ):
-                    self._options.debug_stderr.write(line_str + "\n")
-                    if hasattr(self._options.debug_stderr, "flush"):
-                        self._options.debug_stderr.flush()
+                    # For backward compatibility: write to debug_stderr if in debug mode
+                    elif debug_to_stderr:
+                        if self._options.debug_stderr:
+                            self._options.debug_stderr.write(line_str + "\n")
+                            if hasattr(self._options.debug_stderr, "flush"):
+                                self._options.debug_stderr.flush()
+
+                    # Otherwise show it, as when stderr was inherited
+                    else:
+                        print(line_str, file=sys.stderr)
         except anyio.ClosedResourceError:
             pass  # Stream closed, exit normally
-        except Exception:
-            pass  # Ignore other errors during stderr reading
+        except Exception as e:
+            logger.debug(f"Stopped reading stderr: {e}")
+        finally:
+            if self._stderr_dispatcher:
+                self._stderr_dispatcher.close()
+            if self._stderr_done:
+                self._stderr_done.set()
 
     async def close(self) -> None:
         """Close the transport and clean up resources."""
         self._ready = False
+        _release_config_files(self._config_files)
 
         if not self._process:
             return
 
-        # Close stderr task group if active
-        if self._stderr_task_group:
-            with suppress(Exception):
-                self._stderr_task_group.cancel_scope.cancel()
-                await self._stderr_task_group.__aexit__(None, None, None)
-            self._stderr_task_group = None
-
-        # Close streams
+        # Close stdin, letting the process exit
         if self._stdin_stream:
             with suppress(Exception):
                 await self._stdin_stream.aclose()
             self._stdin_stream = None
 
-        if self._stderr_stream:
-            with suppress(Exception):
-                await self._stderr_stream.aclose()
-            self._stderr_stream = None
-
         if self._process.stdin:
             with suppress(Exception):
                 await self._process.stdin.aclose()
 
-        # Terminate and wait for process
-        if self._process.returncode is None:
-            with suppress(ProcessLookupError):
-                self._process.terminate()
-                # Wait for process to finish with timeout
-                with suppress(Exception):
-                    # Just try to wait, but don't block if it fails
-                    await self._process.wait()
+        # Stop the process, within bounded time even if the caller is cancelled
+        with anyio.CancelScope(shield=True):
+            await _stop_process(self._process, self._options.shutdown)
+
+            # Read the rest of stderr and hand it to the callbacks, as it
+            # often explains why the process exited
+            with anyio.move_on_after(_STDERR_DRAIN_TIMEOUT):
+                if self._stderr_done:
+                    await self._stderr_done.wait()
+                if self._stderr_dispatcher:
+                    self._stderr_dispatcher.close()
+                    await self._stderr_dispatcher.wait_delivered()
+            if self._stderr_dispatcher:
+                self._stderr_dispatcher.abandon()
+
+        # Stop reading stderr and sampling memory
+        await self._tasks.close()
+
+        if self._stderr_stream:
+            with suppress(Exception):
+                await self._stderr_stream.aclose()
+            self._stderr_stream = None
 
         self._process = None
         self._stdout_stream = None
         self._stdin_stream = None
         self._stderr_stream = None
+        self._stderr_dispatcher = None
+        self._stderr_done = None
         self._exit_error = None
 
     async def write(self, data: str) -> None:
@@ -448,10 +925,14 @@ class SubprocessCLITransport(Transport):
 
         # Use exit code for error detection
         if returncode is not None and returncode != 0:
+            # Let the reader catch up with the end of stderr
+            if self._stderr_done:
+                with anyio.move_on_after(1):
+                    await self._stderr_done.wait()
             self._exit_error = ProcessError(
                 f"Command failed with exit code {returncode}",
                 exit_code=returncode,
-                stderr="Check stderr output for details",
+                stderr=self._stderr_tail.text() or None,
             )
             raise self._exit_error
 
@@ -1,14 +1,98 @@
 """Claude SDK Client for interacting with Claude Code."""
 
+import inspect
 import json
+import logging
 import os
-from collections.abc import AsyncIterable, AsyncIterator
+import time
+from collections.abc import AsyncIterable, AsyncIterator, Callable
 from dataclasses import replace
-from typing import Any
+from typing import TYPE_CHECKING, Any
+
+import anyio
 
 from . import Transport
 from ._errors import CLIConnectionError
-from .types import ClaudeAgentOptions, HookEvent, HookMatcher, Message, ResultMessage
+from ._internal.background import BackgroundTasks
+from ._internal.tool_metrics import ToolCallMetrics
+from .types import (
+    AssistantMessage,
+    ClaudeAgentOptions,
+    HookEvent,
+    HookMatcher,
+    Message,
+    ResultMessage,
+    StopCondition,
+    StoppedResponse,
+    ToolResultBlock,
+    ToolUseBlock,
+    UserMessage,
+)
+
+if TYPE_CHECKING:
+    from ._internal.query import Query
+    from ._internal.transport.subprocess_cli import CompiledOptions
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for the reader to notice that a process failing writes exited
+_EXIT_NOTICE_TIMEOUT = 1.0
+
+
+def tool_result(
+    tool_name: str, parse: Callable[[ToolResultBlock], Any] | None = None
+) -> StopCondition:
+    """Stop condition met by the first successful result of a tool.
+
+    Args:
+        tool_name: Name of the tool, e.g. ``mcp__contacts__find_email``
+        parse: Optional function extracting the value from the result block.
+            If it returns None the condition is not met and the response
+            continues. Defaults to returning the block itself.
+
+    Returns:
+        A condition for ClaudeSDKClient.receive_until()
+
+    Example:
+        ```python
+        def email_of(block: ToolResultBlock) -> str | None:
+            data = json.loads(block.content[0]["text"])
+            return data.get("email")
+
+        await client.query("Find the email of the CTO of Acme")
+        response = await client.receive_until(
+            tool_result("mcp__contacts__find_email", email_of)
+        )
+        ```
+    """
+    tool_use_ids: set[str] = set()
+
+    def condition(message: Message) -> Any:
+        if isinstance(message, AssistantMessage):
+            for block in message.content:
+                if isinstance(block, ToolUseBlock) and block.name == tool_name:
+                    tool_use_ids.add(block.id)
+        elif isinstance(message, UserMessage) and isinstance(message.content, list):
+            for block in message.content:
+                if (
+                    isinstance(block, ToolResultBlock)
+                    and block.tool_use_id in tool_use_ids
+                    and not block.is_error
+                ):
+                    value = parse(block) if parse else block
+                    if value is not None:
+                        return value
+        return None
+
+    return condition
+
+
+async def _empty_stream() -> AsyncIterator[dict[str, Any]]:
+    # Never yields, but indicates that this function is an iterator and
+    # keeps the connection open.
+    # This yield is never reached but makes this an async generator
+    return
+    yield {}  # type: ignore[unreachable]
 
 
 class ClaudeSDKClient:
@@ -43,27 +127,45 @@ class ClaudeSDKClient:
     See examples/streaming_mode.py for full examples of ClaudeSDKClient in
     different scenarios.
 
-    Caveat: As of v0.0.20, you cannot use a ClaudeSDKClient instance across
-    different async runtime contexts (e.g., different trio nurseries or asyncio
-    task groups). The client internally maintains a persistent anyio task group
-    for reading messages that remains active from connect() until disconnect().
-    This means you must complete all operations with the client within the same
-    async context where it was connected. Ideally, this limitation should not
-    exist.
+    Caveat: A ClaudeSDKClient is bound to the event loop that connected it.
+    Its background tasks (e.g. the message reader) run outside any task
+    group, so it can be used and disconnected from any task on that loop, but
+    concurrent turns from several tasks interleave on the one session. Use
+    SharedClaudeSDKClient to share one connected session between concurrent
+    callers or event loops, with turns serialized.
     """
 
     def __init__(
         self,
-        options: ClaudeAgentOptions | None = None,
+        options: "ClaudeAgentOptions | CompiledOptions | None" = None,
         transport: Transport | None = None,
     ):
         """Initialize Claude SDK client."""
+        from ._internal.transport.subprocess_cli import CompiledOptions
+
         if options is None:
             options = ClaudeAgentOptions()
+        self._compiled: CompiledOptions | None = None
+        # Options compiled to resume a session, closed with the session
+        self._resume_compiled: CompiledOptions | None = None
+        if isinstance(options, CompiledOptions):
+            self._compiled = options
+            options = options.options
         self.options = options
         self._custom_transport = transport
         self._transport: Transport | None = None
-        self._query: Any | None = None
+        self._query: Query | None = None
+        # Reconnection when options.reconnect is set
+        self._supervisor: BackgroundTasks | None = None
+        self._recover_lock: anyio.Lock | None = None
+        self._session_id: str | None = None
+        # Restarts since a process last ran for reconnect.stable_after seconds
+        self._restarts = 0
+        self._opened_at = 0.0
+        # Set once reconnecting gave up
+        self._reconnect_error: CLIConnectionError | None = None
+        # Statistics of SDK MCP tool calls made during this client's sessions
+        self.tool_metrics = options.tool_metrics or ToolCallMetrics()
         os.environ["CLAUDE_CODE_ENTRYPOINT"] = "sdk-py-client"
 
     def _convert_hooks_to_internal_format(
@@ -87,19 +189,6 @@ class ClaudeSDKClient:
     ) -> None:
         """Connect to Claude with a prompt or message stream."""
 
-        from ._internal.query import Query
-        from ._internal.transport.subprocess_cli import SubprocessCLITransport
-
-        # Auto-connect with empty async iterable if no prompt is provided
-        async def _empty_stream() -> AsyncIterator[dict[str, Any]]:
-            # Never yields, but indicates that this function is an iterator and
-            # keeps the connection open.
-            # This yield is never reached but makes this an async generator
-            return
-            yield {}  # type: ignore[unreachable]
-
-        actual_prompt = _empty_stream() if prompt is None else prompt
-
         # Validate and configure permission settings (matching TypeScript SDK logic)
         if self.options.can_use_tool:
             # canUseTool callback requires streaming mode (AsyncIterable prompt)
@@ -116,18 +205,55 @@ class ClaudeSDKClient:
                     "Please use one or the other."
                 )
 
-            # Automatically set permission_prompt_tool_name to "stdio" for control protocol
-            options = replace(self.options, permission_prompt_tool_name="stdio")
-        else:
-            options = self.options
+        await self._open(_empty_stream() if prompt is None else prompt)
+
+        # If we have an initial prompt stream, start streaming it
+        if prompt is not None and isinstance(prompt, AsyncIterable):
+            assert self._query is not None
+            self._query.spawn(self._query.stream_input, prompt)
+
+        # Watch for the process dying, to reconnect
+        if self.options.reconnect and not self._custom_transport:
+            self._recover_lock = anyio.Lock()
+            self._restarts = 0
+            self._reconnect_error = None
+            self._supervisor = BackgroundTasks()
+            self._supervisor.spawn(self._supervise, self._query)
+
+    async def _open(
+        self,
+        prompt: str | AsyncIterable[dict[str, Any]],
+        resume: str | None = None,
+    ) -> None:
+        """Start Claude Code, resuming a session if given, and initialize it."""
+        from ._internal.query import Query
+        from ._internal.transport.subprocess_cli import (
+            CompiledOptions,
+            SubprocessCLITransport,
+        )
+
+        options = self.options
+        if resume is not None:
+            options = replace(
+                options, resume=resume, continue_conversation=False, fork_session=False
+            )
+        compiled = self._compiled
+        if compiled is not None and resume is not None:
+            compiled = CompiledOptions.compile(options)
+            self._close_resume_compiled()
+            self._resume_compiled = compiled
+
+        # Automatically set permission_prompt_tool_name to "stdio" for control protocol
+        if options.can_use_tool:
+            options = replace(options, permission_prompt_tool_name="stdio")
 
         # Use provided custom transport or create subprocess transport
         if self._custom_transport:
             self._transport = self._custom_transport
         else:
             self._transport = SubprocessCLITransport(
-                prompt=actual_prompt,
-                options=options,
+                prompt=prompt,
+                options=compiled or options,
             )
         await self._transport.connect()
 
@@ -147,15 +273,93 @@ class ClaudeSDKClient:
             if self.options.hooks
             else None,
             sdk_mcp_servers=sdk_mcp_servers,
+            tool_metrics=self.tool_metrics,
+            budget=self.options.budget,
         )
 
         # Start reading messages and initialize
-        await self._query.start()
-        await self._query.initialize()
-
-        # If we have an initial prompt stream, start streaming it
-        if prompt is not None and isinstance(prompt, AsyncIterable) and self._query._tg:
-            self._query._tg.start_soon(self._query.stream_input, prompt)
+        try:
+            await self._query.start()
+            await self._query.initialize()
+        except BaseException:
+            await self._query.close()
+            raise
+        self._opened_at = time.monotonic()
+
+    async def _supervise(self, query: "Query") -> None:
+        """Reconnect once the session's process dies."""
+        await query.reader_done.wait()
+        if query.died:
+            await self._recover(query)
+
+    async def _recover(self, query: "Query") -> bool:
+        """Replace a session whose process died, returning whether it was."""
+        if self._recover_lock is None:
+            return False
+        async with self._recover_lock:
+            if self._query is not query:
+                return self._query is not None and not self._query.died
+            if self._reconnect_error is not None:
+                return False
+
+            policy = self.options.reconnect
+            assert policy is not None
+            started = time.monotonic()
+            error = query._read_error
+            resume = query.session_id or self._session_id or self.options.resume
+            self._session_id = resume
+            logger.warning(
+                f"Claude Code exited unexpectedly ({error or 'input still open'}), "
+                f"reconnecting{f' to session {resume}' if resume else ''}"
+            )
+            await query.close()
+
+            if started - self._opened_at >= policy.stable_after:
+                self._restarts = 0
+            last_error: Exception | None = error
+            reconnected = False
+            while self._restarts < policy.max_attempts:
+                if self._restarts:
+                    await anyio.sleep(
+                        min(
+                            policy.backoff * 2 ** (self._restarts - 1),
+                            policy.max_backoff,
+                        )
+                    )
+                self._restarts += 1
+                try:
+                    await self._open(_empty_stream(), resume=resume)
+                except Exception as e:
+                    last_error = e
+                    logger.warning(f"Reconnection attempt {self._restarts} failed: {e}")
+                    continue
+                reconnected = True
+                break
+
+            downtime = time.monotonic() - started
+            if policy.stats is not None:
+                stats = policy.stats
+                if reconnected:
+                    stats.reconnects += 1
+                else:
+                    stats.failures += 1
+                stats.total_downtime_s += downtime
+                stats.max_downtime_s = max(stats.max_downtime_s, downtime)
+                stats.last_error = str(last_error) if last_error else None
+
+            if not reconnected:
+                logger.error(
+                    f"Giving up reconnecting after {policy.max_attempts} restarts "
+                    f"in a row: {last_error}"
+                )
+                self._reconnect_error = CLIConnectionError(
+                    f"Gave up reconnecting to Claude Code after "
+                    f"{policy.max_attempts} restarts in a row: {last_error}"
+                )
+                return False
+            assert self._supervisor is not None
+            self._supervisor.spawn(self._supervise, self._query)
+            return True
 
     async def receive_messages(self) -> AsyncIterator[Message]:
         """Receive all messages from Claude."""
@@ -163,9 +367,18 @@ class ClaudeSDKClient:
             raise CLIConnectionError("Not connected. Call connect() first.")
 
         from ._internal.message_parser import parse_message
+        from ._internal.structured_output import apply_structured_output
 
-        async for data in self._query.receive_messages():
-            yield parse_message(data)
+        query = self._query
+        try:
+            async for data in query.receive_messages():
+                yield apply_structured_output(
+                    parse_message(data), self.options.output_schema
+                )
+        finally:
+            # Let the next call read from the new process
+            if query.died:
+                await self._recover(query)
 
     async def query(
         self, prompt: str | AsyncIterable[dict[str, Any]], session_id: str = "default"
@@ -176,9 +389,20 @@ class ClaudeSDKClient:
         Args:
             prompt: Either a string message or an async iterable of message dictionaries
             session_id: Session identifier for the conversation
+
+        Raises:
+            BudgetExceededError: If the session has already exceeded options.budget
         """
         if not self._query or not self._transport:
             raise CLIConnectionError("Not connected. Call connect() first.")
+        if (
+            self._query.died
+            and not await self._recover(self._query)
+            and self._reconnect_error is not None
+        ):
+            raise self._reconnect_error
+        if self._query.budget_exceeded is not None:
+            raise self._query.budget_error()
 
         # Handle string prompts
         if isinstance(prompt, str):
@@ -188,7 +412,21 @@ class ClaudeSDKClient:
                 "parent_tool_use_id": None,
                 "session_id": session_id,
             }
-            await self._transport.write(json.dumps(message) + "\n")
+            data = json.dumps(message) + "\n"
+            try:
+                await self._transport.write(data)
+            except CLIConnectionError:
+                # The process may have died since the last response, before
+                # the reader noticed: send the prompt to a new one
+                query = self._query
+                with anyio.move_on_after(_EXIT_NOTICE_TIMEOUT):
+                    await query.reader_done.wait()
+                if not (query.died and await self._recover(query)):
+                    if self._reconnect_error is not None:
+                        raise self._reconnect_error from None
+                    raise
+                assert self._transport is not None
+                await self._transport.write(data)
         else:
             # Handle AsyncIterable prompts - stream them
             async for msg in prompt:
@@ -317,12 +555,78 @@ class ClaudeSDKClient:
             if isinstance(message, ResultMessage):
                 return
 
+    async def receive_until(
+        self, condition: StopCondition, interrupt: bool = True
+    ) -> StoppedResponse:
+        """
+        Receive the current response until a condition is met.
+
+        The condition is called with each message and stops the response by
+        returning a value other than None, e.g. as soon as a tool result
+        contains the answer. Claude is then interrupted, so no further turns
+        (such as a final summary) are generated, and the remaining messages up
+        to the ResultMessage are read so that the client is ready for the next
+        query. The ResultMessage reports the cost incurred up to the stop.
+
+        Args:
+            condition: Function of a message returning the value to stop with,
+                or None to continue. May be a coroutine function. See
+                tool_result() for a condition matching a tool's result.
+            interrupt: If False, return as soon as the condition is met without
+                interrupting Claude; the rest of the response must then be
+                consumed with receive_response().
+
+        Returns:
+            StoppedResponse with the condition's value, the messages received
+            and the final ResultMessage. If the response completes without the
+            condition being met, value is None and stopped_early is False.
+
+        Example:
+            ```python
+            await client.query("What's the phone number of Acme's CTO?")
+            response = await client.receive_until(
+                tool_result("mcp__contacts__find_phone")
+            )
+            if response.stopped_early:
+                print(response.value.content, response.total_cost_usd)
+            ```
+        """
+        response = StoppedResponse(value=None, stopped_early=False)
+        async for message in self.receive_messages():
+            response.messages.append(message)
+            if isinstance(message, ResultMessage):
+                response.result = message
+                break
+            if response.stopped_early:
+                continue
+
+            value = condition(message)
+            if inspect.isawaitable(value):
+                value = await value
+            if value is not None:
+                response.value = value
+                response.stopped_early = True
+                if not interrupt:
+                    break
+                await self.interrupt()
+        return response
+
+    def _close_resume_compiled(self) -> None:
+        if self._resume_compiled is not None:
+            self._resume_compiled.close()
+            self._resume_compiled = None
+
     async def disconnect(self) -> None:
         """Disconnect from Claude."""
+        if self._supervisor:
+            await self._supervisor.close()
+            self._supervisor = None
+        self._recover_lock = None
         if self._query:
             await self._query.close()
             self._query = None
         self._transport = None
+        self._close_resume_compiled()
 
     async def __aenter__(self) -> "ClaudeSDKClient":
         """Enter async context - automatically connects with empty stream for interactive use."""
@@ -0,0 +1,207 @@
+"""Delivery of one message stream to several consumers."""
+
+import logging
+from collections import deque
+from collections.abc import AsyncIterable, AsyncIterator
+from typing import Any, Generic, Literal, TypeVar
+
+import anyio
+
+from ._errors import FanoutCancelledError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# What a subscription does with a message arriving while its buffer is full:
+# wait for the consumer, drop the message, or drop the oldest buffered one
+OverflowPolicy = Literal["block", "drop_newest", "drop_oldest"]
+
+
+class MessageSubscription(Generic[T]):
+    """
+    The messages of a MessageFanout delivered to one consumer.
+
+    Iterate over it to receive the messages, in order, until the source
+    ends. If the source failed, its error is raised once the buffered
+    messages have been received, and if MessageFanout.run() was cancelled
+    before the source ended, FanoutCancelledError is.
+
+    A consumer that stops before the end must close the subscription, by
+    using it with ``async with`` or calling aclose(). Otherwise a "block"
+    subscription keeps its buffer full and MessageFanout.run() waits for it
+    forever, stalling every other subscription.
+    """
+
+    def __init__(
+        self, fanout: "MessageFanout[T]", max_buffered: int, overflow: OverflowPolicy
+    ):
+        self.max_buffered = max_buffered
+        self.overflow = overflow
+        self._fanout = fanout
+        self._buffer: deque[T] = deque()
+        self._not_empty: anyio.Event | None = None
+        self._not_full: anyio.Event | None = None
+        self._ended = False
+        self._error: Exception | None = None
+        self._closed = False
+        # Messages received by the consumer, and dropped as the buffer was full
+        self.delivered = 0
+        self.dropped = 0
+        # Most messages buffered at once
+        self.peak_buffered = 0
+
+    async def _put(self, message: T) -> None:
+        while len(self._buffer) >= self.max_buffered and not self._closed:
+            if self.overflow == "drop_newest":
+                self.dropped += 1
+                return
+            if self.overflow == "drop_oldest":
+                self._buffer.popleft()
+                self.dropped += 1
+                break
+            self._not_full = anyio.Event()
+            await self._not_full.wait()
+        if self._closed:
+            return
+
+        self._buffer.append(message)
+        self.peak_buffered = max(self.peak_buffered, len(self._buffer))
+        if self._not_empty is not None:
+            self._not_empty.set()
+
+    def _end(self, error: Exception | None = None) -> None:
+        self._ended = True
+        self._error = error
+        if self._not_empty is not None:
+            self._not_empty.set()
+
+    def __aiter__(self) -> AsyncIterator[T]:
+        return self
+
+    async def __anext__(self) -> T:
+        while not self._buffer:
+            if self._ended or self._closed:
+                if self._error is not None and not self._closed:
+                    error, self._error = self._error, None
+                    raise error
+                raise StopAsyncIteration
+            self._not_empty = anyio.Event()
+            await self._not_empty.wait()
+
+        message = self._buffer.popleft()
+        self.delivered += 1
+        if self._not_full is not None:
+            self._not_full.set()
+        return message
+
+    async def __aenter__(self) -> "MessageSubscription[T]":
+        """Enter async context - the subscription is closed on exit."""
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> bool:
+        """Exit async context - always closes the subscription."""
+        await self.aclose()
+        return False
+
+    async def aclose(self) -> None:
+        """Stop receiving messages, so that none are buffered or waited for."""
+        self._closed = True
+        self._buffer.clear()
+        self._fanout._unsubscribe(self)
+        if self._not_full is not None:
+            self._not_full.set()
+        if self._not_empty is not None:
+            self._not_empty.set()
+
+
+class MessageFanout(Generic[T]):
+    """
+    Delivers each message of a stream to several consumers.
+
+    Each subscription has its own buffer, so consumers read at their own
+    pace. When a buffer is full, a "block" subscription makes run() wait
+    for its consumer, holding up the source and so every subscription,
+    while "drop_newest" and "drop_oldest" subscriptions drop messages
+    instead, counting them. Subscribe consumers that must see every
+    message, such as business logic, with "block", and those that must
+    never slow the others, such as logging sinks, with a drop policy.
+
+    Subscriptions made after run() started receive the later messages only.
+    Close a subscription whose consumer stops early, see MessageSubscription.
+
+    Example:
+        ```python
+        fanout = MessageFanout(client.receive_messages())
+        transcript = fanout.subscribe(max_buffered=1000, overflow="drop_oldest")
+        enrichment = fanout.subscribe()
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(fanout.run)
+            tg.start_soon(write_transcript, transcript)
+            async with enrichment:
+                async for message in enrichment:
+                    if is_final(message):
+                        break
+        ```
+    """
+
+    def __init__(self, source: AsyncIterable[T]):
+        self._source = source
+        self._subscriptions: list[MessageSubscription[T]] = []
+        # Messages read from the source
+        self.messages = 0
+
+    def subscribe(
+        self, max_buffered: int = 100, overflow: OverflowPolicy = "block"
+    ) -> MessageSubscription[T]:
+        """Add a consumer.
+
+        Args:
+            max_buffered: Messages buffered for the consumer at most
+            overflow: What to do with a message arriving while the buffer is
+                full: wait for the consumer to catch up ("block"), drop it
+                ("drop_newest"), or drop the oldest buffered message
+                ("drop_oldest")
+        """
+        if max_buffered < 1:
+            raise ValueError("max_buffered must be at least 1")
+        subscription = MessageSubscription(self, max_buffered, overflow)
+        self._subscriptions.append(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription: MessageSubscription[T]) -> None:
+        if subscription in self._subscriptions:
+            self._subscriptions.remove(subscription)
+
+    async def run(self) -> None:
+        """Read the source to its end, delivering each message to the consumers.
+
+        An error of the source is raised by each subscription after its
+        buffered messages, rather than by run(), unless there are none. If
+        run() is cancelled, the subscriptions raise FanoutCancelledError
+        after their buffered messages, so that consumers don't mistake the
+        messages received for the whole stream.
+        """
+        error: Exception | None = None
+        source_ended = False
+        try:
+            async for message in self._source:
+                self.messages += 1
+                for subscription in list(self._subscriptions):
+                    await subscription._put(message)
+            source_ended = True
+        except Exception as e:
+            source_ended = True
+            if not self._subscriptions:
+                raise
+            logger.debug(f"Message source failed: {e}")
+            error = e
+        finally:
+            if not source_ended:
+                error = FanoutCancelledError(
+                    f"Message fanout stopped after {self.messages} messages, "
+                    "before the source ended"
+                )
+            for subscription in self._subscriptions:
+                subscription._end(error)
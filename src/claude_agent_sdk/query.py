@@ -1,18 +1,24 @@
 """Query function for one-shot interactions with Claude Code."""
 
 import os
-from collections.abc import AsyncIterable, AsyncIterator
+import time
+from collections.abc import AsyncGenerator, AsyncIterable, AsyncIterator, Iterable
+from dataclasses import replace
 from typing import Any
 
+import anyio
+
+from ._internal.background import BackgroundTasks
 from ._internal.client import InternalClient
 from ._internal.transport import Transport
-from .types import ClaudeAgentOptions, Message
+from ._internal.transport.subprocess_cli import CompiledOptions
+from .types import ClaudeAgentOptions, Message, QueryBatchStats, ResultMessage
 
 
 async def query(
     *,
     prompt: str | AsyncIterable[dict[str, Any]],
-    options: ClaudeAgentOptions | None = None,
+    options: ClaudeAgentOptions | CompiledOptions | None = None,
     transport: Transport | None = None,
 ) -> AsyncIterator[Message]:
     """
@@ -124,3 +130,176 @@ async def query(
         prompt=prompt, options=options, transport=transport
     ):
         yield message
+
+
+async def query_many(
+    *,
+    prompts: Iterable[str | tuple[str, dict[str, Any]]],
+    options: ClaudeAgentOptions | CompiledOptions | None = None,
+    concurrency: int = 4,
+    stats: QueryBatchStats | None = None,
+    stop_on_error: bool = True,
+) -> AsyncGenerator[tuple[int, Message], None]:
+    """
+    Run many independent prompts concurrently.
+
+    Each prompt runs as its own query() with its own Claude Code process; at
+    most ``concurrency`` processes run at a time and a new prompt is started
+    as soon as one finishes. Messages are yielded as they arrive, tagged with
+    the index of their prompt, so messages of different prompts interleave.
+
+    Prompts are consumed lazily, which makes it possible to pass a generator
+    over a large input set.
+
+    The prompts run in background tasks rather than in the consuming task,
+    which may stop iterating at any point. Closing the generator, explicitly
+    or when it is garbage collected, cancels the running prompts; use
+    ``contextlib.aclosing()`` to close it as soon as the iteration stops.
+
+    Args:
+        prompts: The prompts to run. An item can also be a ``(prompt, overrides)``
+                 tuple, where overrides is a dict of ClaudeAgentOptions fields
+                 replacing those of ``options`` for that prompt.
+        options: Options shared by all prompts (defaults to ClaudeAgentOptions()).
+                 They are compiled once (see CompiledOptions) for all prompts
+                 without overrides.
+        concurrency: Maximum number of prompts running at the same time.
+        stats: Optional QueryBatchStats updated with the cost, latency and
+               outcome of each prompt as the batch progresses.
+        stop_on_error: If True, the first failing prompt stops the batch: the
+                       messages already received are yielded, the other
+                       running prompts are cancelled and its exception is
+                       raised. If False, failures are only
+                       recorded in ``stats.errors`` and the batch continues.
+                       An error iterating ``prompts`` always stops the batch
+                       and is raised.
+
+    Yields:
+        (index, message) tuples, where index is the position of the prompt
+
+    Example:
+        ```python
+        stats = QueryBatchStats()
+        results: dict[int, str] = {}
+        async for index, message in query_many(
+            prompts=[f"Summarize {path}" for path in paths],
+            options=ClaudeAgentOptions(allowed_tools=["Read"]),
+            concurrency=8,
+            stats=stats,
+        ):
+            if isinstance(message, ResultMessage):
+                results[index] = message.result or ""
+        print(f"{stats.completed} done, ${stats.total_cost_usd:.2f}")
+        ```
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    if options is None:
+        options = ClaudeAgentOptions()
+    if stats is None:
+        stats = QueryBatchStats()
+    compiled: CompiledOptions | None = None
+    if isinstance(options, CompiledOptions):
+        compiled, options = options, options.options
+    base_options = options
+    # Options compiled here are closed with the batch, the caller's are not
+    compiles_options = compiled is None
+
+    def shared_options() -> CompiledOptions:
+        # Compiled on first use, so that a failure is reported like any other
+        # failure of the prompt
+        nonlocal compiled
+        if compiled is None:
+            compiled = CompiledOptions.compile(base_options)
+        return compiled
+
+    os.environ["CLAUDE_CODE_ENTRYPOINT"] = "sdk-py"
+
+    batch_started = time.perf_counter()
+    items = enumerate(prompts)
+    send_stream, receive_stream = anyio.create_memory_object_stream[
+        tuple[int, Message]
+    ](max_buffer_size=concurrency)
+
+    # First failure when stop_on_error is set, re-raised once the batch is torn down
+    failures: list[Exception] = []
+    stopped = False
+    workers_running = concurrency
+
+    def stop() -> None:
+        # Closing the stream ends the consumer's iteration once the buffered
+        # messages are received, and makes the workers' next send fail
+        nonlocal stopped
+        stopped = True
+        send_stream.close()
+
+    async def run_prompt(index: int, item: str | tuple[str, dict[str, Any]]) -> None:
+        item_options: ClaudeAgentOptions | CompiledOptions
+        started = time.perf_counter()
+        try:
+            if isinstance(item, tuple):
+                prompt, overrides = item
+                item_options = replace(base_options, **overrides)
+            else:
+                prompt, item_options = item, shared_options()
+
+            async for message in InternalClient().process_query(
+                prompt=prompt, options=item_options
+            ):
+                if isinstance(message, ResultMessage):
+                    stats.total_cost_usd += message.total_cost_usd or 0.0
+                    stats.total_api_duration_ms += message.duration_api_ms
+                await send_stream.send((index, message))
+        except Exception as e:
+            if stopped:
+                # The batch was stopped while the prompt ran
+                return
+            stats.failed += 1
+            stats.errors[index] = e
+            if stop_on_error:
+                failures.append(e)
+                stop()
+        else:
+            stats.completed += 1
+        finally:
+            stats.latencies_ms[index] = (time.perf_counter() - started) * 1000
+
+    async def worker() -> None:
+        # Workers pull from the shared iterator so that prompts are started in
+        # order and only when a slot is free
+        nonlocal workers_running
+        try:
+            for index, item in items:
+                if stopped:
+                    break
+                await run_prompt(index, item)
+        finally:
+            workers_running -= 1
+            if workers_running == 0:
+                send_stream.close()
+
+    def worker_failed(error: Exception) -> None:
+        # A failure outside of a prompt, e.g. of the prompts iterable, ends
+        # the batch whatever stop_on_error
+        failures.append(error)
+        stop()
+
+    # The workers run outside the consumer's task, so that no cancel scope is
+    # left open in it between yields: the consumer may stop iterating at any
+    # point, and the generator may then be closed from another task
+    workers = BackgroundTasks(on_error=worker_failed)
+    try:
+        with receive_stream:
+            for _ in range(concurrency):
+                workers.spawn(worker)
+            async for indexed_message in receive_stream:
+                yield indexed_message
+    finally:
+        stop()
+        await workers.close()
+        if compiles_options and compiled is not None:
+            compiled.close()
+        stats.wall_time_s = time.perf_counter() - batch_started
+
+    if failures:
+        raise failures[0]
@@ -0,0 +1,281 @@
+"""On-disk cache of query() transcripts."""
+
+import dataclasses
+import gzip
+import hashlib
+import json
+import os
+import time
+import uuid
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import anyio
+
+from ._internal.client import InternalClient
+from ._internal.message_parser import parse_message
+from ._internal.structured_output import apply_structured_output, output_json_schema
+from ._internal.transport import Transport
+from ._internal.transport.subprocess_cli import SubprocessCLITransport
+from .types import ClaudeAgentOptions, Message, ResultMessage
+
+_CACHE_FORMAT = 1
+
+# Options that do not change what Claude produces, or that cannot be
+# fingerprinted (callbacks)
+_UNKEYED_OPTIONS = frozenset(
+    {
+        "can_use_tool",
+        "hooks",
+        "stderr",
+        "stderr_events",
+        "stderr_tail_bytes",
+        "debug_stderr",
+        "tool_metrics",
+        "budget",
+        "shutdown",
+        "process_limits",
+        "reconnect",
+        "max_buffer_size",
+        "cli_path",
+    }
+)
+
+# Control protocol messages are not part of the transcript
+_CONTROL_TYPES = frozenset(
+    {"control_request", "control_response", "control_cancel_request"}
+)
+
+
+@dataclass
+class QueryCacheStats:
+    """Counters of a QueryCache."""
+
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    expired: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class _TranscriptTransport(Transport):
+    """Transport passing through to another one and keeping the messages read."""
+
+    def __init__(self, inner: Transport) -> None:
+        self._inner = inner
+        self.messages: list[dict[str, Any]] = []
+
+    async def connect(self) -> None:
+        await self._inner.connect()
+
+    async def write(self, data: str) -> None:
+        await self._inner.write(data)
+
+    async def read_messages(self) -> AsyncIterator[dict[str, Any]]:
+        async for data in self._inner.read_messages():
+            if data.get("type") not in _CONTROL_TYPES:
+                self.messages.append(data)
+            yield data
+
+    async def close(self) -> None:
+        await self._inner.close()
+
+    def is_ready(self) -> bool:
+        return self._inner.is_ready()
+
+    async def end_input(self) -> None:
+        await self._inner.end_input()
+
+
+async def _sdk_server_tools(server: Any) -> list[dict[str, Any]]:
+    """Tool definitions of an SDK MCP server, for fingerprinting."""
+    from mcp.types import ListToolsRequest
+
+    if ListToolsRequest not in server.request_handlers:
+        return []
+    result = await server.request_handlers[ListToolsRequest](
+        ListToolsRequest(method="tools/list")
+    )
+    tools: list[dict[str, Any]] = result.root.model_dump(mode="json")["tools"]
+    return tools
+
+
+class QueryCache:
+    """
+    Cache of complete query() transcripts on local disk.
+
+    A query is identified by its prompt, the options that influence Claude's
+    answer (model, system prompt, tools, MCP servers and their tool
+    definitions, ...) and nothing else. Callbacks such as hooks and
+    can_use_tool are not part of the key. On a hit the stored messages are
+    replayed without starting Claude Code; on a miss the query runs normally
+    and its transcript is stored once it completes successfully.
+
+    Only string prompts are cached; streaming prompts always run. Runs that
+    end in an error, or that the caller stops consuming early, are not
+    stored. Since Claude's answers are not deterministic, only use the cache
+    where a previous answer to the same query is acceptable, e.g. when
+    retrying a partially failed batch.
+
+    Args:
+        directory: Directory holding the cache files, created if needed
+        ttl: Seconds after which an entry expires, or None to keep entries
+            until evicted
+        max_bytes: Maximum total size of the cache files. The least recently
+            used entries are evicted beyond it. None for no limit.
+
+    Example:
+        ```python
+        cache = QueryCache(".claude-cache", ttl=24 * 3600)
+
+        async for message in cache.query(prompt=prompt, options=options):
+            ...
+
+        print(f"hit rate {cache.stats.hit_rate:.0%}")
+        ```
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        ttl: float | None = None,
+        max_bytes: int | None = 256 * 1024 * 1024,
+    ):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stats = QueryCacheStats()
+
+    async def key(self, prompt: str, options: ClaudeAgentOptions) -> str:
+        """Fingerprint of a query, used as its cache key."""
+        fingerprint: dict[str, Any] = {"prompt": prompt}
+        for option in dataclasses.fields(options):
+            if option.name in _UNKEYED_OPTIONS:
+                continue
+            value = getattr(options, option.name)
+            if option.name == "mcp_servers" and isinstance(value, dict):
+                servers: dict[str, Any] = {}
+                for name, config in value.items():
+                    if isinstance(config, dict) and config.get("type") == "sdk":
+                        servers[name] = await _sdk_server_tools(config["instance"])
+                    else:
+                        servers[name] = config
+                value = servers
+            elif option.name == "output_schema" and value is not None:
+                value = output_json_schema(value)
+            fingerprint[option.name] = value
+
+        encoded = json.dumps(fingerprint, sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json.gz"
+
+    def _load(self, key: str) -> list[dict[str, Any]] | None:
+        path = self._path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("format") != _CACHE_FORMAT:
+            return None
+        if self.ttl is not None and time.time() - entry["created"] > self.ttl:
+            self.stats.expired += 1
+            path.unlink(missing_ok=True)
+            return None
+        # The modification time records the last use, for LRU eviction
+        os.utime(path)
+        messages: list[dict[str, Any]] = entry["messages"]
+        return messages
+
+    def _store(self, key: str, messages: list[dict[str, Any]]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        temp_path = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        entry = {"format": _CACHE_FORMAT, "created": time.time(), "messages": messages}
+        with gzip.open(temp_path, "wt", encoding="utf-8") as f:
+            json.dump(entry, f, separators=(",", ":"))
+        temp_path.replace(path)
+        self.stats.stores += 1
+        self._evict()
+
+    def _evict(self) -> None:
+        if self.max_bytes is None:
+            return
+        entries = []
+        total = 0
+        for path in self.directory.glob("*.json.gz"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            self.stats.evictions += 1
+
+    def clear(self) -> None:
+        """Delete all cache entries."""
+        for path in self.directory.glob("*.json.gz"):
+            path.unlink(missing_ok=True)
+
+    async def query(
+        self,
+        *,
+        prompt: str,
+        options: ClaudeAgentOptions | None = None,
+        transport: Transport | None = None,
+    ) -> AsyncIterator[Message]:
+        """
+        Query Claude Code like query(), serving repeated queries from the cache.
+
+        Args:
+            prompt: The prompt to send to Claude
+            options: Optional configuration, see query()
+            transport: Optional transport used on a cache miss, see query()
+
+        Yields:
+            Messages from the conversation, either live or replayed
+        """
+        if options is None:
+            options = ClaudeAgentOptions()
+
+        key = await self.key(prompt, options)
+        cached = await anyio.to_thread.run_sync(self._load, key)
+        if cached is not None:
+            self.stats.hits += 1
+            for data in cached:
+                yield apply_structured_output(
+                    parse_message(data), options.output_schema
+                )
+            return
+
+        self.stats.misses += 1
+        os.environ["CLAUDE_CODE_ENTRYPOINT"] = "sdk-py"
+        recorder = _TranscriptTransport(
+            transport or SubprocessCLITransport(prompt=prompt, options=options)
+        )
+        succeeded = False
+        async for message in InternalClient().process_query(
+            prompt=prompt, options=options, transport=recorder
+        ):
+            if isinstance(message, ResultMessage):
+                succeeded = not message.is_error
+            yield message
+
+        if succeeded:
+            await anyio.to_thread.run_sync(self._store, key, recorder.messages)
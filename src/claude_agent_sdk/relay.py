@@ -0,0 +1,495 @@
+"""Relay hosting Claude Code processes for SocketTransport clients.
+
+Run it with ``python -m claude_agent_sdk.relay --socket PATH``.
+"""
+
+import argparse
+import hmac
+import ipaddress
+import json
+import logging
+import os
+import signal
+import stat
+import tempfile
+from collections import deque
+from contextlib import AsyncExitStack, suppress
+from dataclasses import dataclass
+from pathlib import Path
+from subprocess import PIPE
+from typing import Any
+
+import anyio
+import anyio.abc
+from anyio.abc import Process
+from anyio.streams.buffered import BufferedByteReceiveStream
+from anyio.streams.text import TextReceiveStream
+
+from ._internal.stderr import StderrTail
+from ._internal.transport.socket_transport import (
+    _MAX_CONTROL_LINE,
+    _RELAY_PROTOCOL,
+    _RELAY_VERSION,
+    RELAY_TOKEN_ENV,
+    RelayAddress,
+)
+from ._internal.transport.subprocess_cli import (
+    SubprocessCLITransport,
+    _apply_process_limits,
+    _option_args,
+    _process_env,
+    _prompt_args,
+    _stop_process,
+)
+from .types import ClaudeAgentOptions
+
+logger = logging.getLogger(__name__)
+
+# Seconds a client has to send its session request after connecting
+_REQUEST_TIMEOUT = 10.0
+
+
+@dataclass
+class RelayStats:
+    """Sessions served by a RelayServer."""
+
+    sessions: int = 0
+    active: int = 0
+    # Sessions given a process started ahead of time, and started on demand
+    warm_starts: int = 0
+    cold_starts: int = 0
+    rejected: int = 0
+
+
+@dataclass(frozen=True)
+class _SessionSpec:
+    """What a Claude Code process is started with."""
+
+    args: tuple[str, ...]
+    cwd: str | None
+    env: tuple[tuple[str, str], ...]
+
+
+class RelayServer:
+    """
+    Hosts Claude Code processes for SDK clients connecting over a socket.
+
+    Each connection of a SocketTransport is a session: the relay starts a
+    Claude Code process with the CLI arguments, working directory and
+    environment the client asks for, then relays the connection to the
+    process's stdin and stdout until either ends. Processes are stopped when
+    their connection closes, using the options' shutdown policy.
+
+    Up to ``warm`` processes are kept started ahead of time with the
+    relay's own options, in streaming mode. A session asking for exactly
+    these is given one at once, and another is started in its place, so
+    workers sharing the relay do not wait for Claude Code to start.
+
+    Only the options' cli_path, env, cwd, process_limits and shutdown are
+    used by the relay itself. Clients run any CLI arguments as the relay's
+    user: Unix domain sockets are created accessible to that user only, and
+    TCP is only served on a loopback address, requiring a token. Sessions
+    run in the client's working directory unless it asks for another.
+
+    Args:
+        options: Options of the warm processes, and of the relay
+        warm: Number of processes to keep started ahead of time
+        max_sessions: Number of sessions served at once, further connections
+            waiting for one to end; None for no limit
+        token: Token clients must present, defaulting to the
+            CLAUDE_AGENT_RELAY_TOKEN environment variable
+
+    Example:
+        ```python
+        relay = RelayServer(ClaudeAgentOptions(model="claude-sonnet-4-5"), warm=4)
+        await relay.serve("/run/claude/relay.sock")
+        ```
+    """
+
+    def __init__(
+        self,
+        options: ClaudeAgentOptions | None = None,
+        warm: int = 0,
+        max_sessions: int | None = None,
+        token: str | None = None,
+    ):
+        self._options = options or ClaudeAgentOptions()
+        self._cli_path = (
+            str(self._options.cli_path)
+            if self._options.cli_path is not None
+            else SubprocessCLITransport._find_cli()
+        )
+        self._token = token if token is not None else os.environ.get(RELAY_TOKEN_ENV)
+        self._warm_size = warm
+        self._warm_spec = _SessionSpec(
+            args=(*_option_args(self._options), *_prompt_args(None)),
+            cwd=str(self._options.cwd or Path.cwd()),
+            env=tuple(sorted(self._options.env.items())),
+        )
+        self._warm: deque[Process] = deque()
+        self._warm_pending = 0
+        self._limiter = (
+            anyio.CapacityLimiter(max_sessions) if max_sessions is not None else None
+        )
+        self._tg: anyio.abc.TaskGroup | None = None
+        self.stats = RelayStats()
+
+    async def serve(self, address: RelayAddress) -> None:
+        """Accept sessions at the address until cancelled.
+
+        Args:
+            address: Path of a Unix domain socket to create, or (host, port)
+                of a loopback address to listen on over TCP
+
+        Raises:
+            ValueError: If serving over TCP without a token or on an address
+                other than a loopback one
+            OSError: If another relay is serving at the socket path
+        """
+        listener = await self._listen(address)
+        try:
+            async with listener, anyio.create_task_group() as tg:
+                self._tg = tg
+                self._refill()
+                await listener.serve(self._serve_connection, task_group=tg)
+        finally:
+            self._tg = None
+            with anyio.CancelScope(shield=True):
+                while self._warm:
+                    await self._stop(self._warm.popleft())
+                if not isinstance(address, tuple):
+                    with suppress(OSError):
+                        Path(address).unlink()
+
+    async def _listen(self, address: RelayAddress) -> anyio.abc.Listener[Any]:
+        if isinstance(address, tuple):
+            # Requests are not encrypted and run commands, so they must not
+            # leave the host
+            if not self._token:
+                raise ValueError("A token is required to serve over TCP")
+            host, port = address
+            if not _is_loopback(host):
+                raise ValueError(
+                    f"The relay only serves over TCP on a loopback address, not {host}"
+                )
+            return await anyio.create_tcp_listener(local_host=host, local_port=port)
+
+        path = Path(address)
+        with suppress(FileNotFoundError):
+            if not stat.S_ISSOCK(path.lstat().st_mode):
+                raise FileExistsError(f"{path} exists and is not a socket")
+            if await _is_listening(path):
+                raise OSError(f"Another relay is serving at {path}")
+
+        # Bind in a directory private to the user, where the socket can be
+        # made private before it is moved into place, replacing the socket
+        # of a relay that did not exit cleanly
+        private_dir = Path(tempfile.mkdtemp(prefix=".relay-", dir=path.parent))
+        try:
+            listener = await anyio.create_unix_listener(private_dir / "socket")
+            try:
+                (private_dir / "socket").chmod(0o600)
+                (private_dir / "socket").replace(path)
+            except BaseException:
+                await listener.aclose()
+                raise
+        finally:
+            with suppress(OSError):
+                (private_dir / "socket").unlink()
+            with suppress(OSError):
+                private_dir.rmdir()
+        return listener
+
+    async def _spawn(self, spec: _SessionSpec) -> Process:
+        limits = self._options.process_limits
+        process = await anyio.open_process(
+            [self._cli_path, *spec.args],
+            stdin=PIPE,
+            stdout=PIPE,
+            stderr=PIPE,
+            cwd=spec.cwd,
+            env=_process_env(dict(spec.env), spec.cwd, limits),
+        )
+        if limits:
+            _apply_process_limits(process.pid, limits)
+        return process
+
+    async def _stop(self, process: Process) -> None:
+        if process.stdin:
+            with suppress(Exception):
+                await process.stdin.aclose()
+        await _stop_process(process, self._options.shutdown)
+
+    def _refill(self) -> None:
+        """Start warm processes in place of those handed over."""
+        if self._tg is None:
+            return
+        missing = self._warm_size - len(self._warm) - self._warm_pending
+        for _ in range(max(missing, 0)):
+            self._warm_pending += 1
+            self._tg.start_soon(self._start_warm)
+
+    async def _start_warm(self) -> None:
+        try:
+            process = await self._spawn(self._warm_spec)
+        except Exception as e:
+            logger.warning(f"Failed to start a warm Claude Code process: {e}")
+            return
+        finally:
+            self._warm_pending -= 1
+        self._warm.append(process)
+
+    async def _take_process(self, spec: _SessionSpec) -> tuple[Process, bool]:
+        if spec == self._warm_spec:
+            while self._warm:
+                process = self._warm.popleft()
+                self._refill()
+                if process.returncode is None:
+                    return process, True
+                await self._stop(process)
+        return await self._spawn(spec), False
+
+    def _session_spec(self, request: Any) -> _SessionSpec:
+        if not isinstance(request, dict) or request.get("type") != "relay_session":
+            raise ValueError("Expected a session request")
+        if (
+            request.get("protocol") != _RELAY_PROTOCOL
+            or request.get("version") != _RELAY_VERSION
+        ):
+            raise ValueError(
+                f"Unsupported protocol {request.get('protocol')} "
+                f"version {request.get('version')}"
+            )
+        if self._token and not hmac.compare_digest(
+            str(request.get("token") or ""), self._token
+        ):
+            raise ValueError("Invalid token")
+        args = request.get("args")
+        if not isinstance(args, list) or not all(isinstance(a, str) for a in args):
+            raise ValueError("Invalid CLI arguments")
+        env = request.get("env") or {}
+        return _SessionSpec(
+            args=tuple(args),
+            cwd=request.get("cwd"),
+            env=tuple(sorted((str(k), str(v)) for k, v in env.items())),
+        )
+
+    async def _serve_connection(self, stream: anyio.abc.SocketStream) -> None:
+        async with AsyncExitStack() as stack:
+            await stack.enter_async_context(stream)
+            receive = BufferedByteReceiveStream(stream)
+            try:
+                with anyio.fail_after(_REQUEST_TIMEOUT):
+                    request = json.loads(
+                        await receive.receive_until(b"\n", _MAX_CONTROL_LINE)
+                    )
+                spec = self._session_spec(request)
+            except Exception as e:
+                self.stats.rejected += 1
+                logger.info(f"Rejected relay session: {e}")
+                await _send_line(stream, {"type": "relay_error", "message": str(e)})
+                return
+
+            if self._limiter is not None:
+                await stack.enter_async_context(self._limiter)
+            try:
+                process, warm = await self._take_process(spec)
+            except Exception as e:
+                self.stats.rejected += 1
+                logger.warning(f"Failed to start Claude Code: {e}")
+                await _send_line(
+                    stream,
+                    {
+                        "type": "relay_error",
+                        "message": f"Failed to start Claude Code: {e}",
+                    },
+                )
+                return
+
+            self.stats.sessions += 1
+            self.stats.active += 1
+            if warm:
+                self.stats.warm_starts += 1
+            else:
+                self.stats.cold_starts += 1
+            try:
+                await self._relay(stream, receive, process, warm)
+            finally:
+                self.stats.active -= 1
+                with anyio.CancelScope(shield=True):
+                    await self._stop(process)
+
+    async def _relay(
+        self,
+        stream: anyio.abc.SocketStream,
+        receive: BufferedByteReceiveStream,
+        process: Process,
+        warm: bool,
+    ) -> None:
+        """Relay a connection to a process until the process ends its output."""
+        if not await _send_line(
+            stream, {"type": "relay_ready", "pid": process.pid, "warm": warm}
+        ):
+            return
+
+        tail = StderrTail(self._options.stderr_tail_bytes)
+        stderr_done = anyio.Event()
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(_relay_input, receive, process)
+            tg.start_soon(_read_stderr, process, tail, stderr_done)
+
+            if await _relay_output(process, stream):
+                returncode = await process.wait()
+                with anyio.move_on_after(1):
+                    await stderr_done.wait()
+                await _send_line(
+                    stream,
+                    {
+                        "type": "relay_exit",
+                        "exit_code": returncode,
+                        "stderr": tail.text(),
+                    },
+                )
+            tg.cancel_scope.cancel()
+
+
+async def _send_line(stream: anyio.abc.SocketStream, message: dict[str, Any]) -> bool:
+    """Send a message of the relay protocol, returning whether it was sent."""
+    try:
+        await stream.send((json.dumps(message) + "\n").encode())
+        return True
+    except (anyio.BrokenResourceError, anyio.ClosedResourceError, OSError):
+        return False
+
+
+async def _relay_input(receive: BufferedByteReceiveStream, process: Process) -> None:
+    """Pass the client's input to the process until either end closes."""
+    assert process.stdin is not None
+    try:
+        while True:
+            await process.stdin.send(await receive.receive())
+    except (
+        anyio.EndOfStream,
+        anyio.BrokenResourceError,
+        anyio.ClosedResourceError,
+        OSError,
+    ):
+        pass
+    finally:
+        with suppress(Exception):
+            await process.stdin.aclose()
+
+
+async def _relay_output(process: Process, stream: anyio.abc.SocketStream) -> bool:
+    """Pass the process's output to the client, returning whether it all was."""
+    assert process.stdout is not None
+    ends_line = True
+    try:
+        async for chunk in process.stdout:
+            await stream.send(chunk)
+            ends_line = chunk.endswith(b"\n")
+        if not ends_line:
+            await stream.send(b"\n")
+    except (anyio.BrokenResourceError, anyio.ClosedResourceError, OSError):
+        return False
+    return True
+
+
+async def _read_stderr(process: Process, tail: StderrTail, done: anyio.Event) -> None:
+    """Keep the end of the process's stderr."""
+    assert process.stderr is not None
+    try:
+        async for text in TextReceiveStream(process.stderr):
+            for line in text.splitlines():
+                line = line.rstrip()
+                if line:
+                    tail.append(line)
+    except Exception as e:
+        logger.debug(f"Stopped reading stderr: {e}")
+    finally:
+        done.set()
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+async def _is_listening(path: Path) -> bool:
+    """Whether a process accepts connections at a Unix domain socket."""
+    try:
+        stream = await anyio.connect_unix(path)
+    except OSError:
+        return False
+    await stream.aclose()
+    return True
+
+
+def _parse_tcp_address(value: str) -> tuple[str, int]:
+    host, _, port = value.rpartition(":")
+    if not host or not port.isdigit():
+        raise argparse.ArgumentTypeError(f"expected HOST:PORT, got {value!r}")
+    return host, int(port)
+
+
+async def _serve_until_signalled(relay: RelayServer, address: RelayAddress) -> None:
+    """Serve until SIGINT or SIGTERM, then stop the processes and exit."""
+    # Signals stay caught until the processes are stopped, so that a repeated
+    # signal does not interrupt stopping them
+    with anyio.open_signal_receiver(signal.SIGINT, signal.SIGTERM) as signals:
+        async with anyio.create_task_group() as tg:
+
+            async def stop_on_signal() -> None:
+                async for signum in signals:
+                    logger.info(f"Stopping on signal {signum}")
+                    tg.cancel_scope.cancel()
+                    return
+
+            tg.start_soon(stop_on_signal)
+            await relay.serve(address)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run a relay from the command line."""
+    parser = argparse.ArgumentParser(
+        prog="python -m claude_agent_sdk.relay",
+        description="Host Claude Code processes for SocketTransport clients.",
+    )
+    address = parser.add_mutually_exclusive_group(required=True)
+    address.add_argument("--socket", help="path of the Unix domain socket to create")
+    address.add_argument(
+        "--tcp",
+        type=_parse_tcp_address,
+        metavar="HOST:PORT",
+        help=f"loopback address to listen on over TCP, requiring ${RELAY_TOKEN_ENV}",
+    )
+    parser.add_argument("--cli-path", help="path of the Claude Code CLI")
+    parser.add_argument(
+        "--warm",
+        type=int,
+        default=0,
+        help="number of processes with default options to keep started",
+    )
+    parser.add_argument(
+        "--max-sessions", type=int, help="number of sessions served at once"
+    )
+    parser.add_argument("--log-level", default="INFO", help="logging level")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=args.log_level.upper(), format="%(asctime)s %(levelname)s %(message)s"
+    )
+    relay = RelayServer(
+        ClaudeAgentOptions(cli_path=args.cli_path),
+        warm=args.warm,
+        max_sessions=args.max_sessions,
+    )
+    anyio.run(_serve_until_signalled, relay, args.tcp or args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Primed sessions forked for each task."""
+
+from collections.abc import AsyncGenerator, AsyncIterator, Iterable
+from contextlib import aclosing
+from dataclasses import replace
+from typing import Any
+
+import anyio
+
+from ._errors import ClaudeSDKError
+from .client import ClaudeSDKClient
+from .query import query, query_many
+from .types import ClaudeAgentOptions, Message, QueryBatchStats, ResultMessage
+
+
+class SessionTemplate:
+    """
+    A session primed once with shared context, then forked for each task.
+
+    The priming prompt (e.g. a large document all tasks refer to) is sent in a
+    base session the first time the template is used. Each task then resumes
+    that session with ``fork_session``, starting from the primed conversation
+    under a new session ID. The shared context is not sent again, forks do not
+    affect each other or the base session, and the identical prefix lets
+    Claude reuse its prompt cache.
+
+    Priming happens once even if many forks are started concurrently.
+
+    Args:
+        prime_prompt: Prompt establishing the shared context
+        options: Options of the base session, inherited by every fork
+
+    Example:
+        ```python
+        template = SessionTemplate(
+            f"Here is the course catalog, answer questions about it:\\n{catalog}",
+            ClaudeAgentOptions(system_prompt="You enrich golf course contacts."),
+        )
+
+        async for index, message in template.query_many(
+            [f"Enrich the contact {name}" for name in contacts]
+        ):
+            ...
+        ```
+    """
+
+    def __init__(self, prime_prompt: str, options: ClaudeAgentOptions | None = None):
+        self.prime_prompt = prime_prompt
+        self.options = options or ClaudeAgentOptions()
+        # ResultMessage of the priming turn, set once primed
+        self.prime_result: ResultMessage | None = None
+        self._prime_lock = anyio.Lock()
+
+    @property
+    def session_id(self) -> str | None:
+        """ID of the primed base session, None until primed."""
+        return self.prime_result.session_id if self.prime_result else None
+
+    async def prime(self) -> str:
+        """
+        Create the base session if not done yet.
+
+        Returns:
+            The ID of the base session
+
+        Raises:
+            ClaudeSDKError: If the priming turn failed
+        """
+        async with self._prime_lock:
+            if self.prime_result is None:
+                result: ResultMessage | None = None
+                async for message in query(
+                    prompt=self.prime_prompt, options=self.options
+                ):
+                    if isinstance(message, ResultMessage):
+                        result = message
+                if result is None or result.is_error:
+                    detail = result.result if result else "no result received"
+                    raise ClaudeSDKError(f"Priming the session failed: {detail}")
+                self.prime_result = result
+            return self.prime_result.session_id
+
+    def fork_options(self, **overrides: Any) -> ClaudeAgentOptions:
+        """
+        Options for a new fork of the primed session.
+
+        Args:
+            **overrides: ClaudeAgentOptions fields to change for this fork
+
+        Raises:
+            ClaudeSDKError: If the template has not been primed yet
+        """
+        if self.session_id is None:
+            raise ClaudeSDKError("Session template is not primed. Call prime() first.")
+        return replace(
+            self.options,
+            **{
+                **overrides,
+                "resume": self.session_id,
+                "fork_session": True,
+                "continue_conversation": False,
+            },
+        )
+
+    async def query(self, prompt: str, **overrides: Any) -> AsyncIterator[Message]:
+        """
+        Run a prompt in a new fork of the primed session, like query().
+
+        Args:
+            prompt: The prompt to send
+            **overrides: ClaudeAgentOptions fields to change for this fork
+
+        Yields:
+            Messages from the conversation
+        """
+        await self.prime()
+        async for message in query(
+            prompt=prompt, options=self.fork_options(**overrides)
+        ):
+            yield message
+
+    async def query_many(
+        self,
+        prompts: Iterable[str | tuple[str, dict[str, Any]]],
+        concurrency: int = 4,
+        stats: QueryBatchStats | None = None,
+        stop_on_error: bool = True,
+    ) -> AsyncGenerator[tuple[int, Message], None]:
+        """
+        Run many prompts, each in its own fork of the primed session.
+
+        See query_many() for the arguments and the yielded values. Closing
+        this generator closes the batch's, cancelling the running prompts.
+        """
+        await self.prime()
+        async with aclosing(
+            query_many(
+                prompts=prompts,
+                options=self.fork_options(),
+                concurrency=concurrency,
+                stats=stats,
+                stop_on_error=stop_on_error,
+            )
+        ) as indexed_messages:
+            async for indexed_message in indexed_messages:
+                yield indexed_message
+
+    async def client(self, **overrides: Any) -> ClaudeSDKClient:
+        """
+        Create an unconnected ClaudeSDKClient for a new fork of the session.
+
+        Args:
+            **overrides: ClaudeAgentOptions fields to change for this fork
+
+        Example:
+            ```python
+            async with await template.client() as client:
+                await client.query("Enrich the contact Jane Doe")
+                ...
+            ```
+        """
+        await self.prime()
+        return ClaudeSDKClient(self.fork_options(**overrides))
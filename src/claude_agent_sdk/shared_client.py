@@ -0,0 +1,169 @@
+"""Claude SDK Client that can be shared by concurrent tasks."""
+
+from collections.abc import AsyncIterator, Callable
+from typing import Any
+
+import anyio
+from anyio.streams.memory import MemoryObjectReceiveStream
+
+from ._internal.hosted_session import HostedSession, TurnItem, raise_errors
+from ._internal.tool_metrics import ToolCallMetrics
+from ._internal.transport import Transport
+from .client import ClaudeSDKClient
+from .types import ClaudeAgentOptions, Message
+
+
+class SharedClaudeSDKClient:
+    """
+    Connected Claude session that can be used from many tasks at once.
+
+    ClaudeSDKClient is bound to the event loop that connected it, and turns
+    started from several tasks at once interleave on its session. This client
+    instead hosts a ClaudeSDKClient on an event loop running in a
+    background thread, where a single long-lived task connects and later
+    disconnects it. Its methods can be called from any task, task group,
+    event loop or runtime, e.g. from concurrent request handlers of a web
+    application sharing one Claude Code process.
+
+    Each ask() or stream() call is a turn: the prompt is sent and the
+    messages up to and including its ResultMessage are routed back to that
+    caller only. Turns run one at a time in the order they were submitted,
+    since they share the same Claude Code session and conversation history.
+    A caller that stops reading a stream early does not disturb later turns;
+    the remainder of its response is read and discarded.
+
+    Hooks, can_use_tool callbacks and SDK MCP tools configured in the options
+    run on the background loop, so they must not call back into this client.
+
+    Example:
+        ```python
+        client = SharedClaudeSDKClient(options)
+
+        @asynccontextmanager
+        async def lifespan(app: FastAPI):
+            async with client:
+                yield
+
+        @app.post("/ask")
+        async def ask(question: str) -> str:
+            messages = await client.ask(question)
+            result = messages[-1]
+            assert isinstance(result, ResultMessage)
+            return result.result or ""
+        ```
+    """
+
+    def __init__(
+        self,
+        options: ClaudeAgentOptions | None = None,
+        transport: Transport | None = None,
+        backend: str = "asyncio",
+    ):
+        """Initialize the shared client.
+
+        Args:
+            options: Options of the Claude session
+            transport: Optional custom transport
+            backend: anyio backend of the background event loop
+        """
+        self._session = HostedSession(ClaudeSDKClient(options, transport), backend)
+
+    @property
+    def options(self) -> ClaudeAgentOptions:
+        return self._session.client.options
+
+    @property
+    def tool_metrics(self) -> ToolCallMetrics:
+        """Statistics of SDK MCP tool calls made during this client's session."""
+        return self._session.client.tool_metrics
+
+    @property
+    def connected(self) -> bool:
+        return self._session.connected
+
+    async def _call(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a coroutine function on the background loop from any context."""
+        return await self._session.call_async(func, *args)
+
+    async def connect(self) -> None:
+        """Start the background loop and connect to Claude."""
+        await anyio.to_thread.run_sync(self._session.start)
+
+    async def disconnect(self) -> None:
+        """Disconnect from Claude and stop the background loop.
+
+        Turns still running or waiting are cancelled.
+        """
+        with anyio.CancelScope(shield=True):
+            await anyio.to_thread.run_sync(self._session.stop)
+
+    async def ask(self, prompt: str, session_id: str = "default") -> list[Message]:
+        """
+        Send a prompt and return the messages of its response.
+
+        Waits for the turns submitted before it to complete first. No worker
+        thread is held while waiting, so any number of calls can be pending.
+        Cancelling a call whose turn has not started yet withdraws the turn;
+        once started, the turn runs to completion and the rest of its
+        response is discarded (call interrupt() to stop it).
+
+        Args:
+            prompt: The message to send
+            session_id: Session identifier for the conversation
+
+        Returns:
+            The response messages, ending with a ResultMessage
+
+        Raises:
+            ProcessError: If Claude Code died during the turn
+        """
+        return [message async for message in self.stream(prompt, session_id)]
+
+    async def stream(
+        self, prompt: str, session_id: str = "default"
+    ) -> AsyncIterator[Message]:
+        """
+        Send a prompt and yield the messages of its response as they arrive.
+
+        Iteration ends after the ResultMessage. Breaking out early is safe.
+        Cancellation behaves as for ask(). If the turn fails, e.g. as Claude
+        Code died, its error is raised after the messages received before.
+
+        Args:
+            prompt: The message to send
+            session_id: Session identifier for the conversation
+
+        Yields:
+            Message: Each message of the response
+        """
+        receive: MemoryObjectReceiveStream[TurnItem] = await self._session.call_async(
+            self._session.open_turn,
+            prompt,
+            session_id,
+            abandon=self._session.close_stream,
+        )
+        try:
+            while items := await self._call(self._session.next_messages, receive):
+                for message in raise_errors(items):
+                    yield message
+        finally:
+            self._session.close_stream(receive)
+
+    async def interrupt(self) -> None:
+        """Interrupt the turn currently running."""
+        await self._call(self._session.client.interrupt)
+
+    async def get_server_info(self) -> dict[str, Any] | None:
+        """Get server initialization info, see ClaudeSDKClient.get_server_info()."""
+        info: dict[str, Any] | None = await self._call(
+            self._session.client.get_server_info
+        )
+        return info
+
+    async def __aenter__(self) -> "SharedClaudeSDKClient":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> bool:
+        await self.disconnect()
+        return False
@@ -0,0 +1,131 @@
+"""Blocking Claude SDK Client for synchronous code."""
+
+from collections.abc import Iterator
+from typing import Any
+
+from ._internal.hosted_session import HostedSession, raise_errors
+from ._internal.tool_metrics import ToolCallMetrics
+from ._internal.transport import Transport
+from .client import ClaudeSDKClient
+from .types import ClaudeAgentOptions, Message
+
+
+class SyncClaudeClient:
+    """
+    Blocking client for using a Claude session from synchronous code.
+
+    The session runs on an event loop in a background thread owned by the
+    client, so calls do not create an event loop each time and the Claude
+    Code process stays warm between calls. Methods can be called concurrently
+    from any number of threads, e.g. by the workers of a thread pool sharing
+    one client: each query() or stream() call gets the messages of its own
+    response, and turns run one at a time in the order they were submitted
+    since they share one conversation.
+
+    Example:
+        ```python
+        with SyncClaudeClient(options) as client:
+            messages = client.query("What's the capital of France?")
+
+            for message in client.stream("And of Germany?"):
+                print(message)
+        ```
+    """
+
+    def __init__(
+        self,
+        options: ClaudeAgentOptions | None = None,
+        transport: Transport | None = None,
+        backend: str = "asyncio",
+    ):
+        """Initialize the client.
+
+        Args:
+            options: Options of the Claude session
+            transport: Optional custom transport
+            backend: anyio backend of the background event loop
+        """
+        self._session = HostedSession(ClaudeSDKClient(options, transport), backend)
+
+    @property
+    def options(self) -> ClaudeAgentOptions:
+        return self._session.client.options
+
+    @property
+    def tool_metrics(self) -> ToolCallMetrics:
+        """Statistics of SDK MCP tool calls made during this client's session."""
+        return self._session.client.tool_metrics
+
+    @property
+    def connected(self) -> bool:
+        return self._session.connected
+
+    def connect(self) -> None:
+        """Start the background loop and connect to Claude."""
+        self._session.start()
+
+    def disconnect(self) -> None:
+        """Disconnect from Claude and stop the background loop.
+
+        Turns still running or waiting are cancelled.
+        """
+        self._session.stop()
+
+    def query(self, prompt: str, session_id: str = "default") -> list[Message]:
+        """
+        Send a prompt and wait for the messages of its response.
+
+        Args:
+            prompt: The message to send
+            session_id: Session identifier for the conversation
+
+        Returns:
+            The response messages, ending with a ResultMessage
+
+        Raises:
+            ProcessError: If Claude Code died during the turn
+        """
+        messages: list[Message] = self._session.call(
+            self._session.collect_turn, prompt, session_id
+        )
+        return messages
+
+    def stream(self, prompt: str, session_id: str = "default") -> Iterator[Message]:
+        """
+        Send a prompt and yield the messages of its response as they arrive.
+
+        Iteration ends after the ResultMessage. Stopping early is safe. If
+        the turn fails, e.g. as Claude Code died, its error is raised after
+        the messages received before.
+
+        Args:
+            prompt: The message to send
+            session_id: Session identifier for the conversation
+
+        Yields:
+            Message: Each message of the response
+        """
+        receive = self._session.call(self._session.open_turn, prompt, session_id)
+        try:
+            while items := self._session.call(self._session.next_messages, receive):
+                yield from raise_errors(items)
+        finally:
+            self._session.close_stream(receive)
+
+    def interrupt(self) -> None:
+        """Interrupt the turn currently running."""
+        self._session.call(self._session.client.interrupt)
+
+    def get_server_info(self) -> dict[str, Any] | None:
+        """Get server initialization info, see ClaudeSDKClient.get_server_info()."""
+        info: dict[str, Any] | None = self._session.call(
+            self._session.client.get_server_info
+        )
+        return info
+
+    def __enter__(self) -> "SyncClaudeClient":
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        self.disconnect()
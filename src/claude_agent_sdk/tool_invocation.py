@@ -0,0 +1,266 @@
+"""Direct invocation of SDK MCP tools, without a model turn."""
+
+import re
+import uuid
+from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack, asynccontextmanager
+from pathlib import Path
+from typing import Any
+
+from .types import (
+    ClaudeAgentOptions,
+    HookEvent,
+    HookInput,
+    PermissionResultAllow,
+    PermissionResultDeny,
+    ToolInvocationResult,
+    ToolPermissionContext,
+)
+
+
+def _matches(matcher: str | None, tool_name: str) -> bool:
+    """Whether a hook matcher applies to a tool, following Claude Code's rules."""
+    if not matcher or matcher == "*":
+        return True
+    try:
+        return re.fullmatch(matcher, tool_name) is not None
+    except re.error:
+        return matcher == tool_name
+
+
+async def _run_hooks(
+    options: ClaudeAgentOptions,
+    event: HookEvent,
+    hook_input: dict[str, Any],
+    tool_use_id: str,
+) -> list[dict[str, Any]]:
+    outputs: list[dict[str, Any]] = []
+    for matcher in (options.hooks or {}).get(event, []):
+        if not _matches(matcher.matcher, hook_input["tool_name"]):
+            continue
+        for callback in matcher.hooks:
+            typed_input: HookInput = hook_input  # type: ignore[assignment]
+            output = await callback(typed_input, tool_use_id, {"signal": None})
+            outputs.append(dict(output))
+    return outputs
+
+
+def _sdk_servers(options: ClaudeAgentOptions) -> dict[str, Any]:
+    """The MCP server instances of the SDK MCP servers in the options."""
+    if not isinstance(options.mcp_servers, dict):
+        return {}
+    return {
+        name: config["instance"]  # type: ignore[typeddict-item]
+        for name, config in options.mcp_servers.items()
+        if isinstance(config, dict) and config.get("type") == "sdk"
+    }
+
+
+@asynccontextmanager
+async def tool_session(options: ClaudeAgentOptions) -> AsyncIterator[None]:
+    """
+    Keep the shared contexts of the options' SDK MCP servers active.
+
+    invoke_tool() activates the context of the tool's server (see
+    create_sdk_mcp_server()) for the call and releases it afterwards, unless
+    it is active already. Outside of a session, a pooled resource such as an
+    HTTP client is thus created and closed on every call. Calls made within
+    the session, or while a ClaudeSDKClient using the same servers is
+    connected, share one activation of each context.
+
+    Args:
+        options: Options providing the SDK MCP servers
+
+    Example:
+        ```python
+        async with tool_session(options):
+            for domain in domains:
+                await invoke_tool("mcp__hunter__find_email", {"domain": domain}, options)
+        ```
+    """
+    async with AsyncExitStack() as stack:
+        for server in _sdk_servers(options).values():
+            await stack.enter_async_context(server.lifespan(server))
+        yield
+
+
+async def invoke_tool(
+    tool_name: str,
+    arguments: dict[str, Any],
+    options: ClaudeAgentOptions | None = None,
+    session_id: str = "",
+) -> ToolInvocationResult:
+    """
+    Call an SDK MCP tool directly, without Claude.
+
+    Intended for deterministic workflow steps that would otherwise need a
+    model turn just to call one tool. No Claude Code process is started and
+    no tokens are spent. The call goes through the same checks as a call made
+    by Claude, in the same order:
+
+    1. Tools listed in ``options.disallowed_tools`` are denied.
+    2. Matching ``PreToolUse`` hooks run. They may deny or allow the call,
+       or replace its arguments.
+    3. ``options.can_use_tool`` is asked for permission, unless a hook allowed
+       the call, the tool is in ``options.allowed_tools``, or the permission
+       mode is ``bypassPermissions``. It may also replace the arguments.
+    4. The tool runs in its server, with argument validation, shared context,
+       executors and ``options.tool_metrics`` applied as usual.
+    5. Matching ``PostToolUse`` hooks run with the tool's response.
+
+    Make repeated calls within tool_session() so that the server's shared
+    context is created once rather than for each call.
+
+    Args:
+        tool_name: Name of the tool as Claude sees it, ``mcp__<server>__<tool>``,
+            where ``<server>`` is the key of an SDK MCP server in
+            ``options.mcp_servers``
+        arguments: Arguments of the call
+        options: Options providing the MCP servers, hooks and permission settings
+        session_id: Session ID reported to hooks
+
+    Returns:
+        ToolInvocationResult with the tool's content, or with ``denied`` set
+        if a hook or the permission callback prevented the call
+
+    Raises:
+        ValueError: If the name does not refer to a configured SDK MCP server
+
+    Example:
+        ```python
+        result = await invoke_tool(
+            "mcp__hunter__find_email", {"domain": "acme.com"}, options
+        )
+        if result.denied or result.is_error:
+            ...  # Fall back to asking Claude
+        else:
+            data = json.loads(result.text)
+        ```
+    """
+    from mcp.types import CallToolRequest, CallToolRequestParams
+
+    if options is None:
+        options = ClaudeAgentOptions()
+
+    prefix, _, qualified = tool_name.partition("__")
+    server_name, _, name = qualified.partition("__")
+    server = _sdk_servers(options).get(server_name)
+    if prefix != "mcp" or not name or server is None:
+        raise ValueError(
+            f"'{tool_name}' is not a tool of an SDK MCP server in options.mcp_servers"
+        )
+
+    result = ToolInvocationResult(tool_name=tool_name, arguments=dict(arguments))
+    if tool_name in options.disallowed_tools:
+        result.denied = True
+        result.deny_reason = f"{tool_name} is disallowed"
+        return result
+
+    tool_use_id = f"toolu_direct_{uuid.uuid4().hex}"
+    base_input: dict[str, Any] = {
+        "session_id": session_id,
+        "transcript_path": "",
+        "cwd": str(options.cwd or Path.cwd()),
+    }
+    if options.permission_mode is not None:
+        base_input["permission_mode"] = options.permission_mode
+
+    # PreToolUse hooks
+    allowed = (
+        tool_name in options.allowed_tools
+        or options.permission_mode == "bypassPermissions"
+    )
+    pre_outputs = await _run_hooks(
+        options,
+        "PreToolUse",
+        {
+            **base_input,
+            "hook_event_name": "PreToolUse",
+            "tool_name": tool_name,
+            "tool_input": result.arguments,
+        },
+        tool_use_id,
+    )
+    for output in pre_outputs:
+        specific: dict[str, Any] = output.get("hookSpecificOutput") or {}
+        if specific.get("updatedInput") is not None:
+            result.arguments = specific["updatedInput"]
+        decision = specific.get("permissionDecision")
+        if (
+            decision == "deny"
+            or output.get("decision") == "block"
+            or output.get("continue_") is False
+        ):
+            result.denied = True
+            result.deny_reason = (
+                specific.get("permissionDecisionReason")
+                or output.get("reason")
+                or output.get("stopReason")
+                or "Blocked by PreToolUse hook"
+            )
+            return result
+        if decision == "allow":
+            allowed = True
+
+    # Permission callback
+    if not allowed and options.can_use_tool is not None:
+        permission = await options.can_use_tool(
+            tool_name, result.arguments, ToolPermissionContext()
+        )
+        if isinstance(permission, PermissionResultDeny):
+            result.denied = True
+            result.deny_reason = permission.message
+            return result
+        if not isinstance(permission, PermissionResultAllow):
+            raise TypeError(
+                f"Tool permission callback must return PermissionResult (PermissionResultAllow or PermissionResultDeny), got {type(permission)}"
+            )
+        if permission.updated_input is not None:
+            result.arguments = permission.updated_input
+
+    # The call itself, with the server's shared context activated around it
+    # unless a session or client holds it active already
+    request = CallToolRequest(
+        method="tools/call",
+        params=CallToolRequestParams(name=name, arguments=result.arguments),
+    )
+
+    async def dispatch() -> dict[str, Any]:
+        async with server.lifespan(server):
+            response = await server.request_handlers[CallToolRequest](request)
+        return {
+            "jsonrpc": "2.0",
+            "result": response.root.model_dump(
+                by_alias=True, mode="json", exclude_none=True
+            ),
+        }
+
+    if options.tool_metrics is not None:
+        response = await options.tool_metrics.observe(
+            tool_name, result.arguments, tool_use_id, dispatch
+        )
+    else:
+        response = await dispatch()
+    call_result = response["result"]
+    result.content = call_result.get("content", [])
+    result.is_error = bool(call_result.get("isError"))
+
+    # PostToolUse hooks
+    post_outputs = await _run_hooks(
+        options,
+        "PostToolUse",
+        {
+            **base_input,
+            "hook_event_name": "PostToolUse",
+            "tool_name": tool_name,
+            "tool_input": result.arguments,
+            "tool_response": result.content,
+        },
+        tool_use_id,
+    )
+    for output in post_outputs:
+        specific = output.get("hookSpecificOutput") or {}
+        if specific.get("additionalContext"):
+            result.additional_context.append(specific["additionalContext"])
+
+    return result
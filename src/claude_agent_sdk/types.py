@@ -11,6 +11,8 @@ from typing_extensions import NotRequired
 if TYPE_CHECKING:
     from mcp.server import Server as McpServer
 
+    from ._internal.tool_metrics import ToolCallMetrics
+
 # Permission modes
 PermissionMode = Literal["default", "acceptEdits", "plan", "bypassPermissions"]
 
@@ -459,6 +461,10 @@ class AssistantMessage:
     content: list[ContentBlock]
     model: str
     parent_tool_use_id: str | None = None
+    # Token usage of the API response this message is part of. A response
+    # with several content blocks may be split over several messages, each
+    # reporting the same usage.
+    usage: dict[str, Any] | None = None
 
 
 @dataclass
@@ -482,6 +488,11 @@ class ResultMessage:
     total_cost_usd: float | None = None
     usage: dict[str, Any] | None = None
     result: str | None = None
+    # Parsed final JSON when ClaudeAgentOptions.output_schema is set: a dict or
+    # list, or an instance of the pydantic model given as schema
+    structured_output: Any = None
+    # Why the final response could not be parsed into structured_output
+    structured_output_error: str | None = None
 
 
 @dataclass
@@ -497,6 +508,234 @@ class StreamEvent:
 Message = UserMessage | AssistantMessage | SystemMessage | ResultMessage | StreamEvent
 
 
+@dataclass
+class QueryBatchStats:
+    """Aggregate statistics of a query_many() batch, updated as it runs."""
+
+    completed: int = 0
+    failed: int = 0
+    total_cost_usd: float = 0.0
+    total_api_duration_ms: int = 0
+    wall_time_s: float = 0.0
+    # Time from starting each prompt to its final message, by prompt index
+    latencies_ms: dict[int, float] = field(default_factory=dict)
+    # Exceptions of failed prompts, by prompt index
+    errors: dict[int, Exception] = field(default_factory=dict)
+
+    @property
+    def mean_latency_ms(self) -> float:
+        """Mean time taken per prompt."""
+        if not self.latencies_ms:
+            return 0.0
+        return sum(self.latencies_ms.values()) / len(self.latencies_ms)
+
+
+@dataclass
+class ToolInvocationResult:
+    """Result of calling an SDK MCP tool directly with invoke_tool()."""
+
+    tool_name: str
+    # Arguments the tool was called with, after updates by hooks or the
+    # permission callback
+    arguments: dict[str, Any]
+    # MCP content blocks returned by the tool, e.g. {"type": "text", "text": ...}
+    content: list[dict[str, Any]] = field(default_factory=list)
+    is_error: bool = False
+    # Set when a hook or the permission callback prevented the call
+    denied: bool = False
+    deny_reason: str | None = None
+    # additionalContext returned by PostToolUse hooks
+    additional_context: list[str] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        """Concatenated text content of the result."""
+        return "\n".join(
+            block["text"] for block in self.content if block.get("type") == "text"
+        )
+
+
+# Condition for ClaudeSDKClient.receive_until(): called with each message,
+# returns (or resolves to) a value other than None to stop the response
+StopCondition = Callable[[Message], Any | Awaitable[Any]]
+
+
+@dataclass
+class StoppedResponse:
+    """Outcome of ClaudeSDKClient.receive_until()."""
+
+    # Value returned by the stop condition, None if the response completed
+    # without the condition being met
+    value: Any
+    # Whether the condition was met before the response completed
+    stopped_early: bool
+    # Messages received, including the final ResultMessage if it was awaited
+    messages: list[Message] = field(default_factory=list)
+    # Final ResultMessage, with the cost incurred up to the stop
+    result: ResultMessage | None = None
+
+    @property
+    def total_cost_usd(self) -> float | None:
+        return self.result.total_cost_usd if self.result else None
+
+
+@dataclass
+class Budget:
+    """Limits on the cost, tokens and duration of a session.
+
+    Usage is tracked from the messages as they stream in. The cost is the one
+    the CLI reports at the end of each turn; during a turn, the cost of the
+    turn is estimated from its token counts and approximate list prices. When
+    a limit is exceeded Claude is interrupted and BudgetExceededError is
+    raised.
+    """
+
+    max_cost_usd: float | None = None
+    # Input (including cache reads and writes) plus output tokens
+    max_tokens: int | None = None
+    # Seconds since the session started
+    max_wall_time: float | None = None
+    # USD per million (input, output) tokens by model family, matched as a
+    # substring of the model name, e.g. {"sonnet": (3.0, 15.0)}, for the
+    # estimate of a turn in progress. Overrides the built-in prices.
+    prices_per_mtok: dict[str, tuple[float, float]] | None = None
+
+
+@dataclass
+class StderrEvent:
+    """A line written by Claude Code to stderr, e.g. with --debug-to-stderr."""
+
+    # Seconds since the process started
+    elapsed: float
+    # Level of a log line, e.g. "DEBUG" or "ERROR", None for other output
+    level: str | None
+    message: str
+    line: str
+
+
+@dataclass
+class ShutdownStats:
+    """How Claude Code processes stopped when their transport was closed."""
+
+    # Processes that exited by themselves once their input was closed
+    exited: int = 0
+    # Processes stopped with SIGTERM
+    terminated: int = 0
+    # Processes stopped with SIGKILL
+    killed: int = 0
+    # Processes that did not even exit after SIGKILL within the wait
+    unreaped: int = 0
+    total_wait_s: float = 0.0
+    max_wait_s: float = 0.0
+
+    @property
+    def mean_wait_s(self) -> float:
+        """Mean time taken to stop a process."""
+        stopped = self.exited + self.terminated + self.killed + self.unreaped
+        return self.total_wait_s / stopped if stopped else 0.0
+
+
+@dataclass
+class ShutdownPolicy:
+    """How a Claude Code process is stopped when its transport is closed.
+
+    Its input is closed first, letting it exit by itself. Past exit_timeout
+    it is sent SIGTERM, and past terminate_timeout after that SIGKILL.
+    """
+
+    # Seconds to wait for the process to exit after closing its input
+    exit_timeout: float = 0.2
+    # Seconds to wait for the process to exit after SIGTERM
+    terminate_timeout: float = 5.0
+    # Updated each time a process is stopped, possibly shared between sessions
+    stats: ShutdownStats | None = None
+
+
+@dataclass
+class ReconnectStats:
+    """Reconnections of ClaudeSDKClient sessions after Claude Code died."""
+
+    reconnects: int = 0
+    # Recoveries that gave up after policy.max_attempts restarts in a row
+    failures: int = 0
+    # Seconds from noticing a process died to having reconnected, or given up
+    total_downtime_s: float = 0.0
+    max_downtime_s: float = 0.0
+    last_error: str | None = None
+
+
+@dataclass
+class ReconnectPolicy:
+    """How ClaudeSDKClient recovers when its Claude Code process dies.
+
+    A new process is started, resuming the session with the last session
+    ID, and initialized with the same hooks and SDK MCP servers. The
+    response in progress is lost: its reader gets the error, and the next
+    query() goes to the new process.
+
+    Restarts are counted until a process has run for stable_after seconds,
+    so a process dying right after starting (e.g. on a bad session ID) is
+    not restarted indefinitely. Failing to start counts as well. Restarts
+    after the first are delayed by backoff seconds, doubling up to
+    max_backoff; after max_attempts of them the client gives up and query()
+    raises CLIConnectionError.
+    """
+
+    max_attempts: int = 3
+    backoff: float = 0.5
+    max_backoff: float = 10.0
+    # Seconds a restarted process must run for the restart count to be reset
+    stable_after: float = 60.0
+    # Updated on each recovery, possibly shared between clients
+    stats: ReconnectStats | None = None
+
+
+@dataclass
+class ProcessResourceStats:
+    """Memory use of Claude Code processes, sampled while they run."""
+
+    # Processes sampled at least once
+    processes: int = 0
+    samples: int = 0
+    # Resident set size of each running process at its last sample, by PID
+    current_rss_bytes: dict[int, int] = field(default_factory=dict)
+    # Highest resident set size seen in any process
+    peak_rss_bytes: int = 0
+
+    @property
+    def total_rss_bytes(self) -> int:
+        """Combined resident set size of the running processes."""
+        return sum(self.current_rss_bytes.values())
+
+
+@dataclass
+class ProcessLimits:
+    """Resource limits and scheduling of the Claude Code process.
+
+    The rlimits and niceness apply from the start, as Claude Code is run
+    through prlimit and nice (Linux only). Where those are not installed,
+    they are applied right after the process starts instead, so its first
+    instructions run without them. Claude Code runs on Node.js, which
+    reserves far more address space than it uses: cap its memory with
+    node_max_old_space_mb rather than max_address_space_bytes.
+    """
+
+    # Passed to Node.js as --max-old-space-size, in MiB
+    node_max_old_space_mb: int | None = None
+    # RLIMIT_AS
+    max_address_space_bytes: int | None = None
+    # RLIMIT_CPU
+    max_cpu_seconds: int | None = None
+    # RLIMIT_NOFILE
+    max_open_files: int | None = None
+    # Niceness of the process, e.g. 10 to yield the CPU to other work
+    nice: int | None = None
+    # Seconds between samples of the process memory use, None to not sample
+    rss_sample_interval: float | None = None
+    # Updated with the samples, possibly shared between sessions
+    stats: ProcessResourceStats | None = None
+
+
 @dataclass
 class ClaudeAgentOptions:
     """Query options for Claude SDK."""
@@ -523,7 +762,15 @@ class ClaudeAgentOptions:
     debug_stderr: Any = (
         sys.stderr
     )  # Deprecated: File-like object for debug output. Use stderr callback instead.
-    stderr: Callable[[str], None] | None = None  # Callback for stderr output from CLI
+    # Callbacks for stderr output from CLI, as lines and as events parsed
+    # from them, e.g. debug output. They are called in a worker thread, not
+    # on the event loop, so they must be thread-safe and cannot use the
+    # event loop; lines they fall more than 10,000 behind on are dropped.
+    # Lines still queued when the process is closed are delivered within 5s
+    stderr: Callable[[str], None] | None = None
+    stderr_events: Callable[[StderrEvent], None] | None = None
+    # Bytes of the end of stderr kept for ProcessError
+    stderr_tail_bytes: int = 16 * 1024
 
     # Tool permission callback
     can_use_tool: CanUseTool | None = None
@@ -542,6 +789,21 @@ class ClaudeAgentOptions:
     agents: dict[str, AgentDefinition] | None = None
     # Setting sources to load (user, project, local)
     setting_sources: list[SettingSource] | None = None
+    # Collector for SDK MCP tool call statistics, shared by every session
+    # using these options
+    tool_metrics: "ToolCallMetrics | None" = None
+    # JSON schema (dict) or pydantic model class the final response must
+    # conform to. Claude is instructed to end its run with matching JSON, which
+    # is parsed into ResultMessage.structured_output.
+    output_schema: dict[str, Any] | type | None = None
+    # Cost, token and time limits enforced during the session
+    budget: Budget | None = None
+    # How the Claude Code process is stopped; defaults to ShutdownPolicy()
+    shutdown: ShutdownPolicy | None = None
+    # Resource limits of the Claude Code process
+    process_limits: ProcessLimits | None = None
+    # Reconnection of ClaudeSDKClient when Claude Code dies, None to not
+    reconnect: ReconnectPolicy | None = None
 
 
 # SDK Control Protocol
@@ -0,0 +1,110 @@
+"""Fixtures shared by the unit tests."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Stand-in for the Claude Code CLI. It answers control requests and echoes
+# each user message; FAKE_CLAUDE_* environment variables change its behaviour,
+# e.g. FAKE_CLAUDE_LOG names a file each streamed user message is appended to,
+# FAKE_CLAUDE_ARGV_LOG one its arguments are appended to as a JSON line
+# and FAKE_CLAUDE_TOKENS the input and output tokens of each reply
+FAKE_CLAUDE = """\
+import json
+import os
+import signal
+import sys
+import time
+
+args = sys.argv[1:]
+if args == ["-v"]:
+    print("2.0.5 (Claude Code)")
+    sys.exit(0)
+if os.environ.get("FAKE_CLAUDE_ARGV_LOG"):
+    with open(os.environ["FAKE_CLAUDE_ARGV_LOG"], "a") as log:
+        log.write(json.dumps(args) + "\\n")
+if os.environ.get("FAKE_CLAUDE_IGNORE_SIGTERM"):
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+
+def out(message):
+    sys.stdout.write(json.dumps(message) + "\\n")
+    sys.stdout.flush()
+
+
+def reply(text):
+    time.sleep(float(os.environ.get("FAKE_CLAUDE_DELAY", "0")))
+    message = {
+        "model": "claude-sonnet",
+        "content": [{"type": "text", "text": "echo:" + text}],
+    }
+    if os.environ.get("FAKE_CLAUDE_TOKENS"):
+        tokens = int(os.environ["FAKE_CLAUDE_TOKENS"])
+        message["id"] = "msg_" + text
+        message["usage"] = {"input_tokens": tokens, "output_tokens": tokens}
+    out({"type": "assistant", "message": message})
+    out({
+        "type": "result",
+        "subtype": "success",
+        "duration_ms": 1,
+        "duration_api_ms": 1,
+        "is_error": False,
+        "num_turns": 1,
+        "session_id": "s1",
+        "total_cost_usd": 0.001,
+        "result": "echo:" + text,
+    })
+
+
+if os.environ.get("FAKE_CLAUDE_EXIT"):
+    time.sleep(float(os.environ.get("FAKE_CLAUDE_DELAY", "0")))
+    sys.stderr.write("fatal: simulated failure\\n")
+    sys.exit(int(os.environ["FAKE_CLAUDE_EXIT"]))
+if "--print" in args:
+    reply(args[args.index("--") + 1] if "--" in args else sys.stdin.read())
+    sys.exit(0)
+for line in sys.stdin:
+    if not line.strip():
+        continue
+    message = json.loads(line)
+    if message["type"] == "control_request":
+        out({
+            "type": "control_response",
+            "response": {
+                "subtype": "success",
+                "request_id": message["request_id"],
+                "response": {},
+            },
+        })
+        if os.environ.get("FAKE_CLAUDE_EXIT_AFTER_INIT"):
+            sys.stderr.write("fatal: simulated failure after initialize\\n")
+            sys.exit(int(os.environ["FAKE_CLAUDE_EXIT_AFTER_INIT"]))
+    elif message["type"] == "user":
+        content = message["message"]["content"]
+        if os.environ.get("FAKE_CLAUDE_LOG"):
+            with open(os.environ["FAKE_CLAUDE_LOG"], "a") as log:
+                log.write(content + "\\n")
+        if content == "crash":
+            for i in range(int(os.environ.get("FAKE_CLAUDE_STDERR_LINES", "0"))):
+                sys.stderr.write(f"line {i}\\n")
+                sys.stderr.flush()
+                time.sleep(0.01)
+            sys.stderr.write("fatal: simulated crash\\n")
+            sys.stderr.flush()
+            os._exit(7)
+        reply(content)
+# Keep running for a while after the input was closed
+time.sleep(float(os.environ.get("FAKE_CLAUDE_LINGER", "0")))
+"""
+
+
+@pytest.fixture
+def fake_cli(tmp_path: Path) -> Path:
+    """Path of an executable fake Claude Code CLI."""
+    if sys.platform == "win32":
+        pytest.skip("The fake CLI is a script run through its shebang")
+    path = tmp_path / "claude"
+    path.write_text(f"#!{sys.executable}\n{FAKE_CLAUDE}")
+    path.chmod(0o755)
+    return path
@@ -0,0 +1,154 @@
+"""Tests for background tasks and the release of abandoned sessions."""
+
+import gc
+import sys
+from pathlib import Path
+from typing import Any
+
+import anyio
+import pytest
+
+from claude_agent_sdk import ClaudeAgentOptions, ClaudeSDKClient, query
+from claude_agent_sdk._internal import background
+from claude_agent_sdk._internal.background import BackgroundTasks
+
+pytestmark = [
+    pytest.mark.asyncio,
+    pytest.mark.skipif(
+        not sys.platform.startswith("linux"), reason="Counts resources in /proc"
+    ),
+]
+
+SESSIONS = 50
+# Enough abandoned queries for a leak per query to exhaust descriptors
+MANY_SESSIONS = 2000
+
+
+def child_processes() -> int:
+    count = 0
+    for task in Path("/proc/self/task").iterdir():
+        count += len((task / "children").read_text().split())
+    return count
+
+
+def open_fds() -> int:
+    return len(list(Path("/proc/self/fd").iterdir()))
+
+
+async def assert_released(children: int, fds: int) -> None:
+    # Abandoned generators are closed by the garbage collector, in new tasks
+    gc.collect()
+    with anyio.move_on_after(10):
+        while child_processes() > children or open_fds() > fds:
+            await anyio.sleep(0.1)
+            gc.collect()
+    assert child_processes() == children
+    assert open_fds() <= fds
+
+
+@pytest.mark.parametrize(
+    "sessions", [SESSIONS, pytest.param(MANY_SESSIONS, marks=pytest.mark.slow)]
+)
+async def test_abandoned_queries_release_resources(
+    fake_cli: Path, sessions: int
+) -> None:
+    children, fds = child_processes(), open_fds()
+    options = ClaudeAgentOptions(cli_path=fake_cli)
+
+    for _ in range(sessions):
+        async for _ in query(prompt="hello", options=options):
+            break
+
+    await assert_released(children, fds)
+
+
+async def test_cancelled_streaming_queries_release_resources(fake_cli: Path) -> None:
+    children, fds = child_processes(), open_fds()
+    options = ClaudeAgentOptions(cli_path=fake_cli, env={"FAKE_CLAUDE_DELAY": "10"})
+
+    async def prompts() -> Any:
+        yield {"type": "user", "message": {"role": "user", "content": "hello"}}
+
+    for _ in range(SESSIONS // 4):
+        with anyio.move_on_after(0.3):
+            async for _ in query(prompt=prompts(), options=options):
+                pass
+
+    await assert_released(children, fds)
+
+
+async def test_client_disconnects_from_other_task(fake_cli: Path) -> None:
+    children, fds = child_processes(), open_fds()
+
+    for _ in range(SESSIONS // 4):
+        client = ClaudeSDKClient(ClaudeAgentOptions(cli_path=fake_cli))
+        await client.connect()
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(client.disconnect)
+
+    await assert_released(children, fds)
+
+
+async def test_client_disconnects_within_cancel_scope(fake_cli: Path) -> None:
+    children, fds = child_processes(), open_fds()
+
+    client = ClaudeSDKClient(ClaudeAgentOptions(cli_path=fake_cli))
+    await client.connect()
+    with anyio.CancelScope() as scope:
+        scope.cancel()
+        await client.disconnect()
+    # The caller's task is not left inside a scope of the client
+    await anyio.sleep(0)
+
+    await assert_released(children, fds)
+
+
+async def test_failed_input_stream_is_raised_to_the_caller(fake_cli: Path) -> None:
+    async def prompts() -> Any:
+        yield {"type": "user", "message": {"role": "user", "content": "hello"}}
+        raise ValueError("prompt source failed")
+
+    options = ClaudeAgentOptions(cli_path=fake_cli, env={"FAKE_CLAUDE_DELAY": "1"})
+    with anyio.fail_after(10), pytest.raises(ValueError, match="prompt source"):
+        async for _ in query(prompt=prompts(), options=options):
+            pass
+
+
+async def test_close_gives_up_on_tasks_ignoring_cancellation(
+    monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    monkeypatch.setattr(background, "_CANCEL_TIMEOUT", 0.1)
+    tasks = BackgroundTasks()
+    started, release = anyio.Event(), anyio.Event()
+
+    async def stubborn() -> None:
+        with anyio.CancelScope(shield=True):
+            started.set()
+            await release.wait()
+
+    tasks.spawn(stubborn)
+    await started.wait()
+    with anyio.fail_after(5):
+        await tasks.close()
+    assert "still running" in caplog.text
+    release.set()
+
+
+async def test_failed_task_is_passed_on_without_affecting_others() -> None:
+    errors: list[Exception] = []
+    tasks = BackgroundTasks(on_error=errors.append)
+    finished = anyio.Event()
+
+    async def fail() -> None:
+        raise ValueError("task failed")
+
+    async def succeed() -> None:
+        await anyio.sleep(0.05)
+        finished.set()
+
+    tasks.spawn(fail)
+    tasks.spawn(succeed)
+    with anyio.fail_after(5):
+        await finished.wait()
+    await tasks.close()
+    assert [str(e) for e in errors] == ["task failed"]
@@ -0,0 +1,111 @@
+"""Tests for session budgets."""
+
+from pathlib import Path
+
+import anyio
+import pytest
+
+from claude_agent_sdk import (
+    Budget,
+    BudgetExceededError,
+    ClaudeAgentOptions,
+    ClaudeSDKClient,
+    ResultMessage,
+)
+from claude_agent_sdk._internal.budget import BudgetTracker
+
+
+async def ask(options: ClaudeAgentOptions, *prompts: str) -> list[ResultMessage]:
+    results: list[ResultMessage] = []
+    with anyio.fail_after(10):
+        async with ClaudeSDKClient(options) as client:
+            for prompt in prompts:
+                await client.query(prompt)
+                async for message in client.receive_response():
+                    if isinstance(message, ResultMessage):
+                        results.append(message)
+    return results
+
+
+@pytest.mark.asyncio
+async def test_token_limit_interrupts_the_turn(fake_cli: Path) -> None:
+    options = ClaudeAgentOptions(
+        cli_path=fake_cli,
+        env={"FAKE_CLAUDE_TOKENS": "300"},
+        budget=Budget(max_tokens=1000),
+    )
+
+    with pytest.raises(BudgetExceededError) as exc_info:
+        await ask(options, "one", "two")
+
+    error = exc_info.value
+    assert "1200 tokens over limit of 1000" in str(error)
+    assert error.tokens == 1200
+    # The interrupted turn's result, with the cost reported by the CLI
+    assert error.result is not None
+    assert error.result.result == "echo:two"
+    assert error.cost_usd == 0.001
+
+
+@pytest.mark.asyncio
+async def test_cost_limit_uses_the_estimate_during_a_turn(fake_cli: Path) -> None:
+    # 2M tokens of claude-sonnet are estimated at $18
+    options = ClaudeAgentOptions(
+        cli_path=fake_cli,
+        env={"FAKE_CLAUDE_TOKENS": "1000000"},
+        budget=Budget(max_cost_usd=1.0),
+    )
+
+    with pytest.raises(BudgetExceededError) as exc_info:
+        await ask(options, "one")
+
+    assert exc_info.value.reason == "cost $18.0000 over limit of $1.0000"
+
+
+@pytest.mark.asyncio
+async def test_wall_time_limit_stops_a_slow_turn(fake_cli: Path) -> None:
+    options = ClaudeAgentOptions(
+        cli_path=fake_cli,
+        env={"FAKE_CLAUDE_DELAY": "1"},
+        budget=Budget(max_wall_time=0.2),
+    )
+
+    with pytest.raises(BudgetExceededError, match="over time limit of 0.2s") as exc:
+        await ask(options, "one")
+
+    assert exc.value.elapsed >= 0.2
+
+
+@pytest.mark.asyncio
+async def test_session_within_budget_is_not_stopped(fake_cli: Path) -> None:
+    options = ClaudeAgentOptions(
+        cli_path=fake_cli,
+        env={"FAKE_CLAUDE_TOKENS": "10"},
+        budget=Budget(max_cost_usd=1.0, max_tokens=1000, max_wall_time=30),
+    )
+
+    results = await ask(options, "one", "two")
+
+    assert [result.result for result in results] == ["echo:one", "echo:two"]
+
+
+def test_reported_cost_replaces_the_estimate() -> None:
+    tracker = BudgetTracker(Budget(prices_per_mtok={"sonnet": (10.0, 10.0)}))
+    assistant = {
+        "type": "assistant",
+        "message": {
+            "id": "msg_1",
+            "model": "claude-sonnet",
+            "usage": {"input_tokens": 50_000, "output_tokens": 50_000},
+        },
+    }
+
+    # Repeated usage of one API message is counted once
+    tracker.observe(assistant)
+    tracker.observe(assistant)
+    assert tracker.tokens == 100_000
+    assert tracker.cost_usd == pytest.approx(1.0)
+
+    tracker.observe({"type": "result", "total_cost_usd": 0.25})
+    assert tracker.cost_usd == 0.25
+    assert tracker.tokens == 100_000
@@ -0,0 +1,120 @@
+"""Tests for MessageFanout."""
+
+from collections.abc import AsyncIterator
+
+import anyio
+import pytest
+
+from claude_agent_sdk import FanoutCancelledError, MessageFanout
+from claude_agent_sdk.fanout import MessageSubscription
+
+pytestmark = pytest.mark.asyncio
+
+
+async def numbers(count: int) -> AsyncIterator[int]:
+    for i in range(count):
+        yield i
+        await anyio.sleep(0)
+
+
+async def collect(subscription: MessageSubscription[int], into: list[int]) -> None:
+    async for message in subscription:
+        into.append(message)
+
+
+async def test_breaking_out_of_a_closed_block_subscription() -> None:
+    fanout = MessageFanout(numbers(50))
+    early = fanout.subscribe(max_buffered=2)
+    other = fanout.subscribe(max_buffered=2)
+    received: list[int] = []
+
+    with anyio.fail_after(5):
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(fanout.run)
+            tg.start_soon(collect, other, received)
+            async with early:
+                async for message in early:
+                    if message == 3:
+                        break
+
+    assert received == list(range(50))
+    assert early.delivered == 4
+    assert fanout.messages == 50
+
+
+async def test_unclosed_block_subscription_stalls_run_until_closed() -> None:
+    fanout = MessageFanout(numbers(50))
+    early = fanout.subscribe(max_buffered=2)
+
+    with anyio.fail_after(5):
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(fanout.run)
+            async for message in early:
+                if message == 3:
+                    break
+
+            await anyio.sleep(0.1)
+            assert fanout.messages < 50
+            await early.aclose()
+    assert fanout.messages == 50
+
+
+async def test_drop_newest_keeps_the_first_messages() -> None:
+    fanout = MessageFanout(numbers(10))
+    subscription = fanout.subscribe(max_buffered=3, overflow="drop_newest")
+    received: list[int] = []
+
+    await fanout.run()
+    await collect(subscription, received)
+
+    assert received == [0, 1, 2]
+    assert subscription.dropped == 7
+    assert subscription.delivered == 3
+    assert subscription.peak_buffered == 3
+
+
+async def test_drop_oldest_keeps_the_last_messages() -> None:
+    fanout = MessageFanout(numbers(10))
+    subscription = fanout.subscribe(max_buffered=3, overflow="drop_oldest")
+    received: list[int] = []
+
+    await fanout.run()
+    await collect(subscription, received)
+
+    assert received == [7, 8, 9]
+    assert subscription.dropped == 7
+
+
+async def test_source_error_is_raised_after_the_buffered_messages() -> None:
+    async def failing() -> AsyncIterator[int]:
+        yield 0
+        yield 1
+        raise ValueError("source failed")
+
+    fanout = MessageFanout(failing())
+    first = fanout.subscribe()
+    second = fanout.subscribe()
+    await fanout.run()
+
+    for subscription in (first, second):
+        received: list[int] = []
+        with pytest.raises(ValueError, match="source failed"):
+            await collect(subscription, received)
+        assert received == [0, 1]
+
+
+async def test_cancelled_run_is_not_a_clean_end() -> None:
+    fanout = MessageFanout(numbers(1000))
+    subscription = fanout.subscribe(max_buffered=1000)
+
+    with anyio.fail_after(5):
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(fanout.run)
+            while fanout.messages < 3:
+                await anyio.sleep(0)
+            tg.cancel_scope.cancel()
+
+    received: list[int] = []
+    with pytest.raises(FanoutCancelledError):
+        await collect(subscription, received)
+    assert received == list(range(fanout.messages))
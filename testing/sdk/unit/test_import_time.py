@@ -0,0 +1,57 @@
+"""Tests that importing the package stays cheap."""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any
+
+import claude_agent_sdk
+
+# The package imports in about 50 ms; importing anyio, mcp and pydantic
+# eagerly takes it to about 0.5 s, so this leaves room for a slow machine while
+# still catching an eager import
+MAX_IMPORT_SECONDS = 0.25
+
+# Dependencies only loaded when a session or an SDK MCP server needs them
+DEFERRED_MODULES = ("anyio", "jsonschema", "mcp", "pydantic")
+
+IMPORT_SCRIPT = """\
+import json
+import sys
+import time
+
+started = time.perf_counter()
+import claude_agent_sdk
+elapsed = time.perf_counter() - started
+print(json.dumps({"elapsed": elapsed, "modules": sorted(sys.modules)}))
+"""
+
+
+def import_in_subprocess() -> dict[str, Any]:
+    src = str(Path(claude_agent_sdk.__file__).parent.parent)
+    env = {**os.environ, "PYTHONPATH": src}
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    data: dict[str, Any] = json.loads(result.stdout)
+    return data
+
+
+def test_import_defers_heavy_dependencies() -> None:
+    modules = import_in_subprocess()["modules"]
+
+    for name in DEFERRED_MODULES:
+        assert name not in modules, f"importing claude_agent_sdk imported {name}"
+
+
+def test_import_time() -> None:
+    # Best of a few runs, so that a busy machine does not fail the test
+    elapsed = min(import_in_subprocess()["elapsed"] for _ in range(3))
+
+    assert elapsed < MAX_IMPORT_SECONDS
@@ -0,0 +1,97 @@
+"""Tests for the resource limits and memory sampling of Claude Code."""
+
+import os
+import sys
+from pathlib import Path
+
+import anyio
+import pytest
+
+from claude_agent_sdk import (
+    ClaudeAgentOptions,
+    ClaudeSDKClient,
+    ProcessLimits,
+    ProcessResourceStats,
+)
+from claude_agent_sdk._internal.transport.subprocess_cli import (
+    SubprocessCLITransport,
+    _limited_command,
+    _read_rss,
+)
+
+pytestmark = pytest.mark.skipif(
+    sys.platform != "linux", reason="Process limits and /proc are Linux only"
+)
+
+
+def process_pid(client: ClaudeSDKClient) -> int:
+    transport = client._transport
+    assert isinstance(transport, SubprocessCLITransport)
+    assert transport._process is not None
+    return transport._process.pid
+
+
+def test_limits_are_applied_from_exec(fake_cli: Path) -> None:
+    limits = ProcessLimits(max_open_files=100, nice=5)
+
+    cmd, late_limits = _limited_command([str(fake_cli), "-v"], limits)
+
+    assert Path(cmd[0]).name == "prlimit"
+    assert cmd[-2:] == [str(fake_cli), "-v"]
+    assert late_limits.max_open_files is None
+    assert late_limits.nice is None
+
+
+def test_missing_cli_is_left_unprefixed(tmp_path: Path) -> None:
+    cmd = [str(tmp_path / "missing")]
+
+    assert _limited_command(cmd, ProcessLimits(nice=5)) == (cmd, ProcessLimits(nice=5))
+
+
+@pytest.mark.asyncio
+async def test_running_process_has_its_limits(fake_cli: Path) -> None:
+    options = ClaudeAgentOptions(
+        cli_path=fake_cli,
+        process_limits=ProcessLimits(max_open_files=100, nice=5),
+    )
+
+    async with ClaudeSDKClient(options) as client:
+        pid = process_pid(client)
+        limits = Path(f"/proc/{pid}/limits").read_text()
+        cmdline = Path(f"/proc/{pid}/cmdline").read_bytes().split(b"\0")
+        niceness = os.getpriority(os.PRIO_PROCESS, pid)
+
+    assert str(fake_cli).encode() in cmdline
+    assert any(
+        line.startswith("Max open files") and line.split()[3:5] == ["100", "100"]
+        for line in limits.splitlines()
+    )
+    assert niceness == 5
+
+
+def test_rss_of_a_running_process() -> None:
+    rss = _read_rss(os.getpid())
+
+    assert rss is not None and rss > 0
+    assert _read_rss(2**22 + 1) is None
+
+
+@pytest.mark.asyncio
+async def test_memory_is_sampled_until_the_process_exits(fake_cli: Path) -> None:
+    stats = ProcessResourceStats()
+    options = ClaudeAgentOptions(
+        cli_path=fake_cli,
+        process_limits=ProcessLimits(rss_sample_interval=0.01, stats=stats),
+    )
+
+    async with ClaudeSDKClient(options) as client:
+        pid = process_pid(client)
+        with anyio.fail_after(5):
+            while stats.samples < 3:
+                await anyio.sleep(0.01)
+        assert stats.current_rss_bytes[pid] > 0
+        assert stats.total_rss_bytes == stats.current_rss_bytes[pid]
+
+    assert stats.processes == 1
+    assert stats.peak_rss_bytes > 0
+    assert stats.current_rss_bytes == {}
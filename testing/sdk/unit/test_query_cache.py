@@ -0,0 +1,149 @@
+"""Tests for the on-disk cache of query() transcripts."""
+
+from pathlib import Path
+from typing import Any
+
+import anyio
+import pytest
+
+from claude_agent_sdk import (
+    Budget,
+    BudgetExceededError,
+    ClaudeAgentOptions,
+    HookMatcher,
+    Message,
+    QueryCache,
+    ResultMessage,
+    create_sdk_mcp_server,
+    tool,
+)
+
+pytestmark = pytest.mark.asyncio
+
+
+async def collect(
+    cache: QueryCache, prompt: str, options: ClaudeAgentOptions
+) -> list[Message]:
+    with anyio.fail_after(10):
+        return [m async for m in cache.query(prompt=prompt, options=options)]
+
+
+def runs(argv_log: Path) -> int:
+    """Number of times the fake CLI was started."""
+    return len(argv_log.read_text().splitlines()) if argv_log.exists() else 0
+
+
+def contacts_server(description: str) -> Any:
+    @tool("find", description, {"name": str})
+    async def find(args: dict[str, Any]) -> dict[str, Any]:
+        return {"content": []}
+
+    return create_sdk_mcp_server("contacts", tools=[find])
+
+
+async def test_repeated_query_is_replayed(fake_cli: Path, tmp_path: Path) -> None:
+    argv_log = tmp_path / "argv.log"
+    cache = QueryCache(tmp_path / "cache")
+    options = ClaudeAgentOptions(
+        cli_path=fake_cli, env={"FAKE_CLAUDE_ARGV_LOG": str(argv_log)}
+    )
+
+    live = await collect(cache, "hello", options)
+    replayed = await collect(cache, "hello", options)
+
+    assert runs(argv_log) == 1
+    assert replayed == live
+    assert isinstance(replayed[-1], ResultMessage)
+    assert replayed[-1].result == "echo:hello"
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.stores) == (1, 1, 1)
+
+    await collect(cache, "goodbye", options)
+    assert runs(argv_log) == 2
+    assert cache.stats.hit_rate == pytest.approx(1 / 3)
+
+
+async def test_unkeyed_options_do_not_change_the_key(
+    fake_cli: Path, tmp_path: Path
+) -> None:
+    cache = QueryCache(tmp_path)
+
+    async def allow(*args: Any) -> Any:
+        return None
+
+    key = await cache.key("hello", ClaudeAgentOptions(model="claude-sonnet"))
+    callbacks = ClaudeAgentOptions(
+        model="claude-sonnet",
+        cli_path=fake_cli,
+        can_use_tool=allow,
+        hooks={"PreToolUse": [HookMatcher(hooks=[allow])]},
+        budget=Budget(max_tokens=10),
+    )
+
+    assert await cache.key("hello", callbacks) == key
+    assert await cache.key("hello!", callbacks) != key
+    assert await cache.key("hello", ClaudeAgentOptions(model="claude-opus")) != key
+    assert (
+        await cache.key(
+            "hello", ClaudeAgentOptions(model="claude-sonnet", system_prompt="Be brief")
+        )
+        != key
+    )
+
+
+async def test_sdk_servers_are_keyed_by_their_tools(tmp_path: Path) -> None:
+    cache = QueryCache(tmp_path)
+
+    def options(server: Any) -> ClaudeAgentOptions:
+        return ClaudeAgentOptions(mcp_servers={"contacts": server})
+
+    key = await cache.key("hello", options(contacts_server("Find a contact")))
+
+    # A new server instance with the same tools gives the same key
+    assert await cache.key("hello", options(contacts_server("Find a contact"))) == key
+    assert await cache.key("hello", options(contacts_server("Find a person"))) != key
+
+
+async def test_run_over_budget_is_not_stored(fake_cli: Path, tmp_path: Path) -> None:
+    cache = QueryCache(tmp_path / "cache")
+    options = ClaudeAgentOptions(
+        cli_path=fake_cli,
+        env={"FAKE_CLAUDE_TOKENS": "300"},
+        budget=Budget(max_tokens=100),
+    )
+
+    for _ in range(2):
+        with pytest.raises(BudgetExceededError):
+            await collect(cache, "hello", options)
+
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.stores) == (0, 2, 0)
+    assert not list((tmp_path / "cache").glob("*.json.gz"))
+
+
+async def test_expired_entries_are_not_replayed(fake_cli: Path, tmp_path: Path) -> None:
+    cache = QueryCache(tmp_path, ttl=0)
+    options = ClaudeAgentOptions(cli_path=fake_cli)
+
+    await collect(cache, "hello", options)
+    await collect(cache, "hello", options)
+
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.expired) == (0, 2, 1)
+
+
+async def test_least_recently_used_entries_are_evicted(
+    fake_cli: Path, tmp_path: Path
+) -> None:
+    cache = QueryCache(tmp_path)
+    options = ClaudeAgentOptions(cli_path=fake_cli)
+    await collect(cache, "one", options)
+    [entry] = tmp_path.glob("*.json.gz")
+    # Room for two entries but not three
+    cache.max_bytes = entry.stat().st_size * 5 // 2
+
+    # Entries are ordered by modification time, which has a coarse resolution
+    for prompt in ("two", "one", "three"):
+        await anyio.sleep(0.05)
+        await collect(cache, prompt, options)  # "one" is a hit
+
+    assert (cache.stats.hits, cache.stats.evictions) == (1, 1)
+    assert cache._path(await cache.key("one", options)).exists()
+    assert not cache._path(await cache.key("two", options)).exists()
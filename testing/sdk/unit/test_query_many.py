@@ -0,0 +1,100 @@
+"""Tests for query_many()."""
+
+from collections.abc import Iterator
+from pathlib import Path
+
+import anyio
+import pytest
+
+from claude_agent_sdk import (
+    ClaudeAgentOptions,
+    ProcessError,
+    QueryBatchStats,
+    ResultMessage,
+    query_many,
+)
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_runs_every_prompt(fake_cli: Path) -> None:
+    stats = QueryBatchStats()
+    results: dict[int, str | None] = {}
+    async for index, message in query_many(
+        prompts=[f"prompt {i}" for i in range(5)],
+        options=ClaudeAgentOptions(cli_path=fake_cli),
+        concurrency=2,
+        stats=stats,
+    ):
+        if isinstance(message, ResultMessage):
+            results[index] = message.result
+
+    assert results == {i: f"echo:prompt {i}" for i in range(5)}
+    assert stats.completed == 5
+    assert stats.failed == 0
+
+
+async def test_break_leaves_the_consumer_usable(fake_cli: Path) -> None:
+    options = ClaudeAgentOptions(cli_path=fake_cli, env={"FAKE_CLAUDE_DELAY": "0.2"})
+    messages = query_many(prompts=["a", "b", "c", "d"], options=options)
+    async for _ in messages:
+        break
+
+    # No cancel scope of the batch is left on the consumer's task
+    await anyio.sleep(0.05)
+    with anyio.fail_after(5):
+        await messages.aclose()
+
+
+async def test_stop_on_error_raises_the_failure(fake_cli: Path) -> None:
+    stats = QueryBatchStats()
+    options = ClaudeAgentOptions(cli_path=fake_cli, env={"FAKE_CLAUDE_DELAY": "0.5"})
+    prompts: list[str | tuple[str, dict[str, object]]] = [
+        ("fast", {"env": {}}),
+        "slow",
+        ("fails", {"env": {"FAKE_CLAUDE_DELAY": "0.2", "FAKE_CLAUDE_EXIT": "1"}}),
+    ]
+
+    with pytest.raises(ProcessError) as exc_info:
+        async for _ in query_many(prompts=prompts, options=options, stats=stats):
+            # The prompt fails while the consumer awaits something else
+            await anyio.sleep(0.5)
+
+    assert exc_info.value.exit_code == 1
+    assert list(stats.errors) == [2]
+    # The consumer is not left cancelled
+    await anyio.sleep(0)
+
+
+async def test_errors_are_recorded_without_stop_on_error(fake_cli: Path) -> None:
+    stats = QueryBatchStats()
+    prompts: list[str | tuple[str, dict[str, object]]] = [
+        "ok",
+        ("fails", {"env": {"FAKE_CLAUDE_EXIT": "1"}}),
+    ]
+    async for _ in query_many(
+        prompts=prompts,
+        options=ClaudeAgentOptions(cli_path=fake_cli),
+        stats=stats,
+        stop_on_error=False,
+    ):
+        pass
+
+    assert stats.completed == 1
+    assert isinstance(stats.errors[1], ProcessError)
+
+
+async def test_failing_prompts_iterable_is_raised(fake_cli: Path) -> None:
+    def prompts() -> Iterator[str]:
+        yield "first"
+        yield "second"
+        raise ValueError("no more prompts")
+
+    with anyio.fail_after(10), pytest.raises(ValueError, match="no more prompts"):
+        async for _ in query_many(
+            prompts=prompts(),
+            options=ClaudeAgentOptions(cli_path=fake_cli),
+            concurrency=2,
+            stop_on_error=False,
+        ):
+            pass
@@ -0,0 +1,163 @@
+"""Tests for stopping a response once a condition is met."""
+
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any
+
+import anyio
+import pytest
+
+from claude_agent_sdk import (
+    AssistantMessage,
+    ClaudeAgentOptions,
+    ClaudeSDKClient,
+    Message,
+    ResultMessage,
+    TextBlock,
+    ToolResultBlock,
+    ToolUseBlock,
+    UserMessage,
+    tool_result,
+)
+
+
+@asynccontextmanager
+async def asked(
+    fake_cli: Path, monkeypatch: pytest.MonkeyPatch, prompt: str
+) -> AsyncIterator[tuple[ClaudeSDKClient, list[str]]]:
+    """Client that has sent the prompt, recording the interrupts it sends."""
+    interrupts: list[str] = []
+    with anyio.fail_after(10):
+        async with ClaudeSDKClient(ClaudeAgentOptions(cli_path=fake_cli)) as client:
+            interrupt = client.interrupt
+
+            async def recording_interrupt() -> None:
+                interrupts.append(prompt)
+                await interrupt()
+
+            monkeypatch.setattr(client, "interrupt", recording_interrupt)
+            await client.query(prompt)
+            yield client, interrupts
+
+
+def text_of(message: Message) -> str | None:
+    if isinstance(message, AssistantMessage):
+        return "".join(b.text for b in message.content if isinstance(b, TextBlock))
+    return None
+
+
+@pytest.mark.asyncio
+async def test_met_condition_interrupts_and_reads_the_result(
+    fake_cli: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    async with asked(fake_cli, monkeypatch, "hello") as (client, interrupts):
+        response = await client.receive_until(text_of)
+
+    assert response.stopped_early
+    assert response.value == "echo:hello"
+    assert interrupts == ["hello"]
+    assert [type(m) for m in response.messages] == [AssistantMessage, ResultMessage]
+    assert response.result is response.messages[-1]
+
+
+@pytest.mark.asyncio
+async def test_unmet_condition_reads_the_whole_response(
+    fake_cli: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    async with asked(fake_cli, monkeypatch, "hello") as (client, interrupts):
+        response = await client.receive_until(lambda message: None)
+
+    assert not response.stopped_early
+    assert response.value is None
+    assert interrupts == []
+    assert response.result is not None and response.result.result == "echo:hello"
+
+
+@pytest.mark.asyncio
+async def test_condition_may_be_a_coroutine_function(
+    fake_cli: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    async def is_result(message: Message) -> Any:
+        return message.result if isinstance(message, ResultMessage) else None
+
+    async with asked(fake_cli, monkeypatch, "hello") as (client, interrupts):
+        response = await client.receive_until(is_result)
+
+    # The ResultMessage ends the response before the condition sees it
+    assert not response.stopped_early
+    assert interrupts == []
+
+    async def has_text(message: Message) -> Any:
+        return text_of(message)
+
+    async with asked(fake_cli, monkeypatch, "hello") as (client, interrupts):
+        response = await client.receive_until(has_text)
+
+    assert response.value == "echo:hello"
+
+
+@pytest.mark.asyncio
+async def test_without_interrupt_the_rest_is_left_to_read(
+    fake_cli: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    async with asked(fake_cli, monkeypatch, "hello") as (client, interrupts):
+        response = await client.receive_until(text_of, interrupt=False)
+        rest = [message async for message in client.receive_response()]
+
+    assert response.stopped_early
+    assert response.result is None
+    assert [type(m) for m in response.messages] == [AssistantMessage]
+    assert [type(m) for m in rest] == [ResultMessage]
+    assert interrupts == []
+
+
+def test_tool_result_matches_successful_results_of_the_tool() -> None:
+    condition = tool_result(
+        "mcp__contacts__find_phone",
+        lambda block: block.content or None,
+    )
+    messages: list[Message] = [
+        AssistantMessage(
+            content=[
+                ToolUseBlock(id="t1", name="mcp__contacts__find_phone", input={}),
+                ToolUseBlock(id="t2", name="mcp__contacts__find_email", input={}),
+            ],
+            model="claude-sonnet",
+        ),
+        UserMessage(
+            content=[
+                ToolResultBlock(tool_use_id="t1", content="timeout", is_error=True),
+                ToolResultBlock(tool_use_id="t2", content="cto@acme.com"),
+            ]
+        ),
+        AssistantMessage(
+            content=[ToolUseBlock(id="t3", name="mcp__contacts__find_phone", input={})],
+            model="claude-sonnet",
+        ),
+        # A result the parse function returns None for does not meet it
+        UserMessage(content=[ToolResultBlock(tool_use_id="t3", content="")]),
+        UserMessage(content=[ToolResultBlock(tool_use_id="t1", content="555-0100")]),
+    ]
+
+    assert [condition(message) for message in messages] == [
+        None,
+        None,
+        None,
+        None,
+        "555-0100",
+    ]
+
+
+def test_tool_result_defaults_to_the_result_block() -> None:
+    condition = tool_result("mcp__contacts__find_phone")
+    block = ToolResultBlock(tool_use_id="t1", content="555-0100")
+
+    condition(
+        AssistantMessage(
+            content=[ToolUseBlock(id="t1", name="mcp__contacts__find_phone", input={})],
+            model="claude-sonnet",
+        )
+    )
+
+    assert condition(UserMessage(content=[block])) is block
@@ -0,0 +1,92 @@
+"""Tests for reconnecting ClaudeSDKClient after Claude Code died."""
+
+import json
+from pathlib import Path
+
+import anyio
+import pytest
+
+from claude_agent_sdk import (
+    ClaudeAgentOptions,
+    ClaudeSDKClient,
+    CLIConnectionError,
+    ReconnectPolicy,
+    ReconnectStats,
+    ResultMessage,
+)
+
+pytestmark = pytest.mark.asyncio
+
+
+async def ask(client: ClaudeSDKClient, prompt: str) -> str | None:
+    await client.query(prompt)
+    result = None
+    async for message in client.receive_response():
+        if isinstance(message, ResultMessage):
+            result = message.result
+    return result
+
+
+async def test_reconnects_after_a_crash(fake_cli: Path) -> None:
+    stats = ReconnectStats()
+    options = ClaudeAgentOptions(
+        cli_path=fake_cli,
+        reconnect=ReconnectPolicy(max_attempts=1, stable_after=0, stats=stats),
+    )
+
+    async with ClaudeSDKClient(options) as client:
+        # Each process runs long enough to reset the restart count
+        for _ in range(3):
+            await client.query("crash")
+            with pytest.raises(Exception, match="simulated crash"):
+                async for _ in client.receive_response():
+                    pass
+        assert await ask(client, "hello") == "echo:hello"
+
+    assert stats.reconnects == 3
+    assert stats.failures == 0
+
+
+async def test_respawned_process_resumes_the_session(
+    fake_cli: Path, tmp_path: Path
+) -> None:
+    argv_log = tmp_path / "argv.jsonl"
+    options = ClaudeAgentOptions(
+        cli_path=fake_cli,
+        env={"FAKE_CLAUDE_ARGV_LOG": str(argv_log)},
+        reconnect=ReconnectPolicy(max_attempts=1),
+    )
+
+    async with ClaudeSDKClient(options) as client:
+        assert await ask(client, "hello") == "echo:hello"
+        await client.query("crash")
+        with pytest.raises(Exception, match="simulated crash"):
+            async for _ in client.receive_response():
+                pass
+        assert await ask(client, "again") == "echo:again"
+
+    first, respawned = [json.loads(line) for line in argv_log.read_text().splitlines()]
+    assert "--resume" not in first
+    assert respawned[respawned.index("--resume") + 1] == "s1"
+    assert "--fork-session" not in respawned
+
+
+async def test_gives_up_on_processes_dying_at_start(fake_cli: Path) -> None:
+    stats = ReconnectStats()
+    options = ClaudeAgentOptions(
+        cli_path=fake_cli,
+        env={"FAKE_CLAUDE_EXIT_AFTER_INIT": "1"},
+        reconnect=ReconnectPolicy(max_attempts=3, backoff=0.05, stats=stats),
+    )
+
+    async with ClaudeSDKClient(options) as client:
+        with anyio.fail_after(10):
+            while not stats.failures:
+                await anyio.sleep(0.05)
+
+        with pytest.raises(CLIConnectionError, match="Gave up reconnecting"):
+            await client.query("hello")
+
+    assert stats.reconnects == 3
+    assert stats.failures == 1
+    assert "simulated failure after initialize" in (stats.last_error or "")
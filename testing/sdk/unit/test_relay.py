@@ -0,0 +1,189 @@
+"""Tests for RelayServer and SocketTransport."""
+
+import json
+import stat
+import sys
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import anyio
+import pytest
+
+from claude_agent_sdk import (
+    ClaudeAgentOptions,
+    ClaudeSDKClient,
+    CLIConnectionError,
+    ProcessError,
+    RelayServer,
+    ResultMessage,
+    SocketTransport,
+    query,
+)
+
+pytestmark = [
+    pytest.mark.asyncio,
+    pytest.mark.skipif(sys.platform == "win32", reason="Uses Unix domain sockets"),
+]
+
+
+@asynccontextmanager
+async def serving(relay: RelayServer, path: Path) -> AsyncIterator[None]:
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(relay.serve, path)
+        with anyio.fail_after(5):
+            while not path.exists():
+                await anyio.sleep(0.01)
+        yield
+        tg.cancel_scope.cancel()
+
+
+def socket_path(tmp_path: Path) -> Path:
+    # Unix domain socket paths are limited to about 100 bytes
+    if len(str(tmp_path)) > 80:
+        pytest.skip("Temporary directory path too long for a socket")
+    return tmp_path / "relay.sock"
+
+
+async def test_query_through_relay(fake_cli: Path, tmp_path: Path) -> None:
+    path = socket_path(tmp_path)
+    relay = RelayServer(ClaudeAgentOptions(cli_path=fake_cli))
+    options = ClaudeAgentOptions()
+
+    async with serving(relay, path):
+        transport = SocketTransport(path, options, "hello")
+        messages = [
+            message
+            async for message in query(
+                prompt="hello", options=options, transport=transport
+            )
+        ]
+
+    assert isinstance(messages[-1], ResultMessage)
+    assert messages[-1].result == "echo:hello"
+    assert not transport.warm
+    assert relay.stats.cold_starts == 1
+
+
+async def test_client_is_handed_a_warm_process(fake_cli: Path, tmp_path: Path) -> None:
+    path = socket_path(tmp_path)
+    relay = RelayServer(ClaudeAgentOptions(cli_path=fake_cli), warm=1)
+    options = ClaudeAgentOptions()
+
+    async with serving(relay, path):
+        # Only the relay's user can connect
+        assert stat.S_IMODE(path.lstat().st_mode) == 0o600
+        with anyio.fail_after(5):
+            while not relay._warm:
+                await anyio.sleep(0.01)
+
+        transport = SocketTransport(path, options)
+        async with ClaudeSDKClient(options, transport=transport) as client:
+            await client.query("hello")
+            results = [
+                message.result
+                async for message in client.receive_response()
+                if isinstance(message, ResultMessage)
+            ]
+
+    assert results == ["echo:hello"]
+    assert transport.warm
+    assert relay.stats.warm_starts == 1
+    assert relay.stats.sessions == 1
+    assert relay.stats.active == 0
+
+
+async def test_crash_raises_process_error_with_stderr(
+    fake_cli: Path, tmp_path: Path
+) -> None:
+    path = socket_path(tmp_path)
+    relay = RelayServer(ClaudeAgentOptions(cli_path=fake_cli))
+    options = ClaudeAgentOptions()
+
+    async with serving(relay, path):
+        with pytest.raises(ProcessError) as exc_info:
+            async with ClaudeSDKClient(
+                options, transport=SocketTransport(path, options)
+            ) as client:
+                await client.query("crash")
+                async for _ in client.receive_response():
+                    pass
+
+    assert exc_info.value.exit_code == 7
+    assert "simulated crash" in (exc_info.value.stderr or "")
+
+
+async def test_session_runs_in_the_workers_directory(
+    fake_cli: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = socket_path(tmp_path)
+    relay = RelayServer(ClaudeAgentOptions(cli_path=fake_cli))
+    worker_dir = tmp_path / "worker"
+    worker_dir.mkdir()
+    monkeypatch.chdir(worker_dir)
+
+    transport = SocketTransport(path, ClaudeAgentOptions(), "hello")
+    assert transport._session_request()["cwd"] == str(worker_dir)
+    async with serving(relay, path):
+        async for _ in query(prompt="hello", transport=transport):
+            pass
+
+
+async def test_invalid_token_is_rejected(fake_cli: Path, tmp_path: Path) -> None:
+    path = socket_path(tmp_path)
+    relay = RelayServer(ClaudeAgentOptions(cli_path=fake_cli), token="secret")
+
+    async with serving(relay, path):
+        transport = SocketTransport(path, ClaudeAgentOptions(), "hi", token="wrong")
+        with pytest.raises(CLIConnectionError, match="Invalid token"):
+            await transport.connect()
+
+        transport = SocketTransport(path, ClaudeAgentOptions(), "hi", token="secret")
+        await transport.connect()
+        await transport.close()
+
+    assert relay.stats.rejected == 1
+
+
+async def test_unsupported_protocol_is_rejected(fake_cli: Path, tmp_path: Path) -> None:
+    path = socket_path(tmp_path)
+    relay = RelayServer(ClaudeAgentOptions(cli_path=fake_cli))
+
+    async with serving(relay, path):
+        request = {"type": "relay_session", "protocol": "other", "version": 1}
+        async with await anyio.connect_unix(path) as stream:
+            await stream.send((json.dumps(request) + "\n").encode())
+            reply = json.loads(await stream.receive())
+
+    assert reply["type"] == "relay_error"
+    assert "Unsupported protocol" in reply["message"]
+    assert relay.stats.rejected == 1
+
+
+async def test_live_relay_socket_is_not_replaced(
+    fake_cli: Path, tmp_path: Path
+) -> None:
+    path = socket_path(tmp_path)
+    options = ClaudeAgentOptions(cli_path=fake_cli)
+
+    async with serving(RelayServer(options), path):
+        with pytest.raises(OSError, match="Another relay"):
+            await RelayServer(options).serve(path)
+        assert path.exists()
+
+    # The socket of a relay that is gone is replaced
+    stale = await anyio.create_unix_listener(path)
+    await stale.aclose()
+    assert path.exists()
+    async with serving(RelayServer(options), path):
+        pass
+
+
+async def test_tcp_is_only_served_on_loopback(fake_cli: Path) -> None:
+    relay = RelayServer(ClaudeAgentOptions(cli_path=fake_cli), token="secret")
+    with pytest.raises(ValueError, match="loopback"):
+        await relay.serve(("0.0.0.0", 0))
+    with pytest.raises(ValueError, match="token"):
+        await RelayServer(ClaudeAgentOptions(cli_path=fake_cli), token="").serve(
+            ("127.0.0.1", 0)
+        )
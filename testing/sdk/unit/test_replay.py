@@ -0,0 +1,68 @@
+"""Tests for RecordingTransport and ReplayTransport."""
+
+from pathlib import Path
+
+import anyio
+import pytest
+
+from claude_agent_sdk import (
+    ClaudeAgentOptions,
+    ClaudeSDKClient,
+    RecordingTransport,
+    ReplayTransport,
+    ResultMessage,
+    TranscriptMismatchError,
+)
+
+pytestmark = pytest.mark.asyncio
+
+
+async def ask(client: ClaudeSDKClient, prompt: str) -> str | None:
+    await client.query(prompt)
+    async for message in client.receive_response():
+        if isinstance(message, ResultMessage):
+            return message.result
+    return None
+
+
+async def record(fake_cli: Path, path: Path) -> Path:
+    options = ClaudeAgentOptions(cli_path=fake_cli)
+    async with ClaudeSDKClient(
+        options, transport=RecordingTransport.cli(path, options)
+    ) as client:
+        assert await ask(client, "first") == "echo:first"
+        assert await ask(client, "second") == "echo:second"
+    return path
+
+
+async def test_replays_the_recording(fake_cli: Path, tmp_path: Path) -> None:
+    transcript = await record(fake_cli, tmp_path / "session.jsonl.gz")
+    transport = ReplayTransport(transcript, speed=None)
+    async with ClaudeSDKClient(transport=transport) as client:
+        assert await ask(client, "first") == "echo:first"
+        assert await ask(client, "second") == "echo:second"
+
+
+async def test_mismatched_write_is_rejected(fake_cli: Path, tmp_path: Path) -> None:
+    transcript = await record(fake_cli, tmp_path / "session.jsonl.gz")
+    transport = ReplayTransport(transcript, speed=None)
+    async with ClaudeSDKClient(transport=transport) as client:
+        with pytest.raises(TranscriptMismatchError) as exc_info:
+            await client.query("other")
+
+    assert exc_info.value.actual["message"]["content"] == "other"
+
+
+async def test_missing_write_times_out(fake_cli: Path, tmp_path: Path) -> None:
+    transcript = await record(fake_cli, tmp_path / "session.jsonl.gz")
+    transport = ReplayTransport(transcript, speed=None, write_timeout=0.2)
+    async with ClaudeSDKClient(transport=transport) as client:
+        assert await ask(client, "first") == "echo:first"
+
+        # The second prompt is never sent
+        with anyio.fail_after(5), pytest.raises(TranscriptMismatchError) as exc_info:
+            async for _ in client.receive_response():
+                pass
+
+    assert "Write #3 was not made" in str(exc_info.value)
+    assert exc_info.value.expected["message"]["content"] == "second"
@@ -0,0 +1,226 @@
+"""Tests for SDK MCP servers."""
+
+from typing import Any
+
+import pytest
+from jsonschema import SchemaError  # type: ignore[import-untyped,unused-ignore]
+
+from claude_agent_sdk import (
+    McpSdkServerConfig,
+    create_sdk_mcp_server,
+    prompt,
+    resource,
+    tool,
+)
+from claude_agent_sdk._internal.query import Query
+from claude_agent_sdk._internal.schema_validation import compile_validator
+
+
+@tool("find", "Find contacts of a domain", {"domain": str, "limit": int})
+async def find(args: dict[str, Any]) -> dict[str, Any]:
+    return {"content": [{"type": "text", "text": f"found {args['domain']}"}]}
+
+
+async def request(
+    server: McpSdkServerConfig, method: str, params: dict[str, Any] | None = None
+) -> dict[str, Any]:
+    # The request is handled without a transport
+    transport: Any = None
+    query = Query(transport, False, sdk_mcp_servers={"test": server["instance"]})
+    message: dict[str, Any] = {"jsonrpc": "2.0", "id": 1, "method": method}
+    if params is not None:
+        message["params"] = params
+    return await query._handle_sdk_mcp_request("test", message)
+
+
+async def call_find(arguments: dict[str, Any]) -> dict[str, Any]:
+    server = create_sdk_mcp_server("contacts", tools=[find])
+    response = await request(
+        server, "tools/call", {"name": "find", "arguments": arguments}
+    )
+    result: dict[str, Any] = response["result"]
+    return result
+
+
+@pytest.mark.asyncio
+async def test_tool_result() -> None:
+    result = await call_find({"domain": "example.com", "limit": 2})
+
+    assert result["content"] == [{"type": "text", "text": "found example.com"}]
+    assert not result.get("isError")
+
+
+@pytest.mark.asyncio
+async def test_invalid_arguments_are_a_tool_error() -> None:
+    result = await call_find({"domain": 3, "limit": 2})
+
+    assert result["isError"] is True
+    assert "'domain': 3 is not of type 'string'" in result["content"][0]["text"]
+
+
+@pytest.mark.parametrize(
+    ("arguments", "error"),
+    [
+        ({"code": "ab"}, None),
+        ({"code": "a1"}, "does not match"),
+        ({"code": 5}, None),
+        ({"code": 500}, None),
+        ({"code": 50}, "is valid under each of"),
+        ({}, "'code' is a required property"),
+    ],
+)
+def test_validator_follows_json_schema(
+    arguments: dict[str, Any], error: str | None
+) -> None:
+    validate = compile_validator(
+        {
+            "type": "object",
+            "properties": {
+                "code": {
+                    "oneOf": [
+                        {"type": "string", "pattern": "^[a-z]+$"},
+                        {"type": "integer", "minimum": 10},
+                        {"type": "number", "maximum": 100},
+                    ]
+                }
+            },
+            "required": ["code"],
+        }
+    )
+    if error is None:
+        assert validate(arguments) is None
+    else:
+        assert error in (validate(arguments) or "")
+
+
+def test_invalid_schema_is_rejected_when_the_server_is_created() -> None:
+    @tool("broken", "Tool with an invalid schema", {"type": "object", "properties": 1})
+    async def broken(args: dict[str, Any]) -> dict[str, Any]:
+        return {"content": []}
+
+    with pytest.raises(SchemaError):
+        create_sdk_mcp_server("broken", tools=[broken])
+
+
+@resource("docs://guide", "Guide", mime_type="text/markdown")
+async def guide(params: dict[str, str]) -> str:
+    return "# Guide"
+
+
+@resource("docs://logo", "Logo", mime_type="image/png")
+async def logo(params: dict[str, str]) -> bytes:
+    return b"\x89PNG"
+
+
+@resource("docs://faq", "FAQ")
+async def faq(params: dict[str, str]) -> str:
+    return "Q: A"
+
+
+@resource("docs://guide/{section}", "Guide section")
+async def guide_section(params: dict[str, str]) -> str:
+    return f"Section {params['section']}"
+
+
+@prompt("summarize", "Summarize a course", {"course": "Course name"})
+async def summarize(args: dict[str, str]) -> str:
+    return f"Summarize {args['course']}."
+
+
+def docs_server() -> McpSdkServerConfig:
+    return create_sdk_mcp_server(
+        "docs",
+        resources=[guide, logo, faq, guide_section],
+        prompts=[summarize],
+        page_size=2,
+    )
+
+
+@pytest.mark.asyncio
+async def test_initialize_advertises_resources_and_prompts() -> None:
+    response = await request(docs_server(), "initialize", {})
+
+    capabilities = response["result"]["capabilities"]
+    assert "resources" in capabilities
+    assert "prompts" in capabilities
+    # Changes are never announced, so none are advertised
+    assert not capabilities["resources"].get("listChanged")
+
+
+@pytest.mark.asyncio
+async def test_resources_are_listed_in_pages() -> None:
+    server = docs_server()
+
+    first = (await request(server, "resources/list"))["result"]
+    assert [r["uri"] for r in first["resources"]] == ["docs://guide", "docs://logo"]
+    second = (await request(server, "resources/list", {"cursor": first["nextCursor"]}))[
+        "result"
+    ]
+    assert [r["uri"] for r in second["resources"]] == ["docs://faq"]
+    assert "nextCursor" not in second
+
+    templates = (await request(server, "resources/templates/list"))["result"]
+    assert [t["uriTemplate"] for t in templates["resourceTemplates"]] == [
+        "docs://guide/{section}"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_invalid_cursor_is_an_error() -> None:
+    response = await request(docs_server(), "resources/list", {"cursor": "x"})
+
+    assert response["error"]["code"] == -32603
+    assert "Invalid cursor" in response["error"]["message"]
+
+
+@pytest.mark.asyncio
+async def test_resources_are_read_by_uri_or_template() -> None:
+    server = docs_server()
+
+    text = await request(server, "resources/read", {"uri": "docs://guide"})
+    assert text["result"]["contents"] == [
+        {"uri": "docs://guide", "mimeType": "text/markdown", "text": "# Guide"}
+    ]
+    blob = await request(server, "resources/read", {"uri": "docs://logo"})
+    assert blob["result"]["contents"][0]["blob"] == "iVBORw=="
+    section = await request(server, "resources/read", {"uri": "docs://guide/intro"})
+    assert section["result"]["contents"][0]["text"] == "Section intro"
+
+    missing = await request(server, "resources/read", {"uri": "docs://other"})
+    assert "not found" in missing["error"]["message"]
+
+
+@pytest.mark.asyncio
+async def test_prompts_are_listed_and_rendered() -> None:
+    server = docs_server()
+
+    listed = (await request(server, "prompts/list"))["result"]
+    assert listed["prompts"] == [
+        {
+            "name": "summarize",
+            "description": "Summarize a course",
+            "arguments": [
+                {"name": "course", "description": "Course name", "required": True}
+            ],
+        }
+    ]
+    rendered = await request(
+        server, "prompts/get", {"name": "summarize", "arguments": {"course": "Golf"}}
+    )
+    assert rendered["result"]["messages"] == [
+        {"role": "user", "content": {"type": "text", "text": "Summarize Golf."}}
+    ]
+
+    missing = await request(server, "prompts/get", {"name": "summarize"})
+    assert "Missing arguments" in missing["error"]["message"]
+
+
+@pytest.mark.asyncio
+async def test_unknown_and_invalid_requests_are_json_rpc_errors() -> None:
+    server = create_sdk_mcp_server("contacts", tools=[find])
+
+    # The server has no prompts
+    unknown = await request(server, "prompts/list")
+    assert unknown["error"]["code"] == -32601
+    invalid = await request(server, "tools/call", {"arguments": {}})
+    assert invalid["error"]["code"] == -32602
@@ -0,0 +1,123 @@
+"""Tests for the shared context of SDK MCP servers."""
+
+from collections.abc import AsyncIterator
+from typing import Any
+
+import anyio
+import pytest
+
+from claude_agent_sdk import (
+    ClaudeAgentOptions,
+    Transport,
+    create_sdk_mcp_server,
+    invoke_tool,
+    tool,
+)
+from claude_agent_sdk._internal.query import Query
+
+pytestmark = pytest.mark.asyncio
+
+
+class Pool:
+    """Context recording when it is entered and exited."""
+
+    def __init__(self, events: list[str], name: str = "pool") -> None:
+        self.events = events
+        self.name = name
+
+    async def __aenter__(self) -> "Pool":
+        self.events.append(f"enter {self.name}")
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self.events.append(f"exit {self.name}")
+
+
+class FailingPool(Pool):
+    async def __aenter__(self) -> "Pool":
+        raise OSError("no connection")
+
+
+class IdleTransport(Transport):
+    """Transport that never reads a message and may fail to close."""
+
+    def __init__(self, close_error: Exception | None = None) -> None:
+        self.close_error = close_error
+
+    async def connect(self) -> None:
+        pass
+
+    async def write(self, data: str) -> None:
+        pass
+
+    async def read_messages(self) -> AsyncIterator[dict[str, Any]]:
+        await anyio.sleep_forever()
+        yield {}
+
+    async def close(self) -> None:
+        if self.close_error is not None:
+            raise self.close_error
+
+    def is_ready(self) -> bool:
+        return True
+
+    async def end_input(self) -> None:
+        pass
+
+
+def pool_server(pool: Pool) -> Any:
+    return create_sdk_mcp_server(pool.name, context=pool)["instance"]
+
+
+async def test_context_is_passed_only_to_a_context_parameter() -> None:
+    pool = Pool([])
+    received: dict[str, Any] = {}
+
+    @tool("plain", "Plain", {})
+    async def plain(args: dict[str, Any], extra: Any = None) -> dict[str, Any]:
+        received["plain"] = extra
+        return {"content": []}
+
+    @tool("keyword", "Keyword", {})
+    async def keyword(args: dict[str, Any], *, context: Pool) -> dict[str, Any]:
+        received["keyword"] = context
+        return {"content": []}
+
+    server = create_sdk_mcp_server("pool", tools=[plain, keyword], context=pool)
+    options = ClaudeAgentOptions(mcp_servers={"pool": server})
+    await invoke_tool("mcp__pool__plain", {}, options)
+    await invoke_tool("mcp__pool__keyword", {}, options)
+
+    assert received == {"plain": None, "keyword": pool}
+
+
+async def test_failed_start_releases_the_contexts_already_entered() -> None:
+    events: list[str] = []
+    query = Query(
+        IdleTransport(),
+        True,
+        sdk_mcp_servers={
+            "first": pool_server(Pool(events, "first")),
+            "second": pool_server(FailingPool(events, "second")),
+        },
+    )
+
+    with pytest.raises(OSError, match="no connection"):
+        await query.start()
+
+    assert events == ["enter first", "exit first"]
+
+
+async def test_close_releases_the_contexts_when_the_transport_fails() -> None:
+    events: list[str] = []
+    query = Query(
+        IdleTransport(close_error=OSError("broken pipe")),
+        True,
+        sdk_mcp_servers={"pool": pool_server(Pool(events))},
+    )
+    await query.start()
+
+    with pytest.raises(OSError, match="broken pipe"):
+        await query.close()
+
+    assert events == ["enter pool", "exit pool"]
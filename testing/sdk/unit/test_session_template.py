@@ -0,0 +1,73 @@
+"""Tests for SessionTemplate."""
+
+import json
+from contextlib import aclosing
+from pathlib import Path
+
+import anyio
+import pytest
+
+from claude_agent_sdk import (
+    ClaudeAgentOptions,
+    ProcessError,
+    ResultMessage,
+    SessionTemplate,
+)
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_query_many_forks_the_primed_session(
+    fake_cli: Path, tmp_path: Path
+) -> None:
+    argv_log = tmp_path / "argv.log"
+    template = SessionTemplate(
+        "context",
+        ClaudeAgentOptions(
+            cli_path=fake_cli, env={"FAKE_CLAUDE_ARGV_LOG": str(argv_log)}
+        ),
+    )
+    results: dict[int, str | None] = {}
+    async for index, message in template.query_many(["a", "b"]):
+        if isinstance(message, ResultMessage):
+            results[index] = message.result
+
+    assert template.session_id == "s1"
+    assert results == {0: "echo:a", 1: "echo:b"}
+    prime, *forks = [json.loads(line) for line in argv_log.read_text().splitlines()]
+    assert "--resume" not in prime
+    assert len(forks) == 2
+    for argv in forks:
+        assert argv[argv.index("--resume") + 1] == "s1"
+        assert "--fork-session" in argv
+
+
+async def test_query_many_break_leaves_the_consumer_usable(fake_cli: Path) -> None:
+    template = SessionTemplate("context", ClaudeAgentOptions(cli_path=fake_cli))
+    await template.prime()
+    template.options = ClaudeAgentOptions(
+        cli_path=fake_cli, env={"FAKE_CLAUDE_DELAY": "0.2"}
+    )
+
+    async with aclosing(template.query_many(["a", "b", "c"])) as messages:
+        async for _ in messages:
+            break
+
+    messages = template.query_many(["a", "b", "c"])
+    async for _ in messages:
+        break
+
+    await anyio.sleep(0.05)
+    await messages.aclose()
+
+
+async def test_query_many_raises_the_failure(fake_cli: Path) -> None:
+    template = SessionTemplate("context", ClaudeAgentOptions(cli_path=fake_cli))
+    prompts: list[str | tuple[str, dict[str, object]]] = [
+        ("fails", {"env": {"FAKE_CLAUDE_EXIT": "1"}}),
+    ]
+
+    with pytest.raises(ProcessError):
+        async for _ in template.query_many(prompts):
+            await anyio.sleep(0.5)
+    await anyio.sleep(0)
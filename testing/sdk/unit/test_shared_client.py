@@ -0,0 +1,106 @@
+"""Tests for SharedClaudeSDKClient."""
+
+from collections.abc import Sequence
+from pathlib import Path
+
+import anyio
+import pytest
+
+from claude_agent_sdk import (
+    ClaudeAgentOptions,
+    CLIConnectionError,
+    ProcessError,
+    ReconnectPolicy,
+    ResultMessage,
+    SharedClaudeSDKClient,
+)
+
+pytestmark = pytest.mark.asyncio
+
+
+def result_text(messages: Sequence[object]) -> str | None:
+    result = messages[-1]
+    assert isinstance(result, ResultMessage)
+    return result.result
+
+
+async def test_pending_turns_hold_no_worker_threads(fake_cli: Path) -> None:
+    options = ClaudeAgentOptions(cli_path=fake_cli, env={"FAKE_CLAUDE_DELAY": "0.01"})
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    # More pending turns than the default limiter has threads
+    turns = int(limiter.total_tokens) + 10
+    results: dict[int, str | None] = {}
+    borrowed: list[float] = []
+
+    async def ask(client: SharedClaudeSDKClient, i: int) -> None:
+        results[i] = result_text(await client.ask(f"prompt {i}"))
+
+    async with SharedClaudeSDKClient(options) as client:
+        with anyio.fail_after(30):
+            async with anyio.create_task_group() as tg:
+                for i in range(turns):
+                    tg.start_soon(ask, client, i)
+                await anyio.sleep(0.1)
+                borrowed.append(limiter.borrowed_tokens)
+
+    assert borrowed == [0]
+    assert results == {i: f"echo:prompt {i}" for i in range(turns)}
+
+
+async def test_cancelled_waiting_turn_is_withdrawn(
+    fake_cli: Path, tmp_path: Path
+) -> None:
+    log = tmp_path / "prompts.log"
+    options = ClaudeAgentOptions(
+        cli_path=fake_cli,
+        env={"FAKE_CLAUDE_DELAY": "0.3", "FAKE_CLAUDE_LOG": str(log)},
+    )
+
+    async with SharedClaudeSDKClient(options) as client:
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(client.ask, "first")
+            await anyio.sleep(0.05)
+            with anyio.move_on_after(0.1) as scope:
+                await client.ask("withdrawn")
+            assert scope.cancelled_caught
+
+        assert result_text(await client.ask("last")) == "echo:last"
+
+    assert log.read_text().split() == ["first", "last"]
+
+
+async def test_cancelled_running_turn_does_not_disturb_the_next(
+    fake_cli: Path,
+) -> None:
+    options = ClaudeAgentOptions(cli_path=fake_cli, env={"FAKE_CLAUDE_DELAY": "0.3"})
+
+    async with SharedClaudeSDKClient(options) as client:
+        with anyio.move_on_after(0.1):
+            await client.ask("abandoned")
+
+        assert result_text(await client.ask("next")) == "echo:next"
+
+
+async def test_failed_turn_raises_and_leaves_the_client_usable(
+    fake_cli: Path,
+) -> None:
+    options = ClaudeAgentOptions(cli_path=fake_cli)
+
+    async with SharedClaudeSDKClient(options) as client:
+        with pytest.raises(ProcessError, match="simulated crash"):
+            await client.ask("crash")
+
+        # The session outlives the failed turn, failing later turns cleanly
+        with pytest.raises(CLIConnectionError):
+            await client.ask("after")
+        assert client.connected
+
+
+async def test_failed_turn_is_followed_by_a_reconnected_one(fake_cli: Path) -> None:
+    options = ClaudeAgentOptions(cli_path=fake_cli, reconnect=ReconnectPolicy())
+
+    async with SharedClaudeSDKClient(options) as client:
+        with pytest.raises(ProcessError, match="simulated crash"):
+            await client.ask("crash")
+
+        assert result_text(await client.ask("after")) == "echo:after"
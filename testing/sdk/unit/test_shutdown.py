@@ -0,0 +1,77 @@
+"""Tests for stopping Claude Code processes."""
+
+import logging
+import sys
+from pathlib import Path
+
+import anyio
+import pytest
+
+from claude_agent_sdk import (
+    ClaudeAgentOptions,
+    ClaudeSDKClient,
+    ShutdownPolicy,
+    ShutdownStats,
+)
+
+pytestmark = [
+    pytest.mark.asyncio,
+    pytest.mark.skipif(sys.platform == "win32", reason="Uses POSIX signals"),
+]
+
+
+async def run_session(fake_cli: Path, stats: ShutdownStats, **env: str) -> None:
+    options = ClaudeAgentOptions(
+        cli_path=fake_cli,
+        env=env,
+        shutdown=ShutdownPolicy(exit_timeout=0.2, terminate_timeout=0.2, stats=stats),
+    )
+    with anyio.fail_after(10):
+        async with ClaudeSDKClient(options) as client:
+            await client.query("hello")
+            async for _ in client.receive_response():
+                pass
+
+
+async def test_process_exiting_on_end_of_input(fake_cli: Path) -> None:
+    stats = ShutdownStats()
+
+    await run_session(fake_cli, stats)
+
+    assert (stats.exited, stats.terminated, stats.killed) == (1, 0, 0)
+
+
+async def test_lingering_process_is_terminated(fake_cli: Path) -> None:
+    stats = ShutdownStats()
+
+    await run_session(fake_cli, stats, FAKE_CLAUDE_LINGER="30")
+
+    assert (stats.exited, stats.terminated, stats.killed) == (0, 1, 0)
+    assert stats.max_wait_s >= 0.2
+
+
+async def test_process_ignoring_sigterm_is_killed(
+    fake_cli: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    stats = ShutdownStats()
+
+    with caplog.at_level(logging.WARNING):
+        await run_session(
+            fake_cli, stats, FAKE_CLAUDE_LINGER="30", FAKE_CLAUDE_IGNORE_SIGTERM="1"
+        )
+
+    assert (stats.exited, stats.terminated, stats.killed) == (0, 0, 1)
+    assert stats.unreaped == 0
+    assert stats.max_wait_s >= 0.4
+    assert "did not exit after SIGTERM" in caplog.text
+
+
+async def test_stats_are_shared_between_sessions(fake_cli: Path) -> None:
+    stats = ShutdownStats()
+
+    await run_session(fake_cli, stats)
+    await run_session(fake_cli, stats, FAKE_CLAUDE_LINGER="30")
+
+    assert (stats.exited, stats.terminated) == (1, 1)
+    assert stats.mean_wait_s == pytest.approx(stats.total_wait_s / 2)
+    assert stats.max_wait_s >= 0.2
@@ -0,0 +1,72 @@
+"""Tests for delivering Claude Code's stderr to callbacks."""
+
+import threading
+import time
+from pathlib import Path
+
+import anyio
+import pytest
+
+from claude_agent_sdk import (
+    ClaudeAgentOptions,
+    ClaudeSDKClient,
+    ProcessError,
+    StderrEvent,
+)
+from claude_agent_sdk._internal.stderr import StderrDispatcher
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_lines_before_a_crash_reach_slow_callbacks(fake_cli: Path) -> None:
+    lines: list[str] = []
+    events: list[StderrEvent] = []
+    threads: set[int] = set()
+
+    def on_line(line: str) -> None:
+        threads.add(threading.get_ident())
+        time.sleep(0.05)
+        lines.append(line)
+
+    options = ClaudeAgentOptions(
+        cli_path=fake_cli,
+        env={"FAKE_CLAUDE_STDERR_LINES": "20"},
+        stderr=on_line,
+        stderr_events=events.append,
+    )
+    with pytest.raises(ProcessError) as exc_info:
+        async with ClaudeSDKClient(options) as client:
+            await client.query("crash")
+            async for _ in client.receive_response():
+                pass
+
+    expected = [f"line {i}" for i in range(20)] + ["fatal: simulated crash"]
+    assert lines == expected
+    assert [event.line for event in events] == expected
+    assert threading.get_ident() not in threads
+    assert "fatal: simulated crash" in (exc_info.value.stderr or "")
+
+
+async def test_abandoned_lines_are_counted_as_dropped() -> None:
+    release = threading.Event()
+    delivered: list[str] = []
+
+    def on_line(line: str) -> None:
+        release.wait(5)
+        delivered.append(line)
+
+    dispatcher = StderrDispatcher(time.monotonic(), on_line, None)
+    for i in range(5):
+        dispatcher.put(f"line {i}")
+    dispatcher.close()
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(dispatcher.run)
+        with anyio.move_on_after(0.1):
+            await dispatcher.wait_delivered()
+        dispatcher.abandon()
+        release.set()
+
+    assert len(delivered) == 1
+    # The line being delivered when abandoned is not counted
+    assert dispatcher.dropped == 4
@@ -0,0 +1,121 @@
+"""Tests for parsing the structured output of a response."""
+
+from pathlib import Path
+from typing import Any
+
+import anyio
+import pytest
+from pydantic import BaseModel
+
+from claude_agent_sdk import ClaudeAgentOptions, ClaudeSDKClient, ResultMessage
+from claude_agent_sdk._internal.structured_output import (
+    apply_structured_output,
+    extract_json,
+    output_instruction,
+    parse_structured_output,
+)
+
+CITY_SCHEMA = {
+    "type": "object",
+    "properties": {"city": {"type": "string"}},
+    "required": ["city"],
+}
+
+
+class City(BaseModel):
+    city: str
+
+
+def result_message(text: str, is_error: bool = False) -> ResultMessage:
+    return ResultMessage(
+        subtype="error_during_execution" if is_error else "success",
+        duration_ms=1,
+        duration_api_ms=1,
+        is_error=is_error,
+        num_turns=1,
+        session_id="s1",
+        result=text,
+    )
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ('{"city": "Paris"}', {"city": "Paris"}),
+        ("  [1, 2]\n", [1, 2]),
+        ('Here it is:\n```json\n{"city": "Paris"}\n```\n', {"city": "Paris"}),
+        ('Draft {"city": "Lyon"}, final {"city": "Paris"}', {"city": "Paris"}),
+        ('Use {braces} and [brackets]: {"city": "Paris"}', {"city": "Paris"}),
+        (
+            '{"city": "Paris", "tags": ["a", {"b": 1}]} done',
+            {"city": "Paris", "tags": ["a", {"b": 1}]},
+        ),
+    ],
+)
+def test_extract_json(text: str, expected: Any) -> None:
+    assert extract_json(text) == expected
+
+
+def test_extract_json_without_json() -> None:
+    with pytest.raises(ValueError, match="no JSON value found"):
+        extract_json("The city is {Paris")
+
+
+def test_output_is_validated_against_a_json_schema() -> None:
+    assert parse_structured_output('{"city": "Paris"}', CITY_SCHEMA) == (
+        {"city": "Paris"},
+        None,
+    )
+
+    value, error = parse_structured_output('{"town": "Paris"}', CITY_SCHEMA)
+    assert value is None
+    assert error is not None and "'city' is a required property" in error
+
+    assert parse_structured_output("", CITY_SCHEMA) == (None, "the response is empty")
+
+
+def test_output_is_validated_by_a_pydantic_model() -> None:
+    assert parse_structured_output('{"city": "Paris"}', City) == (
+        City(city="Paris"),
+        None,
+    )
+
+    value, error = parse_structured_output('{"city": 1}', City)
+    assert value is None
+    assert error is not None and "city" in error
+
+
+def test_instruction_includes_the_schema() -> None:
+    assert '"required": ["city"]' in output_instruction(CITY_SCHEMA)
+    assert '"title": "City"' in output_instruction(City)
+
+
+def test_only_successful_results_are_parsed() -> None:
+    error = apply_structured_output(result_message('{"city": "Paris"}', True), City)
+    success = apply_structured_output(result_message('{"city": "Paris"}'), City)
+    unset = apply_structured_output(result_message('{"city": "Paris"}'), None)
+
+    assert isinstance(error, ResultMessage) and error.structured_output is None
+    assert isinstance(success, ResultMessage)
+    assert success.structured_output == City(city="Paris")
+    assert isinstance(unset, ResultMessage) and unset.structured_output is None
+
+
+@pytest.mark.asyncio
+async def test_result_message_carries_the_structured_output(fake_cli: Path) -> None:
+    # The fake CLI echoes each prompt as its result
+    options = ClaudeAgentOptions(cli_path=fake_cli, output_schema=CITY_SCHEMA)
+    results: list[ResultMessage] = []
+
+    with anyio.fail_after(10):
+        async with ClaudeSDKClient(options) as client:
+            for prompt in ('Done: {"city": "Paris"}', "Paris"):
+                await client.query(prompt)
+                async for message in client.receive_response():
+                    if isinstance(message, ResultMessage):
+                        results.append(message)
+
+    assert results[0].structured_output == {"city": "Paris"}
+    assert results[0].structured_output_error is None
+    assert results[1].structured_output is None
+    assert results[1].structured_output_error == "no JSON value found in the response"
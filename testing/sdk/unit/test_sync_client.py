@@ -0,0 +1,53 @@
+"""Tests for SyncClaudeClient."""
+
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from claude_agent_sdk import (
+    AssistantMessage,
+    ClaudeAgentOptions,
+    CLIConnectionError,
+    ProcessError,
+    ResultMessage,
+    SyncClaudeClient,
+)
+
+
+def result_text(messages: Sequence[object]) -> str | None:
+    result = messages[-1]
+    assert isinstance(result, ResultMessage)
+    return result.result
+
+
+def test_query_and_stream(fake_cli: Path) -> None:
+    with SyncClaudeClient(ClaudeAgentOptions(cli_path=fake_cli)) as client:
+        assert result_text(client.query("first")) == "echo:first"
+
+        streamed = list(client.stream("second"))
+        assert isinstance(streamed[0], AssistantMessage)
+        assert result_text(streamed) == "echo:second"
+
+        with ThreadPoolExecutor(4) as pool:
+            results = list(pool.map(client.query, [f"p{i}" for i in range(8)]))
+        assert [result_text(r) for r in results] == [f"echo:p{i}" for i in range(8)]
+
+    assert not client.connected
+
+
+def test_crash_raises_from_query(fake_cli: Path) -> None:
+    with SyncClaudeClient(ClaudeAgentOptions(cli_path=fake_cli)) as client:
+        with pytest.raises(ProcessError, match="simulated crash"):
+            client.query("crash")
+        with pytest.raises(CLIConnectionError):
+            client.query("after")
+
+
+def test_crash_raises_from_stream(fake_cli: Path) -> None:
+    with SyncClaudeClient(ClaudeAgentOptions(cli_path=fake_cli)) as client:
+        with pytest.raises(ProcessError, match="simulated crash"):
+            list(client.stream("crash"))
+        with pytest.raises(CLIConnectionError):
+            list(client.stream("after"))
@@ -0,0 +1,126 @@
+"""Tests for SDK MCP tools run in a worker thread or process."""
+
+import os
+import threading
+import time
+from typing import Any
+
+import anyio
+import pytest
+
+from claude_agent_sdk import (
+    ClaudeAgentOptions,
+    create_sdk_mcp_server,
+    invoke_tool,
+    tool,
+    tool_session,
+)
+
+
+@tool("where", "Report where the tool ran", {}, executor="process")
+def where(args: dict[str, Any]) -> dict[str, Any]:
+    return {"content": [{"type": "text", "text": str(os.getpid())}]}
+
+
+def text_of(result: Any) -> str:
+    text: str = result.text
+    return text
+
+
+@pytest.mark.asyncio
+async def test_thread_executor_runs_off_the_event_loop() -> None:
+    @tool("where", "Report where the tool ran", {}, executor="thread")
+    def where_thread(args: dict[str, Any]) -> dict[str, Any]:
+        return {"content": [{"type": "text", "text": str(threading.get_ident())}]}
+
+    server = create_sdk_mcp_server("pool", tools=[where_thread])
+    options = ClaudeAgentOptions(mcp_servers={"pool": server})
+
+    result = await invoke_tool("mcp__pool__where", {}, options)
+
+    assert text_of(result) != str(threading.get_ident())
+
+
+@pytest.mark.asyncio
+async def test_process_executor_runs_in_another_process() -> None:
+    server = create_sdk_mcp_server("pool", tools=[where])
+    options = ClaudeAgentOptions(mcp_servers={"pool": server})
+
+    result = await invoke_tool("mcp__pool__where", {}, options)
+
+    assert text_of(result) != str(os.getpid())
+
+
+def limited_options(max_workers: int) -> tuple[ClaudeAgentOptions, list[int]]:
+    running = 0
+    peaks: list[int] = []
+    lock = threading.Lock()
+
+    @tool("work", "Work", {}, executor="thread", max_workers=max_workers)
+    def work(args: dict[str, Any]) -> dict[str, Any]:
+        nonlocal running
+        with lock:
+            running += 1
+            peaks.append(running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        return {"content": []}
+
+    server = create_sdk_mcp_server("pool", tools=[work])
+    return ClaudeAgentOptions(mcp_servers={"pool": server}), peaks
+
+
+async def call_concurrently(options: ClaudeAgentOptions, calls: int) -> None:
+    async with tool_session(options), anyio.create_task_group() as tg:
+        for _ in range(calls):
+            tg.start_soon(invoke_tool, "mcp__pool__work", {}, options)
+
+
+@pytest.mark.asyncio
+async def test_max_workers_bounds_concurrent_calls() -> None:
+    options, peaks = limited_options(max_workers=2)
+
+    await call_concurrently(options, 6)
+
+    assert len(peaks) == 6
+    assert max(peaks) == 2
+
+
+def test_limit_holds_in_each_session() -> None:
+    options, peaks = limited_options(max_workers=1)
+
+    # Each session runs on its own event loop, with its own limiter
+    for _ in range(2):
+        anyio.run(call_concurrently, options, 3)
+
+    assert peaks == [1] * 6
+
+
+def test_executor_tool_must_be_sync() -> None:
+    with pytest.raises(TypeError, match="must be a regular function"):
+
+        @tool("work", "Work", {}, executor="thread")
+        async def work(args: dict[str, Any]) -> dict[str, Any]:
+            return {"content": []}
+
+
+def test_process_executor_tool_must_not_be_a_local_function() -> None:
+    with pytest.raises(ValueError, match="defined at module level"):
+
+        @tool("work", "Work", {}, executor="process")
+        def work(args: dict[str, Any]) -> dict[str, Any]:
+            return {"content": []}
+
+
+def test_executor_tool_cannot_take_the_server_context() -> None:
+    with pytest.raises(TypeError, match="can't take the server context"):
+
+        @tool("work", "Work", {}, executor="thread")  # type: ignore[arg-type]
+        def work(args: dict[str, Any], context: Any) -> dict[str, Any]:
+            return {"content": []}
+
+
+def test_max_workers_must_be_positive() -> None:
+    with pytest.raises(ValueError, match="at least 1"):
+        tool("work", "Work", {}, executor="thread", max_workers=0)
@@ -0,0 +1,133 @@
+"""Tests for invoke_tool()."""
+
+from typing import Any
+
+import pytest
+
+from claude_agent_sdk import (
+    ClaudeAgentOptions,
+    HookContext,
+    HookInput,
+    HookJSONOutput,
+    HookMatcher,
+    PermissionResultAllow,
+    ToolPermissionContext,
+    create_sdk_mcp_server,
+    invoke_tool,
+    tool,
+    tool_session,
+)
+
+pytestmark = pytest.mark.asyncio
+
+
+def greeting_options(calls: list[str], **kwargs: Any) -> ClaudeAgentOptions:
+    @tool("greet", "Greet someone", {"name": str})
+    async def greet(args: dict[str, Any]) -> dict[str, Any]:
+        calls.append(f"tool {args['name']}")
+        return {"content": [{"type": "text", "text": f"Hello {args['name']}"}]}
+
+    server = create_sdk_mcp_server("greeter", tools=[greet])
+    return ClaudeAgentOptions(mcp_servers={"greeter": server}, **kwargs)
+
+
+async def test_hooks_and_permission_run_around_the_tool_in_order() -> None:
+    calls: list[str] = []
+
+    async def pre_tool_use(
+        hook_input: HookInput, tool_use_id: str | None, context: HookContext
+    ) -> HookJSONOutput:
+        assert hook_input["hook_event_name"] == "PreToolUse"
+        calls.append(f"PreToolUse {hook_input['tool_input']['name']}")
+        return {
+            "hookSpecificOutput": {
+                "hookEventName": "PreToolUse",
+                "updatedInput": {"name": "Grace"},
+            }
+        }
+
+    async def post_tool_use(
+        hook_input: HookInput, tool_use_id: str | None, context: HookContext
+    ) -> HookJSONOutput:
+        assert hook_input["hook_event_name"] == "PostToolUse"
+        calls.append(f"PostToolUse {hook_input['tool_response'][0]['text']}")
+        return {
+            "hookSpecificOutput": {
+                "hookEventName": "PostToolUse",
+                "additionalContext": "greeted",
+            }
+        }
+
+    async def can_use_tool(
+        name: str, arguments: dict[str, Any], context: ToolPermissionContext
+    ) -> PermissionResultAllow:
+        calls.append(f"can_use_tool {arguments['name']}")
+        return PermissionResultAllow()
+
+    options = greeting_options(
+        calls,
+        can_use_tool=can_use_tool,
+        hooks={
+            "PreToolUse": [HookMatcher("mcp__greeter__.*", [pre_tool_use])],
+            "PostToolUse": [HookMatcher(None, [post_tool_use])],
+        },
+    )
+    result = await invoke_tool("mcp__greeter__greet", {"name": "Ada"}, options)
+
+    assert calls == [
+        "PreToolUse Ada",
+        "can_use_tool Grace",
+        "tool Grace",
+        "PostToolUse Hello Grace",
+    ]
+    assert result.arguments == {"name": "Grace"}
+    assert result.text == "Hello Grace"
+    assert result.additional_context == ["greeted"]
+    assert not result.denied
+
+
+async def test_disallowed_tool_is_denied_without_running() -> None:
+    calls: list[str] = []
+    options = greeting_options(calls, disallowed_tools=["mcp__greeter__greet"])
+
+    result = await invoke_tool("mcp__greeter__greet", {"name": "Ada"}, options)
+
+    assert result.denied
+    assert result.deny_reason == "mcp__greeter__greet is disallowed"
+    assert calls == []
+
+
+async def test_unknown_server_is_rejected() -> None:
+    with pytest.raises(ValueError, match="not a tool of an SDK MCP server"):
+        await invoke_tool("mcp__missing__greet", {}, greeting_options([]))
+
+
+async def test_session_activates_the_shared_context_once() -> None:
+    opened: list[int] = []
+
+    class Pool:
+        async def __aenter__(self) -> "Pool":
+            opened.append(1)
+            return self
+
+        async def __aexit__(self, *exc_info: Any) -> None:
+            pass
+
+    @tool("ping", "Ping", {})
+    async def ping(args: dict[str, Any], context: Pool) -> dict[str, Any]:
+        assert isinstance(context, Pool)
+        return {"content": [{"type": "text", "text": "pong"}]}
+
+    server = create_sdk_mcp_server("pool", tools=[ping], context=Pool)
+    options = ClaudeAgentOptions(mcp_servers={"pool": server})
+
+    for _ in range(3):
+        await invoke_tool("mcp__pool__ping", {}, options)
+    assert len(opened) == 3
+
+    opened.clear()
+    async with tool_session(options):
+        for _ in range(3):
+            result = await invoke_tool("mcp__pool__ping", {}, options)
+            assert result.text == "pong"
+    assert len(opened) == 1
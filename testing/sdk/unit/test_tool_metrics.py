@@ -0,0 +1,138 @@
+"""Tests for SDK MCP tool call statistics and tracing."""
+
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
+from typing import Any
+
+import pytest
+
+from claude_agent_sdk import ToolCallMetrics, create_sdk_mcp_server, tool
+from claude_agent_sdk._internal.query import Query
+
+
+@tool("find", "Find a contact", {"name": str})
+async def find(args: dict[str, Any]) -> dict[str, Any]:
+    return {"content": [{"type": "text", "text": f"found {args['name']}"}]}
+
+
+async def call_find(metrics: ToolCallMetrics, params: dict[str, Any]) -> dict[str, Any]:
+    # The request is handled without a transport
+    transport: Any = None
+    server = create_sdk_mcp_server("contacts", tools=[find])
+    query = Query(
+        transport,
+        False,
+        sdk_mcp_servers={"contacts": server["instance"]},
+        tool_metrics=metrics,
+    )
+    message = {"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": params}
+    return await query._handle_sdk_mcp_request("contacts", message)
+
+
+class RecordingSpan:
+    def __init__(self, name: str, attributes: Mapping[str, Any]) -> None:
+        self.name = name
+        self.attributes = dict(attributes)
+        self.exceptions: list[BaseException] = []
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_exception(self, exception: BaseException) -> None:
+        self.exceptions.append(exception)
+
+
+class RecordingTracer:
+    def __init__(self) -> None:
+        self.spans: list[RecordingSpan] = []
+
+    @contextmanager
+    def start_as_current_span(
+        self, name: str, *, attributes: Mapping[str, Any]
+    ) -> Iterator[RecordingSpan]:
+        span = RecordingSpan(name, attributes)
+        self.spans.append(span)
+        yield span
+
+
+@pytest.mark.asyncio
+async def test_calls_and_errors_are_counted_per_tool() -> None:
+    metrics = ToolCallMetrics()
+
+    await call_find(metrics, {"name": "find", "arguments": {"name": "Ada"}})
+    await call_find(metrics, {"name": "find", "arguments": {"name": 1}})
+
+    stats = metrics.stats()["mcp__contacts__find"]
+    assert (stats.count, stats.errors, stats.error_rate) == (2, 1, 0.5)
+    assert stats.bytes_in == len('{"name": "Ada"}') + len('{"name": 1}')
+    assert stats.bytes_out > 0
+    assert stats.max_ms >= stats.p50_ms > 0
+
+
+@pytest.mark.asyncio
+async def test_malformed_call_is_counted_as_an_error() -> None:
+    metrics = ToolCallMetrics()
+
+    response = await call_find(metrics, {"name": "find", "arguments": "Ada"})
+
+    assert response["error"]["code"] == -32602
+    stats = metrics.stats()["mcp__contacts__find"]
+    assert (stats.count, stats.errors) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_calls_are_traced() -> None:
+    tracer = RecordingTracer()
+    metrics = ToolCallMetrics(tracer=tracer)
+
+    await call_find(
+        metrics,
+        {
+            "name": "find",
+            "arguments": {"name": "Ada"},
+            "_meta": {"claudecode/toolUseId": "toolu_1"},
+        },
+    )
+
+    [span] = tracer.spans
+    assert span.name == "tools/call mcp__contacts__find"
+    assert span.attributes == {
+        "mcp.tool.name": "mcp__contacts__find",
+        "mcp.tool.bytes_in": len('{"name": "Ada"}'),
+        "claude.tool_use_id": "toolu_1",
+        "mcp.tool.is_error": False,
+        "mcp.tool.bytes_out": metrics.stats()["mcp__contacts__find"].bytes_out,
+    }
+
+
+@pytest.mark.asyncio
+async def test_failed_call_is_recorded_and_reraised() -> None:
+    tracer = RecordingTracer()
+    metrics = ToolCallMetrics(tracer=tracer)
+    error = OSError("connection reset")
+
+    async def call() -> dict[str, Any]:
+        raise error
+
+    with pytest.raises(OSError):
+        await metrics.observe("mcp__db__query", {}, None, call)
+
+    stats = metrics.stats()["mcp__db__query"]
+    assert (stats.count, stats.errors, stats.bytes_out) == (1, 1, 0)
+    assert tracer.spans[0].exceptions == [error]
+    assert tracer.spans[0].attributes["mcp.tool.is_error"] is True
+
+
+def test_percentiles_cover_the_most_recent_calls() -> None:
+    metrics = ToolCallMetrics(window=4)
+    for ms in range(1, 11):
+        metrics.record("mcp__db__query", float(ms), is_error=ms % 5 == 0)
+
+    stats = metrics.stats()["mcp__db__query"]
+    # Percentiles over 7-10 ms, totals over every call
+    assert (stats.p50_ms, stats.p95_ms, stats.p99_ms) == (8.0, 10.0, 10.0)
+    assert (stats.count, stats.errors, stats.max_ms) == (10, 2, 10.0)
+    assert stats.mean_ms == 5.5
+
+    metrics.reset()
+    assert metrics.stats() == {}